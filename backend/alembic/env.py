@@ -9,6 +9,10 @@ sys.path.append(os.getcwd())
 
 # --- IMPORTS MODÈLES ---
 from app.models.movie import Movie
+from app.models.availability import MovieAvailability
+from app.models.neighbors import MovieNeighbors
+from app.models.feeds import ProviderFeed
+from app.models.progress import ChallengeDefinition, WatchEvent, UserProgress
 from sqlmodel import SQLModel
 
 config = context.config
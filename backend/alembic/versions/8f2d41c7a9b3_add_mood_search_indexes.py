@@ -0,0 +1,35 @@
+"""add mood search indexes
+
+Revision ID: 8f2d41c7a9b3
+Revises: 3c950e48f720
+Create Date: 2026-10-18 09:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d41c7a9b3'
+down_revision: Union[str, Sequence[str], None] = '3c950e48f720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Prédicats de /search/mood : genres (@> / &&), release_date, vote_average + tri popularité
+    op.create_index('ix_movies_genres', 'movies', ['genres'], unique=False, postgresql_using='gin')
+    op.create_index(op.f('ix_movies_release_date'), 'movies', ['release_date'], unique=False)
+    op.create_index(op.f('ix_movies_vote_average'), 'movies', ['vote_average'], unique=False)
+    op.create_index(op.f('ix_movies_popularity'), 'movies', ['popularity'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_movies_popularity'), table_name='movies')
+    op.drop_index(op.f('ix_movies_vote_average'), table_name='movies')
+    op.drop_index(op.f('ix_movies_release_date'), table_name='movies')
+    op.drop_index('ix_movies_genres', table_name='movies')
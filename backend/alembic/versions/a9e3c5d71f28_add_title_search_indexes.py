@@ -0,0 +1,47 @@
+"""add title search indexes
+
+Revision ID: a9e3c5d71f28
+Revises: f4b8d2e03a19
+Create Date: 2026-10-18 18:47:19.603215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e3c5d71f28'
+down_revision: Union[str, Sequence[str], None] = 'f4b8d2e03a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() est STABLE (dictionnaire modifiable) : inutilisable dans un index.
+    # Wrapper IMMUTABLE avec dictionnaire explicite, comme recommandé par la doc Postgres.
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    )
+    # Recherche floue / sous-chaîne (%, similarity, LIKE '%x%') insensible aux accents et à la casse
+    op.execute("CREATE INDEX ix_movies_title_trgm ON movies USING gin (lower(f_unaccent(title)) gin_trgm_ops)")
+    op.execute(
+        "CREATE INDEX ix_movies_original_title_trgm ON movies "
+        "USING gin (lower(f_unaccent(original_title)) gin_trgm_ops)"
+    )
+    # Autocomplétion par préfixe (LIKE 'x%') : B-tree text_pattern_ops, indépendant de la collation
+    op.execute("CREATE INDEX ix_movies_title_prefix ON movies (lower(f_unaccent(title)) text_pattern_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_movies_title_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_movies_original_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_movies_title_trgm")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,37 @@
+"""add provider feeds
+
+Revision ID: b2f7e4c96d30
+Revises: a9e3c5d71f28
+Create Date: 2026-10-18 19:20:52.871044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f7e4c96d30'
+down_revision: Union[str, Sequence[str], None] = 'a9e3c5d71f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('provider_feeds',
+    sa.Column('provider', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('region', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=False),
+    sa.Column('tmdb_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('scores', postgresql.ARRAY(sa.Float()), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('provider', 'region')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('provider_feeds')
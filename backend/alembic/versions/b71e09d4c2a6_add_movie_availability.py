@@ -0,0 +1,40 @@
+"""add movie availability
+
+Revision ID: b71e09d4c2a6
+Revises: 8f2d41c7a9b3
+Create Date: 2026-10-18 14:03:27.904416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e09d4c2a6'
+down_revision: Union[str, Sequence[str], None] = '8f2d41c7a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_availability',
+    sa.Column('tmdb_id', sa.Integer(), nullable=False),
+    sa.Column('region', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=False),
+    sa.Column('providers', postgresql.ARRAY(sa.String()), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('next_refresh_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_requested_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('tmdb_id', 'region')
+    )
+    op.create_index(op.f('ix_movie_availability_next_refresh_at'), 'movie_availability', ['next_refresh_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_movie_availability_next_refresh_at'), table_name='movie_availability')
+    op.drop_table('movie_availability')
@@ -0,0 +1,59 @@
+"""add challenges, watch events and user progress
+
+Revision ID: c8d1a6f35e94
+Revises: b2f7e4c96d30
+Create Date: 2026-10-18 20:04:37.216589
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d1a6f35e94'
+down_revision: Union[str, Sequence[str], None] = 'b2f7e4c96d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('challenges',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('definition', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_challenges_is_active'), 'challenges', ['is_active'], unique=False)
+    op.create_table('watch_events',
+    sa.Column('event_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('user_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('tmdb_id', sa.Integer(), nullable=False),
+    sa.Column('watched_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index(op.f('ix_watch_events_user_id'), 'watch_events', ['user_id'], unique=False)
+    op.create_table('user_progress',
+    sa.Column('user_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('challenge_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('movies_watched', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('current_count', sa.Integer(), nullable=False),
+    sa.Column('is_completed', sa.Boolean(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'challenge_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_progress')
+    op.drop_index(op.f('ix_watch_events_user_id'), table_name='watch_events')
+    op.drop_table('watch_events')
+    op.drop_index(op.f('ix_challenges_is_active'), table_name='challenges')
+    op.drop_table('challenges')
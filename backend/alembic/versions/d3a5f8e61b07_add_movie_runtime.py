@@ -0,0 +1,28 @@
+"""add movie runtime
+
+Revision ID: d3a5f8e61b07
+Revises: b71e09d4c2a6
+Create Date: 2026-10-18 16:41:55.270183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a5f8e61b07'
+down_revision: Union[str, Sequence[str], None] = 'b71e09d4c2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('runtime', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('movies', 'runtime')
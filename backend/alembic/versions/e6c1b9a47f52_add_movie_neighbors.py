@@ -0,0 +1,35 @@
+"""add movie neighbors
+
+Revision ID: e6c1b9a47f52
+Revises: d3a5f8e61b07
+Create Date: 2026-10-18 17:22:08.514396
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c1b9a47f52'
+down_revision: Union[str, Sequence[str], None] = 'd3a5f8e61b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_neighbors',
+    sa.Column('tmdb_id', sa.Integer(), nullable=False),
+    sa.Column('neighbor_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('scores', postgresql.ARRAY(sa.Float()), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('tmdb_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('movie_neighbors')
@@ -0,0 +1,31 @@
+"""add movie embedding model
+
+Revision ID: f4b8d2e03a19
+Revises: e6c1b9a47f52
+Create Date: 2026-10-18 18:05:41.112903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8d2e03a19'
+down_revision: Union[str, Sequence[str], None] = 'e6c1b9a47f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('embedding_model', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    # Les vecteurs existants viennent tous de l'ingestion Gemini
+    op.execute("UPDATE movies SET embedding_model = 'gemini/text-embedding-004' WHERE embedding IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('movies', 'embedding_model')
@@ -0,0 +1,174 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache mémoire borné : éviction LRU + expiration optionnelle (TTL).
+
+    Thread-safe (les services appellent souvent le cache depuis `asyncio.to_thread`).
+    Les horodatages sont en temps "mur" (time.time) pour pouvoir être persistés.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize doit être >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, stored_at = entry
+            if self._is_expired(stored_at, time.time()):
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Comme `get`, mais retourne (valeur, stored_at) pour juger de la fraîcheur côté appelant."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry[1], time.time()):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, stored_at if stored_at is not None else time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> List[Tuple[Hashable, Any, float]]:
+        """Snapshot (clé, valeur, stored_at) des entrées non expirées, de la plus ancienne à la plus récente."""
+        now = time.time()
+        with self._lock:
+            return [
+                (key, value, stored_at)
+                for key, (value, stored_at) in self._data.items()
+                if not self._is_expired(stored_at, now)
+            ]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter([key for key, _, _ in self.items()])
+
+
+
+# ==========================================
+# BACKENDS "CLÉ -> VALEUR JSON" (cache de réponses HTTP)
+# ==========================================
+
+# Interface asynchrone : appelée depuis les endpoints, un aller-retour réseau (Redis) ne doit
+# jamais bloquer la boucle d'événements.
+
+class InMemoryBackend:
+    """Backend par défaut : LRU mémoire propre au process."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """
+    Backend partagé entre instances, pour tout serveur parlant le protocole Redis
+    (Redis, Valkey, Memorystore...). Dépendance optionnelle : `pip install redis`.
+    Client asyncio (redis.asyncio). Redis injoignable = cache manqué (loggé), jamais une erreur.
+    """
+
+    def __init__(self, url: str, ttl: Optional[float] = None, prefix: str = "cinephile:",
+                 socket_timeout: float = 0.5):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("Backend Redis demandé mais le paquet 'redis' n'est pas installé.") from e
+        # from_url ne se connecte pas : le pool s'ouvre au premier appel, dans la boucle de l'API
+        self._client = aioredis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout
+        )
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Cache Redis indisponible (lecture)", extra={"error": repr(e)})
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        ttl = int(self.ttl) if self.ttl else None
+        try:
+            await self._client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=ttl)
+        except Exception as e:
+            logger.warning("Cache Redis indisponible (écriture)", extra={"error": repr(e)})
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.prefix + key)
+
+    async def clear(self) -> None:
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+    async def close(self) -> None:
+        # aclose() depuis redis 5.0.1, close() avant
+        close = getattr(self._client, "aclose", None) or self._client.close
+        await close()
+
+
+def make_cache_backend(url: Optional[str], maxsize: int = 1024, ttl: Optional[float] = None):
+    """`redis://...` / `rediss://...` -> RedisBackend, sinon LRU mémoire."""
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, ttl=ttl)
+    return InMemoryBackend(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,15 @@
+import functools
+from pathlib import Path
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> None:
+    """
+    Charge le .env une seule fois par process (idempotent).
+    Priorité : variables déjà présentes > backend/.env > .env trouvé depuis le CWD.
+    """
+    load_dotenv(dotenv_path=BACKEND_DIR / ".env")
+    load_dotenv()
@@ -7,5 +7,39 @@ PROVIDER_MAPPING = {
     "Apple TV Plus": 350
 }
 
+# Un bit par plateforme : les abonnements d'un utilisateur tiennent dans un entier
+PROVIDER_BITS = {name: 1 << i for i, name in enumerate(PROVIDER_MAPPING)}
 
+# Libellés alternatifs (front, variantes TMDB) -> nom canonique de PROVIDER_MAPPING
+PROVIDER_ALIASES = {
+    "Disney+": "Disney Plus",
+    "Apple TV+": "Apple TV Plus",
+    "Amazon Prime": "Amazon Prime Video",
+    "Prime Video": "Amazon Prime Video",
+}
+
+# Genres TMDB (libellés fr-FR -> ID) : 19 genres officiels
+GENRES = {
+    "Action": 28,
+    "Aventure": 12,
+    "Animation": 16,
+    "Comédie": 35,
+    "Crime": 80,
+    "Documentaire": 99,
+    "Drame": 18,
+    "Famille": 10751,
+    "Fantastique": 14,
+    "Histoire": 36,
+    "Horreur": 27,
+    "Musique": 10402,
+    "Mystère": 9648,
+    "Romance": 10749,
+    "Science Fiction": 878,
+    "Téléfilm": 10770,
+    "Thriller": 53,
+    "Guerre": 10752,
+    "Western": 37
+}
 
+# Index inverse (ID TMDB -> libellé) : c'est ce libellé qui est stocké dans Movie.genres
+GENRE_NAMES_BY_ID = {genre_id: name for name, genre_id in GENRES.items()}
@@ -0,0 +1,21 @@
+import json
+import base64
+from typing import Any, Dict
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Curseur opaque pour le client : JSON compact en base64 url-safe (sans padding)."""
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Inverse de `encode_cursor`. Lève ValueError si le curseur est illisible."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Curseur invalide") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Curseur invalide")
+    return payload
@@ -0,0 +1,25 @@
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    Budget de temps d'une requête, propagé de l'endpoint jusqu'aux appels externes.
+    Chaque étape n'attend jamais plus que `remaining()`.
+    """
+
+    def __init__(self, budget_s: float):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout à passer à un appel : le temps restant, plafonné par `cap`."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(remaining, cap)
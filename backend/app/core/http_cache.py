@@ -0,0 +1,262 @@
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import httpx
+
+from app.core.config import BACKEND_DIR
+from app.core.metrics import REGISTRY, Counter
+
+DEFAULT_CACHE_PATH = BACKEND_DIR / ".cache" / "http_cache.sqlite"
+
+# Paramètres jamais inclus dans la clé (secrets : ne doivent ni fragmenter ni fuiter dans le cache)
+SECRET_PARAMS = frozenset({"api_key"})
+# En-têtes invalidés par le décodage du corps (on stocke le corps décompressé)
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+
+HTTP_CACHE_EVENTS = REGISTRY.register(Counter(
+    "cinephile_http_cache_total",
+    "Cache HTTP disque sous le client TMDB (hit, miss, stale, revalidated, stored, bypass).",
+    labelnames=("result",),
+))
+
+
+def cache_key(request: httpx.Request) -> str:
+    """Méthode + URL avec paramètres triés, sans les paramètres secrets."""
+    params = sorted((k, v) for k, v in request.url.params.multi_items() if k not in SECRET_PARAMS)
+    url = request.url.copy_with(query=None, fragment=None)
+    canonical = json.dumps([request.method, str(url), params], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _cache_control(headers: httpx.Headers) -> dict:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def freshness_lifetime(headers: httpx.Headers, default_ttl: float = 0.0) -> Optional[float]:
+    """
+    Durée de fraîcheur (secondes) d'une réponse, None si elle ne doit pas être stockée.
+    Priorité : no-store > s-maxage/max-age > Expires > `default_ttl`. no-cache = stockée mais toujours revalidée.
+    """
+    directives = _cache_control(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0.0, float(directives[name]))
+            except ValueError:
+                return 0.0
+    if "expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["expires"]).timestamp()
+            date = parsedate_to_datetime(headers["date"]).timestamp() if "date" in headers else time.time()
+            return max(0.0, expires - date)
+        except (TypeError, ValueError):
+            return 0.0
+    return default_ttl
+
+
+class SQLiteHTTPCache:
+    """
+    Stockage clé-valeur des réponses HTTP dans un fichier SQLite (corps + en-têtes + validateurs).
+
+    Thread-safe : une connexion partagée protégée par un verrou (les accès sont courts).
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL,"
+                " body BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[int, list, bytes, float]]:
+        """Retourne (status, en-têtes, corps, expires_at) ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2], row[3]
+
+    def set(self, key: str, status: int, headers: list, body: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, stored_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, json.dumps(headers), body, time.time(), expires_at),
+            )
+            self._conn.commit()
+
+    def touch(self, key: str, headers: list, expires_at: float) -> None:
+        """Après un 304 : nouveaux en-têtes et nouvelle échéance, corps inchangé."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(headers), time.time(), expires_at, key),
+            )
+            self._conn.commit()
+
+    def purge(self, older_than: float) -> int:
+        """Supprime les entrées expirées depuis plus de `older_than` secondes. Retourne le nombre supprimé."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time() - older_than,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_cache(setting: Optional[str]) -> Optional[SQLiteHTTPCache]:
+    """
+    Interprète une variable de configuration : vide/"0" = désactivé, "1" = chemin par défaut,
+    autre valeur = chemin du fichier SQLite.
+    """
+    if not setting or setting == "0":
+        return None
+    return SQLiteHTTPCache(str(DEFAULT_CACHE_PATH) if setting == "1" else setting)
+
+
+class _CachePolicy:
+    """Logique commune aux transports sync et async : lecture, requête conditionnelle, écriture."""
+
+    def __init__(self, store: SQLiteHTTPCache, default_ttl: float = 0.0):
+        self.store = store
+        self.default_ttl = default_ttl
+
+    def lookup(self, request: httpx.Request):
+        """Retourne (clé, entrée, réponse fraîche ou None). Ajoute les validateurs si l'entrée est périmée."""
+        if request.method != "GET":
+            HTTP_CACHE_EVENTS.inc(result="bypass")
+            return None, None, None
+        key = cache_key(request)
+        entry = self.store.get(key)
+        if entry is None:
+            HTTP_CACHE_EVENTS.inc(result="miss")
+            return key, None, None
+        status, headers, body, expires_at = entry
+        if time.time() < expires_at:
+            HTTP_CACHE_EVENTS.inc(result="hit")
+            return key, entry, self._build(request, status, headers, body, "HIT")
+        HTTP_CACHE_EVENTS.inc(result="stale")
+        cached = httpx.Headers(headers)
+        if "etag" in cached:
+            request.headers["If-None-Match"] = cached["etag"]
+        if "last-modified" in cached:
+            request.headers["If-Modified-Since"] = cached["last-modified"]
+        return key, entry, None
+
+    def revalidated(self, request: httpx.Request, key: str, entry, response: httpx.Response) -> httpx.Response:
+        """304 : le corps stocké reste valable, on rafraîchit en-têtes et échéance."""
+        status, headers, body, _ = entry
+        merged = httpx.Headers(headers)
+        merged.update({k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS})
+        merged_list = list(merged.multi_items())
+        lifetime = freshness_lifetime(merged, self.default_ttl) or 0.0
+        self.store.touch(key, merged_list, time.time() + lifetime)
+        HTTP_CACHE_EVENTS.inc(result="revalidated")
+        return self._build(request, status, merged_list, body, "REVALIDATED")
+
+    def store_response(self, key: str, response: httpx.Response, body: bytes) -> None:
+        if response.status_code != 200:
+            return
+        lifetime = freshness_lifetime(response.headers, self.default_ttl)
+        has_validator = "etag" in response.headers or "last-modified" in response.headers
+        # Ni fraîcheur ni validateur : la stocker ne ferait jamais économiser de requête
+        if lifetime is None or (lifetime == 0.0 and not has_validator):
+            return
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROPPED_HEADERS]
+        self.store.set(key, response.status_code, headers, body, time.time() + lifetime)
+        HTTP_CACHE_EVENTS.inc(result="stored")
+
+    @staticmethod
+    def _build(request: httpx.Request, status: int, headers: list, body: bytes, cache_status: str) -> httpx.Response:
+        return httpx.Response(status, headers=headers + [("X-Cache", cache_status)], content=body, request=request)
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """Transport httpx async : sert depuis le cache disque, revalide (ETag/Last-Modified), stocke."""
+
+    def __init__(self, store: SQLiteHTTPCache, transport: Optional[httpx.AsyncBaseTransport] = None, default_ttl: float = 0.0):
+        self._policy = _CachePolicy(store, default_ttl)
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # SQLite est bloquant : accès hors de la boucle d'événements
+        key, entry, cached = await asyncio.to_thread(self._policy.lookup, request)
+        if cached is not None:
+            return cached
+        response = await self._transport.handle_async_request(request)
+        if key is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            return await asyncio.to_thread(self._policy.revalidated, request, key, entry, response)
+        body = await response.aread()
+        await asyncio.to_thread(self._policy.store_response, key, response, body)
+        return _CachePolicy._build(
+            request, response.status_code,
+            [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROPPED_HEADERS],
+            body, "MISS",
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class CachingTransport(httpx.BaseTransport):
+    """Équivalent synchrone (scripts d'ingestion)."""
+
+    def __init__(self, store: SQLiteHTTPCache, transport: Optional[httpx.BaseTransport] = None, default_ttl: float = 0.0):
+        self._policy = _CachePolicy(store, default_ttl)
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key, entry, cached = self._policy.lookup(request)
+        if cached is not None:
+            return cached
+        response = self._transport.handle_request(request)
+        if key is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            return self._policy.revalidated(request, key, entry, response)
+        body = response.read()
+        self._policy.store_response(key, response, body)
+        return _CachePolicy._build(
+            request, response.status_code,
+            [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROPPED_HEADERS],
+            body, "MISS",
+        )
+
+    def close(self) -> None:
+        self._transport.close()
@@ -0,0 +1,69 @@
+import os
+import time
+import random
+import cProfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+# --- PROFILER À LA DEMANDE (opt-in) ---
+# PROFILE_PATHS=/search,/search/mood   PROFILE_SAMPLE_RATE=0.05   PROFILE_DIR=/tmp/profiles
+# Une fraction des requêtes sur ces chemins est profilée et un rapport est écrit par requête.
+# - pyinstrument s'il est installé : profiler par ÉCHANTILLONNAGE (pile relevée toutes les ~1 ms),
+#   surcoût faible, mode async qui n'attribue à la requête que le temps de ses propres coroutines.
+# - sinon cProfile : profiler DÉTERMINISTE (chaque appel de fonction est tracé), surcoût élevé,
+#   et il mesure tout ce qui tourne sur le thread de la boucle pendant la requête, y compris les
+#   autres requêtes concurrentes. Fichier .prof lisible avec `python -m pstats` ou snakeviz.
+# Un seul profil à la fois par process (deux profilers actifs se gênent, cProfile refuse même
+# de démarrer) : une requête tirée au sort pendant un profil en cours n'est pas profilée.
+PROFILE_PATHS = {p.strip() for p in os.getenv("PROFILE_PATHS", "").split(",") if p.strip()}
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "/tmp/cinephile-profiles"))
+
+_active = threading.Lock()
+
+
+def should_profile(path: str) -> bool:
+    return PROFILE_SAMPLE_RATE > 0 and path in PROFILE_PATHS and random.random() < PROFILE_SAMPLE_RATE
+
+
+class RequestProfiler:
+    def __init__(self, path: str):
+        self.path = path
+        self._profiler = None
+        self._is_pyinstrument = False
+
+    def start(self) -> bool:
+        """Démarre le profil. False (rien n'est profilé) si un autre profil est en cours."""
+        if not _active.acquire(blocking=False):
+            return False
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            return True
+        self._profiler = Profiler(async_mode="enabled")
+        self._is_pyinstrument = True
+        self._profiler.start()
+        return True
+
+    def stop(self) -> Optional[Path]:
+        if self._profiler is None:
+            return None
+        try:
+            if self._is_pyinstrument:
+                self._profiler.stop()
+            else:
+                self._profiler.disable()
+        finally:
+            _active.release()
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.path.strip('/').replace('/', '_') or 'root'}-{time.time_ns()}"
+        if self._is_pyinstrument:
+            output = PROFILE_DIR / f"{stem}.html"
+            output.write_text(self._profiler.output_html(), encoding="utf-8")
+        else:
+            output = PROFILE_DIR / f"{stem}.prof"
+            self._profiler.dump_stats(str(output))
+        return output
@@ -0,0 +1,38 @@
+from functools import reduce
+from typing import Iterable, List
+
+from app.core.constants import PROVIDER_BITS, PROVIDER_ALIASES
+
+
+def canonical_provider(name: str) -> str:
+    """Nom canonique d'une plateforme (alias résolus), inchangé si inconnu."""
+    return PROVIDER_ALIASES.get(name, name)
+
+
+def unknown_providers(names: Iterable[str]) -> List[str]:
+    """Plateformes sans bit attribué (à refuser en entrée d'API)."""
+    return [name for name in names if canonical_provider(name) not in PROVIDER_BITS]
+
+
+def encode_providers(names: Iterable[str]) -> int:
+    """Liste de plateformes -> bitset. Les noms inconnus sont ignorés."""
+    mask = 0
+    for name in names:
+        mask |= PROVIDER_BITS.get(canonical_provider(name), 0)
+    return mask
+
+
+def decode_providers(mask: int) -> List[str]:
+    """Bitset -> noms canoniques, dans l'ordre de PROVIDER_MAPPING."""
+    return [name for name, bit in PROVIDER_BITS.items() if mask & bit]
+
+
+def intersection_mask(masks: Iterable[int]) -> int:
+    """Plateformes communes à tous (AND). 0 si aucun masque."""
+    masks = list(masks)
+    return reduce(lambda a, b: a & b, masks) if masks else 0
+
+
+def union_mask(masks: Iterable[int]) -> int:
+    """Plateformes d'au moins un membre (OR)."""
+    return reduce(lambda a, b: a | b, masks, 0)
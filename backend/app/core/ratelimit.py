@@ -0,0 +1,31 @@
+import time
+import asyncio
+
+
+class RateLimiter:
+    """
+    Token bucket asynchrone : au plus `rate_per_minute` acquisitions par minute,
+    avec une rafale maximale de `burst` (par défaut : 1/10e de la minute).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute doit être > 0")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute // 10)))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,90 @@
+import time
+import threading
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Cache indexé par vecteur : une requête dont la similarité cosinus avec une entrée
+    dépasse `threshold` réutilise sa valeur (paraphrases : "film qui fait peur" ~ "un film effrayant").
+
+    Les vecteurs tiennent dans une matrice numpy (capacité x dim) : une recherche = un produit
+    matrice-vecteur. Éviction LRU, expiration optionnelle (TTL). Thread-safe.
+    """
+
+    def __init__(self, maxsize: int = 1024, threshold: float = 0.95, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize doit être >= 1")
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self._matrix: Optional[np.ndarray] = None  # Alloué au premier ajout (dimension inconnue avant)
+        self._values: list = [None] * maxsize
+        self._last_used = np.zeros(maxsize, dtype=np.float64)
+        self._stored_at = np.zeros(maxsize, dtype=np.float64)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _similarities(self, query: np.ndarray, now: float) -> np.ndarray:
+        sims = self._matrix[:self._size] @ query
+        if self.ttl is not None:
+            sims[now - self._stored_at[:self._size] > self.ttl] = -np.inf
+        return sims
+
+    def lookup(self, vector: Sequence[float]) -> Tuple[Optional[Any], float]:
+        """Retourne (valeur, similarité) de l'entrée la plus proche ; valeur None si sous le seuil."""
+        query = self._normalize(vector)
+        now = time.time()
+        with self._lock:
+            if self._size == 0 or self._matrix.shape[1] != query.shape[0]:
+                return None, 0.0
+            sims = self._similarities(query, now)
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < self.threshold:
+                return None, similarity
+            self._last_used[best] = now
+            return self._values[best], similarity
+
+    def add(self, vector: Sequence[float], value: Any) -> None:
+        """Ajoute une entrée (remplace un quasi-doublon, sinon évince la moins récemment utilisée)."""
+        query = self._normalize(vector)
+        now = time.time()
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                self._matrix = np.zeros((self.maxsize, query.shape[0]), dtype=np.float32)
+                self._size = 0
+            slot = None
+            if self._size:
+                sims = self._matrix[:self._size] @ query
+                best = int(np.argmax(sims))
+                if sims[best] >= 0.9999:
+                    slot = best
+            if slot is None:
+                if self._size < self.maxsize:
+                    slot = self._size
+                    self._size += 1
+                else:
+                    slot = int(np.argmin(self._last_used))
+            self._matrix[slot] = query
+            self._values[slot] = value
+            self._last_used[slot] = now
+            self._stored_at[slot] = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = [None] * self.maxsize
+            self._last_used[:] = 0
+            self._stored_at[:] = 0
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,16 @@
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un texte libre pour servir de clé de comparaison.
+
+    Accents supprimés, casse repliée (casefold) et espaces compactés :
+    "  Comédie   LÉGÈRE " -> "comedie legere"
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _WHITESPACE_RE.sub(" ", without_accents.casefold()).strip()
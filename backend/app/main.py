@@ -1,15 +1,199 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import os
+import json
+import asyncio
+import time
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.core.logs import setup_logging
+from app.core.metrics import REGISTRY, HTTP_REQUEST_DURATION, Counter, start_request_timings, server_timing_header
+from app.core.cache import make_cache_backend
+from app.core.text import normalize_text
+from app.core.deadline import Deadline
+from app.core.cursor import encode_cursor, decode_cursor
+from app.models.availability import AvailabilityStatus
+from app.core.profiling import RequestProfiler, should_profile
+from app.services.warmup import warm_up, shut_down
+from app.services.embeddings import check_catalog_model, EmbeddingModelMismatch
 # On importe la nouvelle fonction de filtrage
-from app.services.recommendation import find_similar_movies, filter_movies_by_availability
+from app.services.recommendation import (
+    find_similar_movies_page, filter_movies_by_availability, filter_movies_by_provider_mask, find_movies_by_mood,
+)
+from app.services import sessions
+from app.services.neighbors import get_similar_movies
+from app.services.feeds import get_home_feed, run_feed_reloader
+from app.services.ai_mood import run_mood_cache_flusher
+from app.services import progress
+from app.services.title_search import search_titles, autocomplete_titles
+from app.models.session import GroupSession, SessionMode
+from app.models.challenge import Challenge
+from app.models.progress import UserProgress
+from app.core.providers import canonical_provider, decode_providers, unknown_providers
+from app.core.constants import PROVIDER_MAPPING
+from app.services.availability import AVAILABILITY_TTL, run_refresher, run_requested_flusher
 
-app = FastAPI(title="Cinéphile Companion API")
+setup_logging()
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# Refresher de disponibilités dans le process de l'API (sinon : python refresh_availability.py)
+AVAILABILITY_REFRESHER = os.getenv("AVAILABILITY_REFRESHER", "0") == "1"
+# Refus de démarrer si le catalogue a été vectorisé par un autre modèle que EMBEDDING_PROVIDER
+EMBEDDING_MODEL_CHECK = os.getenv("EMBEDDING_MODEL_CHECK", "1") == "1"
+
+async def _check_embedding_model() -> None:
+    try:
+        await asyncio.to_thread(check_catalog_model)
+    except EmbeddingModelMismatch:
+        raise
+    except Exception as e:
+        # DB injoignable : la vérification n'est pas possible, le démarrage continue (cf. warm-up)
+        logger.warning("Vérification du modèle d'embedding impossible", extra={"error": str(e)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cold start Cloud Run : pool DB, client TMDB et caches prêts avant la première requête."""
+    if EMBEDDING_MODEL_CHECK:
+        await _check_embedding_model()
+    if WARMUP_ENABLED:
+        await warm_up()
+
+    stop_background = asyncio.Event()
+    # Films servis -> last_requested_at : la priorité du refresher vaut aussi quand il tourne à part
+    background = [
+        asyncio.create_task(run_requested_flusher(stop_background)),
+        asyncio.create_task(run_feed_reloader(stop_background)),
+        asyncio.create_task(run_mood_cache_flusher(stop_background)),
+    ]
+    if AVAILABILITY_REFRESHER:
+        background.append(asyncio.create_task(run_refresher(stop_background)))
+    yield
+    stop_background.set()
+    await asyncio.gather(*background, return_exceptions=True)
+    await response_cache.close()
+    await shut_down()
+
+app = FastAPI(title="Cinéphile Companion API", lifespan=lifespan)
+
+# --- Cache de réponses /search ---
+# TTL aligné sur celui des disponibilités : une réponse ne survit pas aux données qui la composent.
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(AVAILABILITY_TTL)))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+# Vide = LRU en mémoire ; "redis://host:6379/0" = backend partagé entre instances
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+response_cache = make_cache_backend(RESPONSE_CACHE_URL, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+# --- Budget de temps par requête ---
+SEARCH_DEADLINE_S = float(os.getenv("SEARCH_DEADLINE_S", "4.0"))
+DEGRADED_RESPONSES = REGISTRY.register(Counter(
+    "cinephile_degraded_responses_total",
+    "Réponses servies avec une disponibilité partielle (stale/unknown).",
+    labelnames=("endpoint", "status"),
+))
+
+RESPONSE_CACHE_EVENTS = REGISTRY.register(Counter(
+    "cinephile_response_cache_total",
+    "Résultats du cache de réponses (hit, miss, not_modified).",
+    labelnames=("endpoint", "result"),
+))
+
+# --- Instrumentation ---
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """Chronomètre chaque requête : histogramme Prometheus + header Server-Timing par étape."""
+    timings = start_request_timings()
+    profiler = RequestProfiler(request.url.path) if should_profile(request.url.path) else None
+    if profiler and not profiler.start():
+        profiler = None  # Un autre profil est en cours
+
+    start = time.perf_counter()
+    status = "500"  # Exception non gérée dans le handler
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    finally:
+        # Même si le handler lève : le profiler ne reste pas actif et la durée est comptée
+        elapsed = time.perf_counter() - start
+        if profiler:
+            report = profiler.stop()
+            logger.info("Profil enregistré", extra={"path": request.url.path, "report": str(report)})
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            elapsed,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),  # Template de route : cardinalité bornée
+            status=status,
+        )
+
+    response.headers["Server-Timing"] = server_timing_header(timings, total=elapsed)
+    return response
 
 # --- Modèles de données ---
 class SearchRequest(BaseModel):
     query: str
     providers: Optional[List[str]] = []  # Default à liste vide pour éviter le None
+    country: str = Field(default="FR", min_length=2, max_length=2)
+    cursor: Optional[str] = None  # Valeur du header X-Next-Cursor de la page précédente ("Voir plus")
+
+class MoodSearchRequest(BaseModel):
+    query: str
+    providers: Optional[List[str]] = []
+    limit: int = Field(default=10, ge=1, le=50)
+    semantic: bool = False  # True : filtres SQL + classement par similarité vectorielle
+
+class SessionRequest(BaseModel):
+    members: Dict[str, List[str]] = {}  # Nom -> plateformes
+    mode: SessionMode = SessionMode.INTERSECTION
+    country: str = Field(default="FR", min_length=2, max_length=2)
+
+class MemberRequest(BaseModel):
+    providers: List[str] = []
+
+class SessionSearchRequest(BaseModel):
+    query: str
+
+class SessionResponse(BaseModel):
+    id: str
+    mode: SessionMode
+    country: str
+    members: Dict[str, List[str]]
+    providers: List[str]  # Plateformes retenues pour le groupe (selon le mode)
+
+class WatchRequest(BaseModel):
+    tmdb_id: int
+    # Clé d'idempotence (un même événement envoyé deux fois ne compte qu'une fois)
+    event_id: Optional[str] = Field(default=None, max_length=128)
+    watched_at: Optional[datetime] = None
+
+class ProgressResponse(BaseModel):
+    challenge_id: str
+    title: Optional[str] = None
+    current_count: int
+    target_count: Optional[int] = None
+    is_completed: bool
+    movies_watched: List[int]
+    completed_at: Optional[datetime] = None
+
+class WatchResponse(BaseModel):
+    duplicate: bool  # Événement déjà reçu : aucune progression modifiée
+    updated: List[ProgressResponse]
+
+class ProviderResponse(BaseModel):
+    name: str
+    tmdb_id: int
+
+class TitleResponse(BaseModel):
+    tmdb_id: int
+    title: str
+    release_date: Optional[str] = None
+    poster_path: Optional[str] = None
+    source: str = "local"  # "local" (catalogue) ou "tmdb" (titre hors catalogue)
 
 class MovieResponse(BaseModel):
     id: int
@@ -18,63 +202,395 @@ class MovieResponse(BaseModel):
     vote_average: float
     poster_path: Optional[str] = None
     available_on: List[str] = []  # <--- Nouveau champ
+    # None si aucun filtre de plateformes n'a été demandé
+    availability_status: Optional[AvailabilityStatus] = None
 
 # --- Routes ---
 @app.get("/")
 def read_root():
     return {"message": "Cinéphile Companion API is running 🚀"}
 
-@app.post("/search", response_model=List[MovieResponse])
-async def search_movies(request: SearchRequest):
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Exposition Prometheus (format texte 0.0.4)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/providers", response_model=List[ProviderResponse])
+def list_providers(response: Response):
+    """Plateformes prises en charge (noms canoniques, à renvoyer tels quels dans `providers`)."""
+    # Liste quasi statique : les clients peuvent la garder une journée
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return [ProviderResponse(name=name, tmdb_id=tmdb_id) for name, tmdb_id in PROVIDER_MAPPING.items()]
+
+def _search_cache_key(query: str, providers: List[str], country: str, cursor: Optional[str] = None) -> str:
+    """Clé canonique : requête normalisée + ensemble trié des providers + pays + page (curseur)."""
+    canonical = json.dumps([normalize_text(query), sorted(set(providers)), country.upper(), cursor], ensure_ascii=False)
+    return "search:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _session_search_cache_key(query: str, mask: Optional[int], country: str) -> str:
     """
-    Endpoint principal : RAG + Filtrage Disponibilité.
+    Groupes récurrents : la clé porte le masque de groupe, pas l'id de session. Deux soirées
+    avec les mêmes abonnements partagent l'entrée ; un membre qui arrive ou part change le
+    masque, donc la clé (pas d'invalidation à gérer). `mask` None = aucun filtre.
     """
-    if not request.query:
-        raise HTTPException(status_code=400, detail="La requête ne peut pas être vide.")
+    canonical = json.dumps([normalize_text(query), mask, country.upper()], ensure_ascii=False)
+    return "session_search:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _cache_entry(movies: List[MovieResponse], next_cursor: Optional[str] = None) -> dict:
+    body = json.dumps(jsonable_encoder(movies), ensure_ascii=False)
+    return {
+        "etag": '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"',
+        "body": body,
+        "next_cursor": next_cursor,
+    }
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible (RFC 9110 §13.1.2) : W/"x" correspond à "x" (ETag affaibli par un proxy/gzip)."""
+    if not if_none_match:
+        return False
+    candidates = [_opaque_tag(tag) for tag in if_none_match.split(",")]
+    return "*" in candidates or _opaque_tag(etag) in candidates
+
+def _cached_json_response(request: Request, endpoint: str, entry: dict, cache_status: str) -> Response:
+    """Réponse JSON avec ETag fort ; 304 sans corps si le client a déjà cette version."""
+    headers = {"ETag": entry["etag"], "Cache-Control": "no-cache", "X-Cache": cache_status}
+    if entry.get("next_cursor"):
+        headers["X-Next-Cursor"] = entry["next_cursor"]
+    if _etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        RESPONSE_CACHE_EVENTS.inc(endpoint=endpoint, result="not_modified")
+        return Response(status_code=304, headers=headers)
+    RESPONSE_CACHE_EVENTS.inc(endpoint=endpoint, result=cache_status.lower())
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+def _count_degraded(endpoint: str, movies: List[MovieResponse]) -> bool:
+    """Compte la réponse si au moins un film a une disponibilité dégradée. Retourne True si dégradée."""
+    statuses = {m.availability_status for m in movies} & {AvailabilityStatus.STALE, AvailabilityStatus.UNKNOWN}
+    # Le pire statut l'emporte : unknown > stale
+    if AvailabilityStatus.UNKNOWN in statuses:
+        DEGRADED_RESPONSES.inc(endpoint=endpoint, status=AvailabilityStatus.UNKNOWN.value)
+    elif statuses:
+        DEGRADED_RESPONSES.inc(endpoint=endpoint, status=AvailabilityStatus.STALE.value)
+    return bool(statuses)
+
+def _to_movie_responses(movies_dicts: List[dict]) -> List[MovieResponse]:
+    return [
+        MovieResponse(
+            id=m["id"],
+            title=m["title"],
+            overview=m["overview"],
+            vote_average=m["vote_average"],
+            poster_path=m["poster_path"],
+            available_on=m.get("available_on", []), # Récupère la liste ou vide par défaut
+            availability_status=m.get("availability_status"),
+        )
+        for m in movies_dicts
+    ]
+
+SEARCH_PAGE_SIZE = 10
+
+def _position_from_cursor(query: str, cursor: Optional[str]) -> Tuple[Optional[Tuple[float, int]], Optional[str]]:
+    """
+    Décode le curseur : (dernier (distance, id) servi, ancre du parcours) et vérifie
+    qu'il appartient à cette requête.
+    """
+    if not cursor:
+        return None, None
+    try:
+        payload = decode_cursor(cursor)
+        if payload.get("q") != normalize_text(query):
+            raise ValueError("Curseur d'une autre requête")
+        return (float(payload["d"]), int(payload["i"])), payload.get("a")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide pour cette requête.")
 
-    print(f"🔎 Recherche : '{request.query}' | Providers : {request.providers}")
-    
-    # 1. RAG : On récupère plus de candidats (ex: 10) pour avoir du rab après filtrage
+async def _find_candidates(
+    query: str, deadline: Deadline, after: Optional[Tuple[float, int]] = None, anchor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[Tuple[float, int]], str]:
+    """Étape RAG commune aux recherches individuelles et de groupe. Retourne (candidats, position suivante, ancre)."""
+    # On récupère plus de candidats (ex: 10) pour avoir du rab après filtrage
     # Note : Augmenter la limit ici est crucial car le filtrage va réduire la liste
-    raw_results = await find_similar_movies(request.query, limit=10)
-    
-    if not raw_results:
-        return []
+    try:
+        raw_results, position, anchor = await find_similar_movies_page(
+            query, limit=SEARCH_PAGE_SIZE, after=after, deadline=deadline, anchor=anchor
+        )
+    except TimeoutError:
+        # Sans candidats il n'y a rien à dégrader : on échoue vite et clairement
+        raise HTTPException(status_code=504, detail="La recherche a dépassé le délai imparti.")
+    # Conversion SQLModel -> Dict pour le traitement
+    return [m.model_dump() for m in raw_results], position, anchor
 
-    # 2. Conversion SQLModel -> Dict pour le traitement
-    movies_dicts = [m.model_dump() for m in raw_results]
+async def _run_search(request: SearchRequest, deadline: Deadline) -> Tuple[List[MovieResponse], Optional[str]]:
+    """Pipeline complet : RAG + Filtrage Disponibilité, borné par `deadline`. Retourne (films, curseur suivant)."""
+    # 1. RAG : reprise après le curseur éventuel (l'embedding de la requête est déjà en cache)
+    after, anchor = _position_from_cursor(request.query, request.cursor)
+    movies_dicts, position, anchor = await _find_candidates(request.query, deadline, after, anchor)
+    if not movies_dicts:
+        return [], None
+    # Le curseur suit le parcours vectoriel brut : le filtrage ne fait pas "sauter" de candidats
+    next_cursor = None
+    if position:
+        # "a" : texte brut dont le vecteur ordonne le parcours (la requête de la première page, ou la
+        # paraphrase du cache sémantique). La page suivante ré-embedde exactement ce texte ; la
+        # réponse a pu être servie par le cache à une variante (accents, casse) de la requête.
+        payload = {"q": normalize_text(request.query), "d": position[0], "i": position[1], "a": anchor}
+        next_cursor = encode_cursor(payload)
 
-    # 3. Filtrage par disponibilité
+    # 2. Filtrage par disponibilité
     # Si l'user n'a pas sélectionné de providers, on renvoie tout (ou rien, selon ta logique produit. Ici : tout).
     if request.providers:
         final_movies_dicts = await filter_movies_by_availability(
             movies_dicts, 
             user_providers=[request.providers],
-            country_code="FR"
+            country_code=request.country,
+            deadline=deadline,
         )
     else:
         # Pas de filtre demandé = on renvoie les résultats bruts sans info de streaming spécifique
         final_movies_dicts = movies_dicts
         
-    # --- AJOUT POUR DEBUG CONSOLE ---
-    found_titles = [m["title"] for m in final_movies_dicts]
-    print(f"📤 Résultats ({len(found_titles)}) : {found_titles}")
-    # --------------------------------
+    logger.info("Résultats", extra={"count": len(final_movies_dicts), "titles": [m["title"] for m in final_movies_dicts]})
 
-    # 4. Construction de la réponse typée
-    response = [
-        MovieResponse(
-            id=m["id"],
-            title=m["title"],
-            overview=m["overview"],
-            vote_average=m["vote_average"],
-            poster_path=m["poster_path"],
-            available_on=m.get("available_on", []) # Récupère la liste ou vide par défaut
+    # 3. Construction de la réponse typée
+    return _to_movie_responses(final_movies_dicts), next_cursor
+
+@app.post("/search", response_model=List[MovieResponse])
+async def search_movies(request: SearchRequest, http_request: Request):
+    """
+    Endpoint principal : RAG + Filtrage Disponibilité.
+    Réponses mises en cache par (requête normalisée, providers, pays) et servies avec un ETag :
+    un client qui renvoie `If-None-Match` reçoit un 304 sans corps.
+    Pagination par curseur : `X-Next-Cursor` (absent sur la dernière page) à renvoyer dans `cursor`.
+    """
+    if not request.query:
+        raise HTTPException(status_code=400, detail="La requête ne peut pas être vide.")
+
+    logger.info("Recherche", extra={"query": request.query, "providers": request.providers})
+
+    cache_key = _search_cache_key(request.query, request.providers or [], request.country, request.cursor)
+    entry = await response_cache.get(cache_key)
+    if entry is not None:
+        return _cached_json_response(http_request, "search", entry, "HIT")
+
+    movies, next_cursor = await _run_search(request, Deadline(SEARCH_DEADLINE_S))
+    degraded = _count_degraded("search", movies)
+    entry = _cache_entry(movies, next_cursor)
+    # Une liste vide ou dégradée peut venir d'une panne passagère (Gemini, DB, TMDB) : on ne la fige pas
+    if movies and not degraded:
+        await response_cache.set(cache_key, entry)
+    return _cached_json_response(http_request, "search", entry, "MISS")
+
+@app.post("/search/mood", response_model=List[MovieResponse])
+async def search_movies_by_mood(request: MoodSearchRequest):
+    """
+    Mode Mood : langage naturel -> filtres structurés -> requête SQL sur le catalogue local.
+    Aucun appel TMDB 'discover' : les filtres sont exécutés sur la table movies.
+    """
+    if not request.query:
+        raise HTTPException(status_code=400, detail="La requête ne peut pas être vide.")
+
+    deadline = Deadline(SEARCH_DEADLINE_S)
+    try:
+        filters, raw_results = await find_movies_by_mood(
+            request.query, limit=request.limit, semantic=request.semantic, deadline=deadline
         )
-        for m in final_movies_dicts
-    ]
-    
-    return response
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="La recherche a dépassé le délai imparti.")
+    logger.info("Recherche mood", extra={"query": request.query, "filters": filters, "count": len(raw_results)})
+
+    if not raw_results:
+        return []
+
+    movies_dicts = [m.model_dump() for m in raw_results]
+
+    if request.providers:
+        movies_dicts = await filter_movies_by_availability(
+            movies_dicts,
+            user_providers=[request.providers],
+            country_code="FR",
+            deadline=deadline,
+        )
+
+    movies = _to_movie_responses(movies_dicts)
+    _count_degraded("search_mood", movies)
+    return movies
+
+@app.get("/titles/search", response_model=List[TitleResponse])
+async def search_titles_endpoint(q: str = Query(..., min_length=1), limit: int = Query(default=10, ge=1, le=50)):
+    """Mode Pragmatique : recherche par titre sur le catalogue local (pg_trgm), TMDB en secours."""
+    try:
+        return await search_titles(q, limit=limit, deadline=Deadline(SEARCH_DEADLINE_S))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="La recherche a dépassé le délai imparti.")
+
+@app.get("/titles/autocomplete", response_model=List[TitleResponse])
+async def autocomplete_titles_endpoint(q: str = Query(..., min_length=1), limit: int = Query(default=8, ge=1, le=20)):
+    """Suggestions par préfixe de titre, catalogue local uniquement (appelé à chaque frappe)."""
+    return await autocomplete_titles(q, limit=limit)
+
+@app.get("/movies/{tmdb_id}/similar", response_model=List[MovieResponse])
+async def similar_movies(tmdb_id: int, limit: int = Query(default=10, ge=1, le=50)):
+    """"Films similaires" : lecture du graphe k-NN pré-calculé (python build_neighbors.py)."""
+    movies = await get_similar_movies(tmdb_id, limit=limit)
+    if movies is None:
+        raise HTTPException(status_code=404, detail="Film inconnu ou pas encore dans le graphe de similarité.")
+    return _to_movie_responses([m.model_dump() for m in movies])
+
+@app.get("/home", response_model=List[MovieResponse])
+async def home_feed(
+    providers: List[str] = Query(default=[]),
+    country: str = Query(default="FR", min_length=2, max_length=2),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+):
+    """
+    Accueil : films populaires sur mes plateformes (toutes si aucune n'est précisée),
+    fusionnés depuis les fils pré-calculés (python build_home_feeds.py). Aucun appel TMDB.
+    """
+    _check_providers(providers)
+    names = list(dict.fromkeys(canonical_provider(p) for p in providers)) or list(PROVIDER_MAPPING)
+    return _to_movie_responses(await get_home_feed(names, region=country, limit=limit, offset=offset))
+
+# --- Sessions de groupe "Qui est là ?" ---
+def _check_providers(providers: List[str]) -> None:
+    unknown = unknown_providers(providers)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Plateformes inconnues : {', '.join(unknown)}")
+
+def _get_session_or_404(session_id: str) -> GroupSession:
+    session = sessions.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session introuvable ou expirée.")
+    return session
+
+def _to_session_response(session: GroupSession) -> SessionResponse:
+    return SessionResponse(
+        id=session.id,
+        mode=session.mode,
+        country=session.country,
+        members={name: decode_providers(mask) for name, mask in session.members.items()},
+        providers=decode_providers(sessions.group_mask(session)),
+    )
+
+@app.post("/session", response_model=SessionResponse, status_code=201)
+def create_session(request: SessionRequest):
+    """Ouvre une session de groupe : chaque membre arrive avec ses abonnements."""
+    for providers in request.members.values():
+        _check_providers(providers)
+    session = sessions.create_session(request.members, mode=request.mode, country=request.country)
+    return _to_session_response(session)
+
+@app.get("/session/{session_id}", response_model=SessionResponse)
+def read_session(session_id: str):
+    return _to_session_response(_get_session_or_404(session_id))
+
+@app.put("/session/{session_id}/members/{name}", response_model=SessionResponse)
+def put_session_member(session_id: str, name: str, request: MemberRequest):
+    """Un ami arrive (ou met à jour ses abonnements)."""
+    _check_providers(request.providers)
+    session = sessions.set_member(_get_session_or_404(session_id), name, request.providers)
+    return _to_session_response(session)
+
+@app.delete("/session/{session_id}/members/{name}", response_model=SessionResponse)
+def delete_session_member(session_id: str, name: str):
+    """Un ami s'en va."""
+    session = _get_session_or_404(session_id)
+    if not sessions.remove_member(session, name):
+        raise HTTPException(status_code=404, detail="Membre absent de la session.")
+    return _to_session_response(session)
+
+@app.delete("/session/{session_id}", status_code=204)
+def delete_session(session_id: str):
+    if not sessions.delete_session(session_id):
+        raise HTTPException(status_code=404, detail="Session introuvable ou expirée.")
+    return Response(status_code=204)
+
+@app.post("/session/{session_id}/search", response_model=List[MovieResponse])
+async def search_movies_for_session(session_id: str, request: SessionSearchRequest, http_request: Request):
+    """
+    Recherche pour tout le groupe : masque de groupe (AND/OR des bitsets des membres),
+    disponibilité résolue une seule fois pour les candidats, puis test bit à bit par film.
+    Mise en cache par (masque de groupe, pays, requête normalisée) comme /search, avec ETag.
+    """
+    if not request.query:
+        raise HTTPException(status_code=400, detail="La requête ne peut pas être vide.")
+    session = _get_session_or_404(session_id)
+    # Personne n'a déclaré d'abonnement : pas de filtre, comme /search sans providers
+    mask = sessions.group_mask(session) if any(session.members.values()) else None
+    # Masque nul en mode intersection = aucune plateforme commune : rien à regarder ensemble
+    if mask == 0:
+        return []
+
+    cache_key = _session_search_cache_key(request.query, mask, session.country)
+    entry = await response_cache.get(cache_key)
+    if entry is not None:
+        return _cached_json_response(http_request, "session_search", entry, "HIT")
+
+    deadline = Deadline(SEARCH_DEADLINE_S)
+    movies_dicts, _, _ = await _find_candidates(request.query, deadline)
+    if movies_dicts and mask is not None:
+        movies_dicts = await filter_movies_by_provider_mask(
+            movies_dicts, mask, country_code=session.country, deadline=deadline
+        )
+
+    logger.info("Recherche de groupe", extra={"session": session.id, "members": len(session.members), "count": len(movies_dicts)})
+    movies = _to_movie_responses(movies_dicts)
+    degraded = _count_degraded("session_search", movies)
+    entry = _cache_entry(movies)
+    # Mêmes règles que /search : ni liste vide ni disponibilité dégradée dans le cache
+    if movies and not degraded:
+        await response_cache.set(cache_key, entry)
+    return _cached_json_response(http_request, "session_search", entry, "MISS")
+
+# --- Défis & progression ---
+def _to_progress_response(row: UserProgress, definition: Optional[dict] = None) -> ProgressResponse:
+    definition = definition or {}
+    return ProgressResponse(
+        challenge_id=row.challenge_id,
+        title=definition.get("title"),
+        current_count=row.current_count,
+        target_count=definition.get("target_count"),
+        is_completed=row.is_completed,
+        movies_watched=row.movies_watched,
+        completed_at=row.completed_at,
+    )
+
+@app.get("/challenges", response_model=List[Challenge])
+async def list_challenges():
+    return await asyncio.to_thread(progress.list_challenges_sync)
+
+@app.put("/challenges/{challenge_id}", response_model=Challenge)
+async def put_challenge(challenge_id: str, challenge: Challenge):
+    """Crée ou modifie un défi : sa progression est recalculée depuis le journal des visionnages."""
+    try:
+        progress.validate_challenge(challenge)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await asyncio.to_thread(progress.upsert_challenge_sync, challenge_id, challenge)
+
+@app.post("/users/{user_id}/watch", response_model=WatchResponse)
+async def record_watch(user_id: str, request: WatchRequest):
+    """Visionnage : seuls les défis dont les règles acceptent ce film sont mis à jour."""
+    result = await asyncio.to_thread(
+        progress.record_watch_sync, user_id, request.tmdb_id, request.event_id, request.watched_at
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Film inconnu du catalogue.")
+    duplicate, rows = result
+    definitions = {c.id: c.model_dump() for c in await asyncio.to_thread(progress.list_challenges_sync)}
+    return WatchResponse(
+        duplicate=duplicate,
+        updated=[_to_progress_response(row, definitions.get(row.challenge_id)) for row in rows],
+    )
+
+@app.get("/users/{user_id}/progress", response_model=List[ProgressResponse])
+async def read_progress(user_id: str):
+    """Tableau de bord : lecture de user_progress par clé primaire, sans relire l'historique."""
+    rows = await asyncio.to_thread(progress.get_user_progress_sync, user_id)
+    return [_to_progress_response(row, definition) for row, definition in rows]
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,39 @@
+from enum import Enum
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import String, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+class AvailabilityStatus(str, Enum):
+    """Fiabilité de l'information de disponibilité renvoyée pour un film."""
+    FRESH = "fresh"       # Donnée à jour (cache récent ou TMDB interrogé pendant la requête)
+    STALE = "stale"       # TMDB indisponible/trop lent : dernière donnée connue, potentiellement périmée
+    UNKNOWN = "unknown"   # Aucune donnée : le film est renvoyé sans pouvoir confirmer la disponibilité
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MovieAvailability(SQLModel, table=True):
+    """
+    Disponibilité pré-calculée d'un film dans une région (providers flatrate).
+    Alimentée hors du chemin des requêtes par le refresher d'arrière-plan.
+    """
+    __tablename__ = "movie_availability"
+
+    tmdb_id: int = Field(primary_key=True)
+    region: str = Field(primary_key=True, max_length=2)
+
+    # NULL tant que le film n'a jamais été interrogé (ligne créée pour mémoriser une demande)
+    providers: Optional[List[str]] = Field(default=None, sa_column=Column(ARRAY(String)))
+
+    fetched_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    # Planification : date à partir de laquelle la ligne doit être rafraîchie
+    next_refresh_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
+    )
+    # Dernière fois que ce film est apparu dans une recherche (priorité de rafraîchissement)
+    last_requested_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import List
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Integer, Float, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.models.availability import utcnow
+
+
+class ProviderFeed(SQLModel, table=True):
+    """
+    Fil d'accueil pré-calculé d'une plateforme dans une région : films disponibles
+    classés par score de popularité décroissant (listes parallèles tmdb_ids / scores).
+    """
+    __tablename__ = "provider_feeds"
+
+    provider: str = Field(primary_key=True)  # Nom canonique (cf. PROVIDER_MAPPING)
+    region: str = Field(primary_key=True, max_length=2)
+    tmdb_ids: List[int] = Field(sa_column=Column(ARRAY(Integer), nullable=False))
+    scores: List[float] = Field(sa_column=Column(ARRAY(Float), nullable=False))
+    computed_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False))
@@ -1,29 +1,36 @@
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Column
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import ARRAY, String
+from sqlalchemy import String, Index
+from sqlalchemy.dialects.postgresql import ARRAY  # Opérateurs @> / && pour les filtres de genres
 
 class Movie(SQLModel, table=True):
     __tablename__ = "movies"
+    __table_args__ = (
+        Index("ix_movies_genres", "genres", postgresql_using="gin"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     tmdb_id: int = Field(unique=True, index=True)
     title: str
     original_title: Optional[str] = None
     overview: Optional[str] = None
-    release_date: Optional[str] = None
+    release_date: Optional[str] = Field(default=None, index=True)
     poster_path: Optional[str] = None
     
     # Métriques pour le filtrage
-    vote_average: float = 0.0
+    vote_average: float = Field(default=0.0, index=True)
     vote_count: int = 0
-    popularity: float = 0.0
+    popularity: float = Field(default=0.0, index=True)
+    runtime: Optional[int] = None  # Minutes (enrichissement /movie/{id})
     
     # Genres stockés en tableau de chaînes (ex: ["Action", "Sci-Fi"])
     genres: List[str] = Field(default=[], sa_column=Column(ARRAY(String)))
     
     # Le Cœur du réacteur : Le Vecteur (768 dimensions pour Google Gemini)
     embedding: List[float] = Field(default=None, sa_column=Column(Vector(768)))
+    # Modèle qui a produit le vecteur : un catalogue mélangeant deux modèles est refusé au démarrage
+    embedding_model: Optional[str] = None
 
     # Flags
     is_ready: bool = Field(default=False) # True quand vectorisé
\ No newline at end of file
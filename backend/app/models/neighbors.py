@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import List
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Integer, Float, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.models.availability import utcnow
+
+
+class MovieNeighbors(SQLModel, table=True):
+    """
+    Graphe k-NN pré-calculé ("films similaires") : pour chaque film, ses k voisins
+    les plus proches (similarité cosinus des embeddings), du plus au moins similaire.
+    """
+    __tablename__ = "movie_neighbors"
+
+    tmdb_id: int = Field(primary_key=True)
+    neighbor_ids: List[int] = Field(sa_column=Column(ARRAY(Integer), nullable=False))
+    scores: List[float] = Field(sa_column=Column(ARRAY(Float), nullable=False))
+    computed_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False))
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Integer, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+from app.models.availability import utcnow
+from app.models.challenge import Challenge
+
+
+class ChallengeDefinition(SQLModel, table=True):
+    """Définition persistée d'un défi : le modèle `Challenge` sérialisé (JSONB)."""
+    __tablename__ = "challenges"
+
+    id: str = Field(primary_key=True)
+    definition: dict = Field(sa_column=Column(JSONB, nullable=False))
+    is_active: bool = Field(default=True, index=True)
+    updated_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False))
+
+    def to_challenge(self) -> Challenge:
+        return Challenge.model_validate({**self.definition, "id": self.id, "is_active": self.is_active})
+
+
+class WatchEvent(SQLModel, table=True):
+    """
+    Journal des visionnages (source de vérité pour le rebuild).
+    `event_id` est la clé d'idempotence : un événement rejoué est ignoré.
+    """
+    __tablename__ = "watch_events"
+
+    event_id: str = Field(primary_key=True)
+    user_id: str = Field(index=True)
+    tmdb_id: int
+    watched_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class UserProgress(SQLModel, table=True):
+    """
+    Progression d'un utilisateur sur un défi (table de liaison User <-> Challenge).
+    Clé primaire (user_id, challenge_id) : le tableau de bord = un scan d'index sur user_id.
+    """
+    __tablename__ = "user_progress"
+
+    user_id: str = Field(primary_key=True)
+    challenge_id: str = Field(primary_key=True)
+    movies_watched: List[int] = Field(default=[], sa_column=Column(ARRAY(Integer), nullable=False))  # IDs validés
+    current_count: int = 0
+    is_completed: bool = False
+    completed_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    updated_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False))
@@ -0,0 +1,25 @@
+import uuid
+from enum import Enum
+from typing import Dict
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+from app.models.availability import utcnow
+
+
+class SessionMode(str, Enum):
+    """Combinaison des abonnements des membres présents."""
+    INTERSECTION = "intersection"  # Plateformes que TOUT le monde a
+    UNION = "union"                # Plateformes d'au moins un membre (on regarde chez lui)
+
+
+class GroupSession(BaseModel):
+    """
+    Session "Qui est là ?" : les membres présents et leurs abonnements encodés en bitsets
+    (cf. PROVIDER_BITS). Stockée en mémoire, expire après SESSION_TTL.
+    """
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    mode: SessionMode = SessionMode.INTERSECTION
+    country: str = Field(default="FR", min_length=2, max_length=2)
+    members: Dict[str, int] = Field(default_factory=dict, description="Nom du membre -> bitset de ses plateformes")
+    created_at: datetime = Field(default_factory=utcnow)
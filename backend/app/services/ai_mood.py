@@ -1,24 +1,83 @@
 import json
 import re
 import os
-from typing import Dict
-from huggingface_hub import InferenceClient
-from dotenv import load_dotenv
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-load_dotenv()
+from app.core.cache import TTLCache
+from app.core.constants import GENRES
+from app.core.text import normalize_text
+from app.core.config import load_env
+
+logger = logging.getLogger(__name__)
+
+load_env()
+
+MOOD_MODEL = os.getenv("MOOD_MODEL", "mistralai/Mistral-7B-Instruct-v0.2")
+
+# --- CACHE MOOD -> FILTRES ---
+MOOD_CACHE_SIZE = int(os.getenv("MOOD_CACHE_SIZE", "2048"))
+MOOD_CACHE_TTL = float(os.getenv("MOOD_CACHE_TTL", str(7 * 24 * 3600)))  # 7 jours
+MOOD_CACHE_PATH = os.getenv("MOOD_CACHE_PATH")  # Optionnel : persistance JSON sur disque
+# Réécriture du fichier par lots (tâche de fond de l'API + arrêt), jamais sur le chemin des requêtes
+MOOD_CACHE_FLUSH_INTERVAL_S = float(os.getenv("MOOD_CACHE_FLUSH_INTERVAL_S", "60"))
 
 # --- CONFIGURATION DU FALLBACK (Synonymes) ---
-TMDB_KEYWORDS = {
-    28: ['action', 'bagarre', 'combat', 'violent', 'guerre', 'bataille', 'arme', 'explosion', 'se batte'],
-    35: ['drôle', 'rire', 'comédie', 'fun', 'léger', 'humoristique', 'comique', 'marrant'],
-    27: ['peur', 'horreur', 'effrayant', 'sang', 'zombie', 'monstre', 'tueur', 'terrifiant', 'angoissant'],
-    878: ['sf', 'science-fiction', 'espace', 'alien', 'futur', 'robot', 'vaisseau', 'planète'],
-    18: ['triste', 'pleurer', 'émouvant', 'drame', 'sombre', 'dramatique', 'tragique'],
-    10749: ['amour', 'romance', 'love', 'couple', 'romantique', 'sentimental'],
-    16: ['dessin animé', 'animation', 'manga', 'pixar', 'disney', 'animé'],
-    53: ['thriller', 'suspense', 'tension', 'mystère', 'policier', 'psychologique'],
-    37: ['western', 'cowboy', 'far west'],
-}
+# Thésaurus data-driven : {"Nom du genre (cf. GENRES)": [mots-clés...]}
+# MOOD_KEYWORDS_PATH permet d'ajouter/étendre des synonymes sans toucher au code.
+KEYWORDS_FILE = Path(__file__).resolve().parent.parent / "core" / "mood_keywords.json"
+MOOD_KEYWORDS_PATH = os.getenv("MOOD_KEYWORDS_PATH")
+
+
+def _canonical_keyword(keyword: str) -> str:
+    """Forme canonique d'un mot-clé ou d'un extrait de texte : 'Science-Fiction' -> 'science fiction'."""
+    return re.sub(r"[\s\-']+", " ", normalize_text(keyword)).strip()
+
+
+def _load_keywords() -> Dict[int, List[str]]:
+    files = [KEYWORDS_FILE] + ([Path(MOOD_KEYWORDS_PATH)] if MOOD_KEYWORDS_PATH else [])
+    keywords: Dict[int, List[str]] = {}
+    for path in files:
+        for genre_name, synonyms in json.loads(path.read_text(encoding="utf-8")).items():
+            if genre_name not in GENRES:
+                raise ValueError(f"Genre inconnu dans {path.name} : '{genre_name}'")
+            keywords.setdefault(GENRES[genre_name], []).extend(synonyms)
+    return keywords
+
+
+def _compile_keyword_matcher(keywords: Dict[int, List[str]]) -> Tuple[re.Pattern, Dict[str, List[int]]]:
+    """
+    Construit UN automate regex pour tout le thésaurus (une seule passe sur le texte).
+    Matching aux frontières de mots, insensible aux accents/casse, pluriels en -s/-x tolérés.
+    """
+    genres_by_keyword: Dict[str, List[int]] = {}
+    for genre_id, synonyms in keywords.items():
+        for synonym in synonyms:
+            canonical = _canonical_keyword(synonym)
+            if canonical and genre_id not in genres_by_keyword.setdefault(canonical, []):
+                genres_by_keyword[canonical].append(genre_id)
+
+    # Les plus longs d'abord : "comedie musicale" doit l'emporter sur "comedie"
+    alternatives = sorted(genres_by_keyword, key=len, reverse=True)
+    body = "|".join(r"[\s\-']+".join(map(re.escape, k.split(" "))) for k in alternatives)
+    pattern = re.compile(rf"(?<!\w)({body})(?:s|x)?(?!\w)")
+    return pattern, genres_by_keyword
+
+
+TMDB_KEYWORDS = _load_keywords()
+_KEYWORD_PATTERN, _GENRES_BY_KEYWORD = _compile_keyword_matcher(TMDB_KEYWORDS)
+
+
+def match_genre_ids(text: str) -> List[int]:
+    """IDs de genres TMDB évoqués dans le texte (ordre du thésaurus). Assez rapide pour du live."""
+    found = set()
+    for match in _KEYWORD_PATTERN.finditer(normalize_text(text)):
+        found.update(_GENRES_BY_KEYWORD[_canonical_keyword(match.group(1))])
+    return [genre_id for genre_id in TMDB_KEYWORDS if genre_id in found]
 
 SYSTEM_INSTRUCTIONS = """
 Tu es un expert API TMDB. Réponds UNIQUEMENT le JSON.
@@ -29,18 +88,15 @@ Exemple: "Action 2022" -> {"with_genres": "28", "primary_release_date.gte": "202
 
 def local_rule_based_analysis(text: str) -> Dict:
     """Fallback robuste : Analyse par mots-clés sans IA."""
-    print(f"[FALLBACK] Analyse de : '{text}'")
-    text_lower = text.lower()
+    logger.debug("Analyse par mots-clés (fallback)", extra={"text": text})
+    normalized = normalize_text(text)
     filters = {}
-    genre_ids = []
     
-    # 1. Recherche des genres via synonymes
-    for genre_id, keywords in TMDB_KEYWORDS.items():
-        if any(k in text_lower for k in keywords):
-            genre_ids.append(str(genre_id))
+    # 1. Recherche des genres via synonymes (automate compilé, une passe)
+    genre_ids = match_genre_ids(text)
     
     if genre_ids:
-        filters['with_genres'] = ','.join(genre_ids)
+        filters['with_genres'] = ','.join(str(genre_id) for genre_id in genre_ids)
     
     # 2. Gestion des dates (Années ou Décennies)
     # Ex: "2000" ou "années 80"
@@ -49,7 +105,7 @@ def local_rule_based_analysis(text: str) -> Dict:
         full_year = int(year_match.group(0))
         # Si c'est une année ronde (ex: 1980), on suppose une décennie par défaut ? 
         # Pour le MVP, on prend l'année exacte sauf si "années" est précisé avant.
-        if "années" in text_lower:
+        if "annees" in normalized:
             filters['primary_release_date.gte'] = f'{full_year}-01-01'
             filters['primary_release_date.lte'] = f'{full_year+9}-12-31'
         else:
@@ -60,14 +116,119 @@ def local_rule_based_analysis(text: str) -> Dict:
     filters['sort_by'] = 'popularity.desc'
     return filters
 
+# ==========================================
+# CACHE DES FILTRES (Mood normalisé -> dict)
+# ==========================================
+
+def _prompt_fingerprint() -> str:
+    """Empreinte du prompt + modèle : toute modification invalide le cache."""
+    payload = f"{MOOD_MODEL}\n{SYSTEM_INSTRUCTIONS}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def _load_mood_cache() -> TTLCache:
+    cache = TTLCache(maxsize=MOOD_CACHE_SIZE, ttl=MOOD_CACHE_TTL)
+    if not MOOD_CACHE_PATH or not Path(MOOD_CACHE_PATH).exists():
+        return cache
+    try:
+        data = json.loads(Path(MOOD_CACHE_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning("Cache mood illisible, ignoré", extra={"error": str(e)})
+        return cache
+    # Prompt ou modèle modifié depuis la sauvegarde : on repart de zéro
+    if data.get("fingerprint") != _prompt_fingerprint():
+        return cache
+    for key, filters, stored_at in data.get("entries", []):
+        cache.set(key, filters, stored_at=stored_at)
+    return cache
+
+
+def _save_mood_cache() -> bool:
+    """Réécrit tout le fichier (temporaire + os.replace : jamais de fichier à moitié écrit)."""
+    if not MOOD_CACHE_PATH:
+        return False
+    payload = {
+        "fingerprint": _prompt_fingerprint(),
+        "entries": [[key, filters, stored_at] for key, filters, stored_at in _mood_cache.items()],
+    }
+    path = Path(MOOD_CACHE_PATH)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with _save_lock:
+        try:
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)  # Écriture atomique
+            return True
+        except OSError as e:
+            logger.warning("Sauvegarde du cache mood impossible", extra={"error": str(e)})
+            return False
+
+
+def flush_mood_cache() -> bool:
+    """Sauvegarde le cache s'il a changé depuis la dernière écriture. Retourne True si écrit."""
+    global _dirty
+    if not _dirty:
+        return False
+    # Remis à zéro AVANT la copie : une entrée ajoutée pendant l'écriture redemande un flush
+    _dirty = False
+    if not _save_mood_cache():
+        _dirty = True
+        return False
+    return True
+
+
+async def run_mood_cache_flusher(stop: asyncio.Event, interval: float = MOOD_CACHE_FLUSH_INTERVAL_S) -> None:
+    """Tâche de fond de l'API : flush périodique, puis un dernier à l'arrêt."""
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+            break
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.to_thread(flush_mood_cache)
+    await asyncio.to_thread(flush_mood_cache)
+
+
+_mood_cache = _load_mood_cache()
+_save_lock = threading.Lock()
+_dirty = False
+
+
+def _mood_cache_key(mood_text: str) -> str:
+    return f"{_prompt_fingerprint()}:{normalize_text(mood_text)}"
+
+
+def get_cached_filters(mood_text: str) -> Optional[Dict]:
+    """Retourne les filtres déjà calculés pour ce mood (ou None)."""
+    filters = _mood_cache.get(_mood_cache_key(mood_text))
+    return dict(filters) if filters is not None else None
+
+
+def _mark_dirty() -> None:
+    global _dirty
+    _dirty = True
+
+
+def clear_mood_cache() -> None:
+    _mood_cache.clear()
+    _mark_dirty()
+    flush_mood_cache()
+
+
 def get_tmdb_filters_from_mood(mood_text: str) -> Dict:
+    cached = get_cached_filters(mood_text)
+    if cached is not None:
+        return cached
+
     token = os.getenv("HUGGINGFACE_API_TOKEN")
     
     # Tentative IA (Mistral)
     if token:
         try:
+            # Import différé : huggingface_hub pèse ~0.5 s au démarrage (cold start Cloud Run)
+            from huggingface_hub import InferenceClient
+
             # ON UTILISE MISTRAL-v0.2 (Le plus fiable en gratuit)
-            client = InferenceClient(model="mistralai/Mistral-7B-Instruct-v0.2", token=token)
+            client = InferenceClient(model=MOOD_MODEL, token=token)
             full_prompt = f"[INST] {SYSTEM_INSTRUCTIONS}\n\nRequete: {mood_text} [/INST]"
             
             # Utilisation de text_generation pour éviter les erreurs de type "Chat"
@@ -77,10 +238,16 @@ def get_tmdb_filters_from_mood(mood_text: str) -> Dict:
             
             json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
             if json_match:
-                return json.loads(json_match.group(0))
+                filters = json.loads(json_match.group(0))
+                if not isinstance(filters, dict):
+                    raise ValueError(f"Réponse IA inattendue : {filters!r}")
+                # Seules les réponses IA sont mises en cache : le fallback local est déjà instantané
+                _mood_cache.set(_mood_cache_key(mood_text), filters)
+                _mark_dirty()
+                return dict(filters)
                 
         except Exception as e:
-            print(f"[IA ERROR] : {e}")
+            logger.warning("Erreur IA (mood)", extra={"error": str(e)})
 
     # Fallback si pas de token ou erreur IA
     return local_rule_based_analysis(mood_text)
\ No newline at end of file
@@ -0,0 +1,475 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+from sqlmodel import Session, select, or_, and_
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.services import tmdb
+from app.database import engine
+from app.models.movie import Movie
+from app.models.availability import AvailabilityStatus, MovieAvailability, utcnow
+from app.core.cache import TTLCache
+from app.core.deadline import Deadline
+from app.core.metrics import REGISTRY, Counter, timed
+from app.core.ratelimit import RateLimiter
+from app.core.config import load_env
+
+logger = logging.getLogger(__name__)
+
+load_env()
+
+# --- FRAÎCHEUR ---
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", "20000"))
+AVAILABILITY_TTL = float(os.getenv("AVAILABILITY_TTL", str(24 * 3600)))  # Catalogues : mises à jour ~mensuelles
+# Au-delà de AVAILABILITY_TTL la donnée est "stale" : encore servie en mode dégradé jusqu'à cet âge
+AVAILABILITY_STALE_TTL = float(os.getenv("AVAILABILITY_STALE_TTL", str(30 * 24 * 3600)))
+
+# --- REFRESHER D'ARRIÈRE-PLAN ---
+AVAILABILITY_REGIONS = [r.strip().upper() for r in os.getenv("AVAILABILITY_REGIONS", "FR").split(",") if r.strip()]
+AVAILABILITY_REFRESH_RPM = float(os.getenv("AVAILABILITY_REFRESH_RPM", "120"))  # Budget d'appels TMDB / minute
+AVAILABILITY_REFRESH_BATCH = int(os.getenv("AVAILABILITY_REFRESH_BATCH", "50"))
+AVAILABILITY_REFRESH_IDLE_S = float(os.getenv("AVAILABILITY_REFRESH_IDLE_S", "300"))  # Pause quand rien n'est dû
+
+# Intervalles de rafraîchissement : titres demandés récemment > populaires > longue traîne
+REFRESH_INTERVAL_REQUESTED = timedelta(hours=float(os.getenv("REFRESH_INTERVAL_REQUESTED_H", "12")))
+REFRESH_INTERVAL_POPULAR = timedelta(days=float(os.getenv("REFRESH_INTERVAL_POPULAR_D", "3")))
+REFRESH_INTERVAL_LONG_TAIL = timedelta(days=float(os.getenv("REFRESH_INTERVAL_LONG_TAIL_D", "30")))
+REFRESH_RETRY_DELAY = timedelta(hours=1)
+POPULARITY_THRESHOLD = float(os.getenv("REFRESH_POPULARITY_THRESHOLD", "30"))
+RECENTLY_REQUESTED = timedelta(days=2)
+# Report des films demandés (last_requested_at) depuis le process de l'API, refresher ou non
+REQUESTED_FLUSH_INTERVAL_S = float(os.getenv("REQUESTED_FLUSH_INTERVAL_S", "60"))
+# Borne de _requested si la DB est injoignable plusieurs flushs de suite
+REQUESTED_MAX_PENDING = int(os.getenv("REQUESTED_MAX_PENDING", "100000"))
+
+# --- INDEX INVERSÉ (discover) ---
+AVAILABILITY_INDEX_MAX_PAGES = int(os.getenv("AVAILABILITY_INDEX_MAX_PAGES", str(tmdb.TMDB_MAX_PAGES)))
+
+AVAILABILITY_REFRESHES = REGISTRY.register(Counter(
+    "cinephile_availability_refresh_total",
+    "Rafraîchissements de disponibilité effectués en arrière-plan.",
+    labelnames=("region", "result"),
+))
+
+# (tmdb_id, pays) -> liste des providers flatrate (conservée jusqu'à l'âge "stale" maximal)
+_availability_cache = TTLCache(maxsize=AVAILABILITY_CACHE_SIZE, ttl=AVAILABILITY_STALE_TTL)
+# (tmdb_id, pays) apparus dans une recherche depuis le dernier flush du refresher
+_requested: Dict[Tuple[int, str], datetime] = {}
+
+
+# ==========================================
+# PARTIE 1 : LECTURE (chemin des requêtes)
+# ==========================================
+
+def _is_fresh(stored_at: float) -> bool:
+    return time.time() - stored_at <= AVAILABILITY_TTL
+
+
+def _load_precomputed_sync(tmdb_ids: List[int], region: str) -> Dict[int, Tuple[List[str], datetime]]:
+    with Session(engine) as session:
+        statement = select(MovieAvailability).where(
+            MovieAvailability.region == region,
+            MovieAvailability.tmdb_id.in_(tmdb_ids),
+            MovieAvailability.fetched_at.is_not(None),
+        )
+        return {row.tmdb_id: (row.providers or [], row.fetched_at) for row in session.exec(statement)}
+
+
+@timed("availability.precomputed")
+async def prime_from_precomputed(tmdb_ids: Iterable[int], country_code: str = "FR",
+                                 deadline: Optional[Deadline] = None) -> None:
+    """
+    Charge en UNE requête les disponibilités pré-calculées des films absents (ou périmés)
+    du cache mémoire. Best effort : une DB lente ou en erreur n'empêche pas la recherche.
+    """
+    region = country_code.upper()
+    missing = []
+    for tmdb_id in tmdb_ids:
+        entry = _availability_cache.get_entry((tmdb_id, region))
+        if entry is None or not _is_fresh(entry[1]):
+            missing.append(tmdb_id)
+    if not missing:
+        return
+    try:
+        coroutine = asyncio.to_thread(_load_precomputed_sync, missing, region)
+        rows = await (asyncio.wait_for(coroutine, deadline.timeout()) if deadline else coroutine)
+    except Exception as e:
+        logger.warning("Lecture des disponibilités pré-calculées impossible", extra={"error": repr(e)})
+        return
+    for tmdb_id, (providers, fetched_at) in rows.items():
+        entry = _availability_cache.get_entry((tmdb_id, region))
+        if entry is None or entry[1] < fetched_at.timestamp():
+            _availability_cache.set((tmdb_id, region), providers, stored_at=fetched_at.timestamp())
+
+
+def note_requested(tmdb_ids: Iterable[int], country_code: str = "FR") -> None:
+    """Mémorise les films servis : le refresher les rafraîchit en priorité."""
+    now = utcnow()
+    region = country_code.upper()
+    for tmdb_id in tmdb_ids:
+        _requested[(tmdb_id, region)] = now
+
+
+async def get_movie_availability(tmdb_id: int, country_code: str = "FR") -> List[str]:
+    """Providers d'un film, via le cache mémoire (si frais) puis TMDB. Lève en cas d'erreur TMDB."""
+    key = (tmdb_id, country_code.upper())
+    entry = _availability_cache.get_entry(key)
+    if entry is not None and _is_fresh(entry[1]):
+        return entry[0]
+    providers = await tmdb.get_movie_providers(tmdb_id, country_code)
+    _availability_cache.set(key, providers)
+    return providers
+
+
+async def lookup_availability(
+    tmdb_id: int, country_code: str = "FR", deadline: Optional[Deadline] = None
+) -> Tuple[Optional[List[str]], AvailabilityStatus]:
+    """
+    Version "dégradable" : ne bloque jamais au-delà du `deadline`.
+    TMDB lent ou en panne -> dernière valeur connue (STALE) ou rien (UNKNOWN).
+    """
+    key = (tmdb_id, country_code.upper())
+    entry = _availability_cache.get_entry(key)
+    if entry is not None and _is_fresh(entry[1]):
+        return entry[0], AvailabilityStatus.FRESH
+
+    if deadline is None or not deadline.expired:
+        try:
+            timeout = deadline.timeout() if deadline else None
+            providers = await asyncio.wait_for(get_movie_availability(tmdb_id, country_code), timeout)
+            return providers, AvailabilityStatus.FRESH
+        except Exception as e:
+            # TimeoutError inclus : le budget de la requête est épuisé
+            logger.warning("Disponibilité TMDB indisponible", extra={"tmdb_id": tmdb_id, "error": repr(e)})
+
+    if entry is not None:
+        return entry[0], AvailabilityStatus.STALE
+    return None, AvailabilityStatus.UNKNOWN
+
+
+# ==========================================
+# PARTIE 2 : REFRESHER D'ARRIÈRE-PLAN
+# ==========================================
+
+def _refresh_interval(popularity: float, last_requested_at: Optional[datetime]) -> timedelta:
+    """Plus un titre est demandé/populaire, plus il est rafraîchi souvent (+ jitter pour lisser la charge)."""
+    if last_requested_at is not None and utcnow() - last_requested_at <= RECENTLY_REQUESTED:
+        interval = REFRESH_INTERVAL_REQUESTED
+    elif popularity >= POPULARITY_THRESHOLD:
+        interval = REFRESH_INTERVAL_POPULAR
+    else:
+        interval = REFRESH_INTERVAL_LONG_TAIL
+    return interval * random.uniform(0.9, 1.1)
+
+
+def _take_requested() -> Dict[Tuple[int, str], datetime]:
+    """Échange atomique : les écritures suivantes de note_requested vont dans un dict neuf."""
+    global _requested
+    pending, _requested = _requested, {}
+    return pending
+
+
+def _flush_requested_sync(pending: Dict[Tuple[int, str], datetime]) -> int:
+    """Reporte des demandes récentes en base (last_requested_at), en un seul upsert."""
+    if not pending:
+        return 0
+    rows = [
+        {"tmdb_id": tmdb_id, "region": region, "last_requested_at": requested_at, "next_refresh_at": requested_at}
+        for (tmdb_id, region), requested_at in pending.items()
+    ]
+    statement = insert(MovieAvailability).values(rows)
+    columns = MovieAvailability.__table__.c
+    statement = statement.on_conflict_do_update(
+        index_elements=["tmdb_id", "region"],
+        set_={
+            "last_requested_at": statement.excluded.last_requested_at,
+            # Un titre demandé passe au rythme "récent" sans attendre son échéance longue traîne
+            "next_refresh_at": func.least(
+                columns.next_refresh_at,
+                func.coalesce(columns.fetched_at, statement.excluded.last_requested_at) + REFRESH_INTERVAL_REQUESTED,
+            ),
+        },
+    )
+    with Session(engine) as session:
+        session.exec(statement)
+        session.commit()
+    return len(rows)
+
+
+async def flush_requested() -> int:
+    """
+    Vide _requested vers movie_availability. En cas d'échec, les demandes sont remises
+    en attente (les plus récentes l'emportent), dans la limite de REQUESTED_MAX_PENDING.
+    """
+    pending = _take_requested()
+    try:
+        return await asyncio.to_thread(_flush_requested_sync, pending)
+    except Exception:
+        for key, requested_at in pending.items():
+            if len(_requested) >= REQUESTED_MAX_PENDING:
+                break
+            if key not in _requested:
+                _requested[key] = requested_at
+        raise
+
+
+async def run_requested_flusher(stop: asyncio.Event, interval: float = REQUESTED_FLUSH_INTERVAL_S) -> None:
+    """
+    Boucle de l'API : les demandes sont reportées en base même quand le refresher tourne
+    dans un autre process (refresh_availability.py). Dernier flush à l'arrêt.
+    """
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            flushed = await flush_requested()
+            if flushed:
+                logger.debug("Demandes reportées", extra={"rows": flushed})
+        except Exception as e:
+            logger.warning("Report des demandes impossible", extra={"error": repr(e)})
+        # Arrêt demandé (même avant le premier tour) : le flush ci-dessus était le dernier
+        if stop.is_set():
+            break
+
+
+def _select_due_sync(region: str, limit: int) -> List[Tuple[int, float, Optional[datetime]]]:
+    """Films à rafraîchir, par priorité : demandés récemment, puis par popularité décroissante."""
+    with Session(engine) as session:
+        statement = (
+            select(Movie.tmdb_id, Movie.popularity, MovieAvailability.last_requested_at)
+            .outerjoin(
+                MovieAvailability,
+                and_(MovieAvailability.tmdb_id == Movie.tmdb_id, MovieAvailability.region == region),
+            )
+            .where(or_(MovieAvailability.tmdb_id.is_(None), MovieAvailability.next_refresh_at <= utcnow()))
+            .order_by(MovieAvailability.last_requested_at.desc().nulls_last(), Movie.popularity.desc())
+            .limit(limit)
+        )
+        return list(session.exec(statement).all())
+
+
+def save_availability_sync(rows: List[dict]) -> None:
+    """Upsert de lignes MovieAvailability (clés : tmdb_id, region, + colonnes à écrire)."""
+    if not rows:
+        return
+    statement = insert(MovieAvailability).values(rows)
+    updated = {key: getattr(statement.excluded, key) for key in rows[0] if key not in ("tmdb_id", "region")}
+    statement = statement.on_conflict_do_update(index_elements=["tmdb_id", "region"], set_=updated)
+    with Session(engine) as session:
+        session.exec(statement)
+        session.commit()
+
+
+async def store_providers(
+    found: Iterable[Tuple[int, str, List[str], float, Optional[datetime]]],
+) -> int:
+    """
+    Enregistre des providers fraîchement lus sur TMDB : (tmdb_id, région, providers, popularité,
+    dernière demande ou None). Cache mémoire + movie_availability, prochaine échéance selon
+    _refresh_interval. Point d'entrée commun du refresher, de l'index bulk et de l'enrichissement.
+    """
+    now = utcnow()
+    rows = []
+    for tmdb_id, region, providers, popularity, last_requested_at in found:
+        _availability_cache.set((tmdb_id, region), providers, stored_at=now.timestamp())
+        rows.append({
+            "tmdb_id": tmdb_id,
+            "region": region,
+            "providers": providers,
+            "fetched_at": now,
+            "next_refresh_at": now + _refresh_interval(popularity or 0.0, last_requested_at),
+        })
+    for start in range(0, len(rows), 1000):
+        await asyncio.to_thread(save_availability_sync, rows[start:start + 1000])
+    return len(rows)
+
+
+async def refresh_due(region: str, limiter: RateLimiter, batch_size: int = AVAILABILITY_REFRESH_BATCH) -> int:
+    """Rafraîchit un lot de films dus pour `region` en respectant le budget d'appels. Retourne la taille du lot."""
+    await flush_requested()
+    due = await asyncio.to_thread(_select_due_sync, region, batch_size)
+    if not due:
+        return 0
+
+    async def fetch(tmdb_id: int) -> List[str]:
+        await limiter.acquire()
+        return await tmdb.get_movie_providers(tmdb_id, region)
+
+    results = await asyncio.gather(*(fetch(tmdb_id) for tmdb_id, _, _ in due), return_exceptions=True)
+
+    now = utcnow()
+    found, retries = [], []
+    for (tmdb_id, popularity, last_requested_at), result in zip(due, results):
+        not_found = isinstance(result, httpx.HTTPStatusError) and result.response.status_code == 404
+        if isinstance(result, Exception) and not not_found:
+            AVAILABILITY_REFRESHES.inc(region=region, result="error")
+            # On garde l'ancienne donnée, on réessaiera plus tard
+            retries.append({"tmdb_id": tmdb_id, "region": region, "next_refresh_at": now + REFRESH_RETRY_DELAY})
+            continue
+        AVAILABILITY_REFRESHES.inc(region=region, result="ok")
+        found.append((tmdb_id, region, [] if not_found else result, popularity, last_requested_at))
+
+    # Deux formes de lignes (succès / erreur) : un upsert par forme
+    await store_providers(found)
+    await asyncio.to_thread(save_availability_sync, retries)
+    return len(due)
+
+
+async def run_refresher(stop: Optional[asyncio.Event] = None, regions: List[str] = None,
+                        rate_per_minute: float = AVAILABILITY_REFRESH_RPM, once: bool = False) -> None:
+    """
+    Boucle du refresher : parcourt les régions tant qu'il reste des films dus,
+    puis se met en veille. `once=True` : s'arrête dès que plus rien n'est dû.
+    """
+    stop = stop or asyncio.Event()
+    regions = regions or AVAILABILITY_REGIONS
+    limiter = RateLimiter(rate_per_minute)
+    logger.info("Refresher de disponibilités démarré", extra={"regions": regions, "rpm": rate_per_minute})
+
+    while not stop.is_set():
+        refreshed = 0
+        for region in regions:
+            try:
+                refreshed += await refresh_due(region, limiter)
+            except Exception as e:
+                logger.exception("Cycle de rafraîchissement en échec", extra={"region": region, "error": repr(e)})
+        if refreshed:
+            continue
+        if once:
+            break
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=AVAILABILITY_REFRESH_IDLE_S)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ==========================================
+# PARTIE 3 : INDEX INVERSÉ PROVIDER -> FILMS (bulk)
+# ==========================================
+
+def _catalog_sync(region: str) -> Dict[int, Tuple[float, Optional[datetime]]]:
+    """Catalogue -> {tmdb_id: (popularité, dernière demande dans la région)} pour fixer l'échéance."""
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Movie.tmdb_id, Movie.popularity, MovieAvailability.last_requested_at)
+            .outerjoin(
+                MovieAvailability,
+                and_(MovieAvailability.tmdb_id == Movie.tmdb_id, MovieAvailability.region == region),
+            )
+        ).all()
+    return {tmdb_id: (popularity or 0.0, last_requested_at) for tmdb_id, popularity, last_requested_at in rows}
+
+
+async def _provider_posting_list(provider_id: int, region: str, limiter: RateLimiter,
+                                 max_pages: int) -> Tuple[Set[int], bool]:
+    """
+    Pagine discover pour UN provider. Retourne (tmdb_ids, complet) :
+    `complet` est faux si le plafond de pages a coupé la liste (absence non prouvée).
+    """
+    tmdb_ids: Set[int] = set()
+    total_pages = 0
+    pages = tmdb.iter_discover_pages(
+        [provider_id], watch_region=region, monetization_types="flatrate", max_pages=max_pages, limiter=limiter
+    )
+    # Pages préchargées en parallèle ; seuls les IDs sont conservés (mémoire constante par page)
+    async with aclosing(pages):
+        async for data in pages:
+            total_pages = data.get("total_pages") or 0
+            tmdb_ids.update(movie["id"] for movie in data.get("results", []) if movie.get("id"))
+    return tmdb_ids, total_pages <= min(max_pages, tmdb.TMDB_MAX_PAGES)
+
+
+async def build_availability_index(regions: List[str] = None, rate_per_minute: float = AVAILABILITY_REFRESH_RPM,
+                                   max_pages: int = AVAILABILITY_INDEX_MAX_PAGES) -> Dict[str, int]:
+    """
+    Construit la disponibilité de TOUT le catalogue en quelques appels paginés :
+    posting lists provider -> {tmdb_id} (discover), intersectées avec le catalogue,
+    puis inversées en film -> {providers} et stockées dans movie_availability.
+
+    Tous les providers flatrate de la région sont indexés, sous leur nom TMDB : mêmes
+    valeurs que le refresher unitaire (refresh_due), qui complète et corrige ensuite.
+    Retourne le nombre de films écrits par région.
+    """
+    regions = regions or AVAILABILITY_REGIONS
+    limiter = RateLimiter(rate_per_minute)
+    written: Dict[str, int] = {}
+
+    for region in regions:
+        try:
+            await limiter.acquire()
+            provider_ids = await tmdb.get_region_providers(region)
+        except Exception as e:
+            logger.warning("Providers de la région indisponibles", extra={"region": region, "error": repr(e)})
+            continue
+        catalog = await asyncio.to_thread(_catalog_sync, region)
+        names = list(provider_ids)
+        results = await asyncio.gather(
+            *(_provider_posting_list(provider_ids[name], region, limiter, max_pages) for name in names),
+            return_exceptions=True,
+        )
+
+        postings: Dict[str, Set[int]] = {}
+        all_complete = True
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning("Posting list incomplète", extra={"provider": name, "region": region, "error": repr(result)})
+                all_complete = False
+                continue
+            tmdb_ids, complete = result
+            postings[name] = tmdb_ids & catalog.keys()
+            all_complete = all_complete and complete
+
+        providers_by_movie: Dict[int, List[str]] = {}
+        for name, tmdb_ids in postings.items():
+            for tmdb_id in tmdb_ids:
+                providers_by_movie.setdefault(tmdb_id, []).append(name)
+
+        # Listes complètes : un film absent de toutes les posting lists n'est sur aucun provider suivi.
+        # Sinon on n'écrit que les présences avérées ; le refresher unitaire complète le reste.
+        targets = catalog.keys() if all_complete else providers_by_movie.keys()
+        written[region] = await store_providers(
+            (tmdb_id, region, sorted(providers_by_movie.get(tmdb_id, [])), *catalog[tmdb_id])
+            for tmdb_id in targets
+        )
+        logger.info("Index de disponibilité construit", extra={
+            "region": region, "movies": written[region], "complete": all_complete,
+            "postings": {name: len(ids) for name, ids in postings.items()},
+        })
+    return written
+
+
+def _load_index_sync(region: str, limit: int) -> List[Tuple[int, List[str], datetime]]:
+    with Session(engine) as session:
+        statement = (
+            select(MovieAvailability.tmdb_id, MovieAvailability.providers, MovieAvailability.fetched_at)
+            .where(MovieAvailability.region == region, MovieAvailability.fetched_at.is_not(None))
+            .order_by(MovieAvailability.fetched_at.desc())
+            .limit(limit)
+        )
+        return list(session.exec(statement).all())
+
+
+async def load_availability_index(regions: List[str] = None) -> int:
+    """
+    Charge les disponibilités pré-calculées en mémoire : lookup O(1) au moment de la recherche.
+    Le cache est partagé : chaque région en reçoit une part égale, sans évincer les précédentes.
+    """
+    regions = regions or AVAILABILITY_REGIONS
+    per_region = AVAILABILITY_CACHE_SIZE // max(len(regions), 1)
+    loaded = 0
+    for region in regions:
+        rows = await asyncio.to_thread(_load_index_sync, region, per_region)
+        for tmdb_id, providers, fetched_at in rows:
+            _availability_cache.set((tmdb_id, region), providers or [], stored_at=fetched_at.timestamp())
+        loaded += len(rows)
+    return loaded
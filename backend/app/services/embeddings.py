@@ -0,0 +1,199 @@
+import os
+import abc
+import math
+import zlib
+import logging
+import functools
+from collections import Counter
+from typing import List, Optional
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models.movie import Movie
+from app.core.text import normalize_text
+from app.core.config import load_env
+
+logger = logging.getLogger(__name__)
+
+load_env()
+
+# --- CONFIGURATION ---
+# "gemini" (API Google), "hashing" (n-grammes hachés, CPU, sans réseau), "local" (modèle sentence-transformers)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini")
+EMBEDDING_LOCAL_MODEL = os.getenv("EMBEDDING_LOCAL_MODEL", "sentence-transformers/paraphrase-multilingual-mpnet-base-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_DIM = 768  # Dimension de la colonne movies.embedding
+
+
+class EmbeddingModelMismatch(RuntimeError):
+    """Le catalogue contient des vecteurs d'un autre modèle que celui configuré."""
+
+
+class EmbeddingProvider(abc.ABC):
+    """
+    Interface commune : un modèle produit des vecteurs de EMBEDDING_DIM dimensions.
+    `model_name` est stocké avec chaque vecteur (movies.embedding_model).
+    """
+    model_name: str = ""
+
+    def embed_query(self, text: str) -> Optional[List[float]]:
+        """Vecteur d'une requête utilisateur, None en cas d'échec."""
+        vectors = self.embed_documents([text])
+        return vectors[0] if vectors else None
+
+    @abc.abstractmethod
+    def embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Vecteurs de documents (synopsis), par lots. None pour un document en échec."""
+
+    def warm(self) -> None:
+        """Chargement différé (SDK, poids du modèle) : appelé par le warm-up."""
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """API Gemini `text-embedding-004` : un aller-retour réseau par appel."""
+    model_name = "gemini/text-embedding-004"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+
+    @functools.lru_cache(maxsize=None)
+    def _genai(self):
+        """Import + configuration différés du SDK Gemini (~0.8 s d'import évités au cold start)."""
+        import google.generativeai as genai
+        if self.api_key:
+            genai.configure(api_key=self.api_key)
+        return genai
+
+    def _embed(self, content, task_type: str):
+        if not self.api_key:
+            logger.error("Pas de clé API Google configurée (GOOGLE_API_KEY)")
+            return None
+        try:
+            return self._genai().embed_content(
+                model="models/text-embedding-004",
+                content=content,
+                task_type=task_type
+            )['embedding']
+        except Exception as e:
+            logger.warning("Erreur Embedding", extra={"error": str(e)})
+            return None
+
+    def embed_query(self, text: str) -> Optional[List[float]]:
+        return self._embed(text, "retrieval_query")
+
+    def embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        vectors: List[Optional[List[float]]] = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = texts[start:start + EMBEDDING_BATCH_SIZE]
+            result = self._embed(batch, "retrieval_document")
+            vectors.extend(result if result else [None] * len(batch))
+        return vectors
+
+    def warm(self) -> None:
+        self._genai()
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Projection par hachage (feature hashing) des mots et n-grammes de caractères,
+    pondération tf sous-linéaire, normalisation L2. Pur CPU : ~0,1 ms par requête.
+    Capte la proximité lexicale (titres, thèmes, mots-clés), pas la sémantique fine.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, ngram_min: int = 3, ngram_max: int = 5):
+        self.dim = dim
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.model_name = f"hashing/ngram{ngram_min}-{ngram_max}-{dim}"
+
+    def _features(self, text: str) -> Counter:
+        words = normalize_text(text).split()
+        features = Counter(f"w:{word}" for word in words)
+        for word in words:
+            padded = f" {word} "
+            for n in range(self.ngram_min, self.ngram_max + 1):
+                features.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in self._features(text).items():
+            # crc32 : stable d'un process à l'autre (contrairement à hash())
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_query(self, text: str) -> Optional[List[float]]:
+        return self._embed_one(text)
+
+    def embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        return [self._embed_one(text) for text in texts]
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """Modèle local (sentence-transformers, dépendance optionnelle), encodage par lots sur CPU."""
+
+    def __init__(self, model: str = EMBEDDING_LOCAL_MODEL):
+        self.model_id = model
+        self.model_name = f"local/{model}"
+
+    @functools.lru_cache(maxsize=None)
+    def _model(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_PROVIDER=local nécessite le paquet 'sentence-transformers'."
+            ) from e
+        model = SentenceTransformer(self.model_id, device="cpu")
+        if model.get_sentence_embedding_dimension() != EMBEDDING_DIM:
+            raise RuntimeError(
+                f"{self.model_id} produit des vecteurs de {model.get_sentence_embedding_dimension()} dimensions "
+                f"(colonne movies.embedding : {EMBEDDING_DIM})."
+            )
+        return model
+
+    def embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        vectors = self._model().encode(texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True)
+        return [vector.tolist() for vector in vectors]
+
+    def warm(self) -> None:
+        self._model()
+
+
+PROVIDERS = {
+    "gemini": GeminiEmbeddingProvider,
+    "hashing": HashingEmbeddingProvider,
+    "local": SentenceTransformerProvider,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding_provider(name: str = EMBEDDING_PROVIDER) -> EmbeddingProvider:
+    """Fournisseur d'embeddings configuré (EMBEDDING_PROVIDER), instancié une fois par process."""
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"EMBEDDING_PROVIDER inconnu : {name!r} (choix : {', '.join(PROVIDERS)})")
+
+
+def check_catalog_model(provider: Optional[EmbeddingProvider] = None) -> None:
+    """
+    Refuse un catalogue dont les vecteurs ne viennent pas tous du modèle configuré :
+    des distances entre espaces d'embedding différents n'ont aucun sens.
+    Lève EmbeddingModelMismatch. Un catalogue vide est accepté.
+    """
+    provider = provider or get_embedding_provider()
+    with Session(engine) as session:
+        models = set(session.exec(
+            select(Movie.embedding_model).where(Movie.embedding.is_not(None)).distinct()
+        ).all())
+    if not models or models == {provider.model_name}:
+        return
+    raise EmbeddingModelMismatch(
+        f"Catalogue vectorisé avec {sorted(str(m) for m in models)}, modèle configuré : {provider.model_name}. "
+        "Ré-ingérez le catalogue (ingest_movies.py --reembed) ou changez EMBEDDING_PROVIDER."
+    )
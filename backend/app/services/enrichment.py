@@ -0,0 +1,131 @@
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, or_, and_, func
+
+from app.services import tmdb
+from app.database import engine
+from app.models.movie import Movie
+from app.services.availability import AVAILABILITY_REGIONS, store_providers
+
+logger = logging.getLogger(__name__)
+
+# Appels TMDB simultanés pendant l'enrichissement (TMDB tolère ~40 req/s)
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "8"))
+ENRICH_BATCH = 200
+
+
+async def enrich_movies(
+    tmdb_ids: List[int],
+    concurrency: int = ENRICH_CONCURRENCY,
+    include_keywords: bool = False,
+    include_credits: bool = False,
+) -> Dict[int, dict]:
+    """
+    Détails + providers (+ mots-clés / crédits) pour une liste de films :
+    UN appel append_to_response par film, au plus `concurrency` en parallèle.
+    Les films en erreur sont absents du résultat (loggés).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(tmdb_id: int) -> Optional[dict]:
+        async with semaphore:
+            try:
+                return await tmdb.get_movie_details(
+                    tmdb_id, include_keywords=include_keywords, include_credits=include_credits
+                )
+            except Exception as e:
+                logger.warning("Enrichissement impossible", extra={"tmdb_id": tmdb_id, "error": repr(e)})
+                return None
+
+    results = await asyncio.gather(*(fetch(tmdb_id) for tmdb_id in tmdb_ids))
+    return {tmdb_id: details for tmdb_id, details in zip(tmdb_ids, results) if details}
+
+
+def _movies_to_enrich_sync(
+    limit: int, only_missing: bool, after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[int, float]]:
+    """
+    (tmdb_id, popularity) par popularité décroissante, à partir de `after` (keyset) :
+    chaque film est proposé au plus une fois par passage, même si TMDB n'a rien pu compléter
+    (runtime 0, aucun genre, 404 persistant).
+    """
+    with Session(engine) as session:
+        statement = (
+            select(Movie.tmdb_id, Movie.popularity)
+            .order_by(Movie.popularity.desc(), Movie.tmdb_id)
+            .limit(limit)
+        )
+        if after is not None:
+            popularity, tmdb_id = after
+            statement = statement.where(or_(
+                Movie.popularity < popularity,
+                and_(Movie.popularity == popularity, Movie.tmdb_id > tmdb_id),
+            ))
+        if only_missing:
+            statement = statement.where(or_(
+                Movie.runtime.is_(None),
+                Movie.genres.is_(None),
+                func.cardinality(Movie.genres) == 0,
+            ))
+        return [(tmdb_id, popularity) for tmdb_id, popularity in session.exec(statement).all()]
+
+
+def _save_details_sync(details_by_id: Dict[int, dict]) -> None:
+    with Session(engine) as session:
+        movies = session.exec(select(Movie).where(Movie.tmdb_id.in_(list(details_by_id)))).all()
+        for movie in movies:
+            details = details_by_id[movie.tmdb_id]
+            movie.genres = details["genres"]
+            movie.runtime = details["runtime"]
+            # Popularité à jour : elle fixe aussi la fréquence de rafraîchissement des disponibilités
+            for field in ("popularity", "vote_count", "vote_average"):
+                if details.get(field) is not None:
+                    setattr(movie, field, details[field])
+            session.add(movie)
+        session.commit()
+
+
+async def enrich_catalog(
+    only_missing: bool = True,
+    regions: List[str] = None,
+    concurrency: int = ENRICH_CONCURRENCY,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Remplit Movie.genres, Movie.runtime ET movie_availability en un seul passage :
+    1 appel TMDB par film au lieu de 2 (détails + watch/providers).
+    Retourne le nombre de films enrichis.
+    """
+    regions = [r.upper() for r in (regions or AVAILABILITY_REGIONS)]
+    enriched = 0
+    after = None
+    while limit is None or enriched < limit:
+        batch_size = ENRICH_BATCH if limit is None else min(ENRICH_BATCH, limit - enriched)
+        batch = await asyncio.to_thread(_movies_to_enrich_sync, batch_size, only_missing, after)
+        if not batch:
+            break
+        tmdb_ids = [tmdb_id for tmdb_id, _ in batch]
+        popularity = dict(batch)
+        after = (batch[-1][1], batch[-1][0])
+
+        details_by_id = await enrich_movies(tmdb_ids, concurrency=concurrency)
+        await asyncio.to_thread(_save_details_sync, details_by_id)
+
+        await store_providers(
+            (tmdb_id, region, details["providers"].get(region, []),
+             details.get("popularity") or popularity[tmdb_id], None)
+            for tmdb_id, details in details_by_id.items()
+            for region in regions
+        )
+
+        enriched += len(details_by_id)
+        logger.info("Lot enrichi", extra={"requested": len(tmdb_ids), "enriched": len(details_by_id)})
+        if len(batch) < batch_size:
+            break
+        if not details_by_id:
+            # Tout le lot est en erreur : on s'arrête plutôt que de boucler sur les mêmes films
+            break
+    return enriched
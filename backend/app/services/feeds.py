@@ -0,0 +1,190 @@
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import engine
+from app.models.movie import Movie
+from app.models.feeds import ProviderFeed
+from app.models.availability import MovieAvailability, utcnow
+from app.core.constants import PROVIDER_MAPPING, PROVIDER_ALIASES
+from app.core.metrics import timed
+from app.services.availability import AVAILABILITY_REGIONS
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+FEED_SIZE = int(os.getenv("FEED_SIZE", "500"))  # Films conservés par (plateforme, région)
+# Lissage bayésien : un film à 10 votes ne passe pas devant un classique à 20 000 votes
+FEED_MIN_VOTES = int(os.getenv("FEED_MIN_VOTES", "200"))
+# Relecture de provider_feeds en mémoire (le job batch tourne à côté de l'API)
+FEED_RELOAD_INTERVAL = float(os.getenv("FEED_RELOAD_INTERVAL", "3600"))
+
+# (plateforme, région) -> (tmdb_ids, scores) triés par score décroissant
+_feeds: Dict[Tuple[str, str], Tuple[List[int], List[float]]] = {}
+# tmdb_id -> champs affichés sur l'accueil
+_movies: Dict[int, dict] = {}
+_loaded_at = 0.0
+# Un seul chargement à la fois : les requêtes concurrentes attendent le même au lieu d'en lancer un chacune
+_load_lock = asyncio.Lock()
+
+# ==========================================
+# PARTIE 1 : JOB BATCH (DB)
+# ==========================================
+
+def feed_score(popularity: Optional[float], vote_count: Optional[int], min_votes: int = FEED_MIN_VOTES) -> float:
+    """Popularité TMDB pondérée par la confiance dans les votes : vote_count / (vote_count + min_votes)."""
+    votes = vote_count or 0
+    return float(popularity or 0.0) * votes / (votes + min_votes) if votes + min_votes else 0.0
+
+
+def _provider_names(provider: str) -> List[str]:
+    """Nom canonique + alias : movie_availability stocke les noms tels que renvoyés par TMDB."""
+    return [provider] + [alias for alias, canonical in PROVIDER_ALIASES.items() if canonical == provider]
+
+
+def _rank_provider_sync(session: Session, provider: str, region: str, size: int) -> Tuple[List[int], List[float]]:
+    rows = session.exec(
+        select(Movie.tmdb_id, Movie.popularity, Movie.vote_count)
+        .join(MovieAvailability, MovieAvailability.tmdb_id == Movie.tmdb_id)
+        .where(MovieAvailability.region == region)
+        .where(MovieAvailability.providers.overlap(_provider_names(provider)))
+    ).all()
+    ranked = heapq.nsmallest(
+        size, ((-feed_score(popularity, vote_count), tmdb_id) for tmdb_id, popularity, vote_count in rows)
+    )
+    return [tmdb_id for _, tmdb_id in ranked], [-neg_score for neg_score, _ in ranked]
+
+
+def build_provider_feeds_sync(regions: List[str] = None, size: int = FEED_SIZE) -> int:
+    """Recalcule provider_feeds pour chaque plateforme x région. Retourne le nombre de fils écrits."""
+    now = utcnow()
+    rows = []
+    with Session(engine) as session:
+        for region in regions or AVAILABILITY_REGIONS:
+            for provider in PROVIDER_MAPPING:
+                tmdb_ids, scores = _rank_provider_sync(session, provider, region, size)
+                rows.append({"provider": provider, "region": region, "tmdb_ids": tmdb_ids,
+                             "scores": scores, "computed_at": now})
+        if rows:
+            statement = insert(ProviderFeed).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=["provider", "region"],
+                set_={key: getattr(statement.excluded, key) for key in ("tmdb_ids", "scores", "computed_at")},
+            )
+            session.exec(statement)
+            session.commit()
+    logger.info("Fils d'accueil recalculés", extra={"feeds": len(rows), "size": size})
+    return len(rows)
+
+# ==========================================
+# PARTIE 2 : FUSION (mémoire, sans DB)
+# ==========================================
+
+def merge_feeds(
+    feeds: Dict[str, Tuple[Sequence[int], Sequence[float]]], limit: int, offset: int = 0
+) -> List[Tuple[int, List[str]]]:
+    """
+    Fusion k-voies des fils triés de plusieurs plateformes : O((offset + limit) log k), sans
+    trier l'union. Un film présent sur plusieurs plateformes (même score partout) sort une
+    seule fois avec la liste de ses plateformes. Retourne [(tmdb_id, plateformes)].
+    """
+    def entries(provider: str, tmdb_ids: Sequence[int], scores: Sequence[float]) -> Iterator[Tuple[float, int, str]]:
+        return ((-score, tmdb_id, provider) for tmdb_id, score in zip(tmdb_ids, scores))
+
+    merged = heapq.merge(*(entries(provider, ids, scores) for provider, (ids, scores) in feeds.items()))
+    grouped = itertools.groupby(merged, key=lambda entry: (entry[0], entry[1]))
+    return [
+        (tmdb_id, [provider for _, _, provider in group])
+        for (_, tmdb_id), group in itertools.islice(grouped, offset, offset + limit)
+    ]
+
+# ==========================================
+# PARTIE 3 : LECTURE (chemin des requêtes)
+# ==========================================
+
+def _load_feeds_sync() -> int:
+    global _feeds, _movies, _loaded_at
+    with Session(engine) as session:
+        rows = session.exec(select(ProviderFeed)).all()
+        feeds = {(row.provider, row.region): (list(row.tmdb_ids), list(row.scores)) for row in rows}
+        tmdb_ids = {tmdb_id for ids, _ in feeds.values() for tmdb_id in ids}
+        movies = session.exec(
+            select(Movie.tmdb_id, Movie.title, Movie.overview, Movie.vote_average, Movie.poster_path)
+            .where(Movie.tmdb_id.in_(tmdb_ids))
+        ).all() if tmdb_ids else []
+    # Remplacement d'un bloc : une requête concurrente voit l'ancien ou le nouvel état, jamais un mélange
+    _movies = {
+        tmdb_id: {"id": tmdb_id, "title": title, "overview": overview,
+                  "vote_average": vote_average, "poster_path": poster_path}
+        for tmdb_id, title, overview, vote_average, poster_path in movies
+    }
+    _feeds = feeds
+    _loaded_at = time.monotonic()
+    return len(feeds)
+
+
+async def load_feeds() -> int:
+    """provider_feeds -> mémoire (warm-up, puis run_feed_reloader). Les lectures gardent l'ancien état pendant ce temps."""
+    async with _load_lock:
+        count = await asyncio.to_thread(_load_feeds_sync)
+    logger.info("Fils d'accueil chargés", extra={"feeds": count, "movies": len(_movies)})
+    return count
+
+
+async def run_feed_reloader(stop: asyncio.Event, interval: float = FEED_RELOAD_INTERVAL) -> None:
+    """Tâche de fond de l'API : relit provider_feeds toutes les `interval` secondes, hors du chemin des requêtes."""
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+            break
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await load_feeds()
+        except Exception as e:
+            # DB injoignable : on continue de servir les fils déjà en mémoire
+            logger.warning("Rechargement des fils d'accueil impossible", extra={"error": str(e)})
+
+
+async def _ensure_loaded() -> None:
+    """Premier chargement si le warm-up ne l'a pas fait (désactivé ou en échec) : une seule fois pour tous."""
+    global _loaded_at
+    if _loaded_at:
+        return
+    async with _load_lock:
+        if _loaded_at:
+            return
+        try:
+            count = await asyncio.to_thread(_load_feeds_sync)
+            logger.info("Fils d'accueil chargés", extra={"feeds": count, "movies": len(_movies)})
+        except Exception as e:
+            # Pas de nouvel essai à chaque requête : le reloader réessaiera à son prochain passage
+            _loaded_at = time.monotonic()
+            logger.warning("Chargement des fils d'accueil impossible", extra={"error": str(e)})
+
+
+@timed("feeds.merge")
+def _merge_home_feed(providers: Iterable[str], region: str, limit: int, offset: int) -> List[dict]:
+    feeds = {provider: _feeds[(provider, region)] for provider in providers if (provider, region) in _feeds}
+    return [
+        dict(_movies[tmdb_id], available_on=available_on)
+        for tmdb_id, available_on in merge_feeds(feeds, limit, offset)
+        if tmdb_id in _movies
+    ]
+
+
+async def get_home_feed(providers: List[str], region: str = "FR", limit: int = 20, offset: int = 0) -> List[dict]:
+    """
+    Films populaires disponibles sur au moins une des plateformes, sans appel TMDB :
+    fusion des fils pré-calculés (build_home_feeds.py). Liste vide si aucun fil n'est construit.
+    Le rafraîchissement est fait par run_feed_reloader, jamais par la requête.
+    """
+    await _ensure_loaded()
+    return _merge_home_feed(providers, region.upper(), limit, offset)
@@ -0,0 +1,193 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import engine
+from app.models.movie import Movie
+from app.models.neighbors import MovieNeighbors
+from app.models.availability import utcnow
+from app.core.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", "20"))
+# Lignes de la matrice traitées par produit matriciel : mémoire ~ block_size x N x 4 octets
+NEIGHBORS_BLOCK_SIZE = int(os.getenv("NEIGHBORS_BLOCK_SIZE", "1024"))
+SAVE_BATCH = 1000
+
+# ==========================================
+# PARTIE 1 : CALCUL (numpy, sans DB)
+# ==========================================
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normalisation L2 : le produit scalaire devient la similarité cosinus."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_blocked(
+    queries: np.ndarray,
+    matrix: np.ndarray,
+    k: int,
+    block_size: int = NEIGHBORS_BLOCK_SIZE,
+    exclude: Optional[np.ndarray] = None,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Top-k par blocs : un produit matriciel (bloc x N) par bloc de requêtes au lieu d'une
+    recherche par film. `exclude[i]` = index de `matrix` à ignorer pour la requête i (elle-même).
+
+    Produit (début du bloc, indices (bloc x k), scores (bloc x k)) triés par score décroissant.
+    """
+    k = min(k, matrix.shape[0] - (1 if exclude is not None else 0))
+    if k <= 0:
+        return
+    for start in range(0, queries.shape[0], block_size):
+        scores = queries[start:start + block_size] @ matrix.T
+        if exclude is not None:
+            scores[np.arange(scores.shape[0]), exclude[start:start + block_size]] = -np.inf
+        # argpartition O(N) puis tri des k seulement
+        idx = np.argpartition(-scores, kth=k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(scores, idx, axis=1)
+        order = np.argsort(-part, axis=1)
+        yield start, np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def merge_neighbors(
+    old_ids: List[int], old_scores: List[float], new_ids: List[int], new_scores: List[float], k: int
+) -> Tuple[List[int], List[float]]:
+    """Fusionne deux listes de voisins (un id garde son meilleur score) et garde les k meilleurs."""
+    best: Dict[int, float] = {}
+    for movie_id, score in zip(list(old_ids) + list(new_ids), list(old_scores) + list(new_scores)):
+        if score > best.get(movie_id, -np.inf):
+            best[movie_id] = score
+    ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [movie_id for movie_id, _ in ranked], [float(score) for _, score in ranked]
+
+# ==========================================
+# PARTIE 2 : JOB BATCH (DB)
+# ==========================================
+
+def _load_embeddings_sync() -> Tuple[np.ndarray, np.ndarray]:
+    """(tmdb_ids, matrice normalisée float32) des films vectorisés."""
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Movie.tmdb_id, Movie.embedding).where(Movie.embedding.is_not(None)).order_by(Movie.tmdb_id)
+        ).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+    ids = np.fromiter((tmdb_id for tmdb_id, _ in rows), dtype=np.int64, count=len(rows))
+    matrix = np.vstack([np.asarray(vector, dtype=np.float32) for _, vector in rows])
+    return ids, normalize_rows(matrix)
+
+
+def _load_graph_sync() -> Dict[int, Tuple[List[int], List[float]]]:
+    with Session(engine) as session:
+        rows = session.exec(select(MovieNeighbors.tmdb_id, MovieNeighbors.neighbor_ids, MovieNeighbors.scores)).all()
+    return {tmdb_id: (list(neighbor_ids), list(scores)) for tmdb_id, neighbor_ids, scores in rows}
+
+
+def _save_graph_sync(rows: List[dict]) -> None:
+    now = utcnow()
+    with Session(engine) as session:
+        for start in range(0, len(rows), SAVE_BATCH):
+            batch = [dict(row, computed_at=now) for row in rows[start:start + SAVE_BATCH]]
+            statement = insert(MovieNeighbors).values(batch)
+            statement = statement.on_conflict_do_update(
+                index_elements=["tmdb_id"],
+                set_={key: getattr(statement.excluded, key) for key in ("neighbor_ids", "scores", "computed_at")},
+            )
+            session.exec(statement)
+        session.commit()
+
+
+def _delete_graph_rows_sync(tmdb_ids: List[int]) -> None:
+    if not tmdb_ids:
+        return
+    with Session(engine) as session:
+        for row in session.exec(select(MovieNeighbors).where(MovieNeighbors.tmdb_id.in_(tmdb_ids))).all():
+            session.delete(row)
+        session.commit()
+
+
+def build_neighbor_graph_sync(
+    k: int = NEIGHBORS_K, block_size: int = NEIGHBORS_BLOCK_SIZE, full: bool = False
+) -> int:
+    """
+    Met à jour movie_neighbors. Retourne le nombre de lignes écrites.
+
+    Incrémental par défaut : seuls les films sans ligne (nouvelles ingestions) sont calculés
+    en entier ; pour les autres, on ne compare qu'aux nouveaux films (bloc x nouveaux) et on
+    ne réécrit que les listes où un nouveau venu entre dans le top-k. Les listes qui pointent
+    vers un film disparu du catalogue sont recalculées. `full=True` recalcule tout.
+    """
+    ids, matrix = _load_embeddings_sync()
+    if ids.size == 0:
+        return 0
+    position = {int(tmdb_id): i for i, tmdb_id in enumerate(ids)}
+    graph = {} if full else _load_graph_sync()
+
+    _delete_graph_rows_sync([tmdb_id for tmdb_id in graph if tmdb_id not in position])
+    stale = [i for i, tmdb_id in enumerate(ids) if int(tmdb_id) not in graph
+             or any(n not in position for n in graph[int(tmdb_id)][0])]
+    new_positions = np.array([i for i in stale if int(ids[i]) not in graph], dtype=np.int64)
+    stale_positions = np.array(stale, dtype=np.int64)
+
+    rows = []
+    # 1. Listes complètes : nouveaux films et listes invalides
+    for start, idx, scores in top_k_blocked(matrix[stale_positions], matrix, k, block_size, exclude=stale_positions):
+        for offset in range(idx.shape[0]):
+            rows.append({
+                "tmdb_id": int(ids[stale_positions[start + offset]]),
+                "neighbor_ids": [int(ids[j]) for j in idx[offset]],
+                "scores": [float(s) for s in scores[offset]],
+            })
+
+    # 2. Films existants : un nouveau venu entre-t-il dans leur top-k ?
+    stale_set = set(stale_positions.tolist())
+    existing = np.array([i for i in range(len(ids)) if i not in stale_set], dtype=np.int64)
+    if new_positions.size and existing.size:
+        new_matrix = matrix[new_positions]
+        for start, idx, scores in top_k_blocked(matrix[existing], new_matrix, k, block_size):
+            for offset in range(idx.shape[0]):
+                tmdb_id = int(ids[existing[start + offset]])
+                old_ids, old_scores = graph[tmdb_id]
+                worst = old_scores[-1] if len(old_scores) >= k else -np.inf
+                if scores[offset, 0] <= worst:
+                    continue
+                merged_ids, merged_scores = merge_neighbors(
+                    old_ids, old_scores,
+                    [int(ids[new_positions[j]]) for j in idx[offset]], scores[offset].tolist(), k,
+                )
+                rows.append({"tmdb_id": tmdb_id, "neighbor_ids": merged_ids, "scores": merged_scores})
+
+    _save_graph_sync(rows)
+    logger.info("Graphe k-NN mis à jour", extra={"movies": int(ids.size), "new": int(new_positions.size), "rows": len(rows)})
+    return len(rows)
+
+# ==========================================
+# PARTIE 3 : LECTURE (chemin des requêtes)
+# ==========================================
+
+@timed("db.similar")
+def _get_similar_sync(tmdb_id: int, limit: int) -> Optional[List[Movie]]:
+    """Lookup par clé primaire + chargement des films voisins (ordre du graphe conservé)."""
+    with Session(engine) as session:
+        row = session.get(MovieNeighbors, tmdb_id)
+        if row is None:
+            return None
+        neighbor_ids = row.neighbor_ids[:limit]
+        movies = session.exec(select(Movie).where(Movie.tmdb_id.in_(neighbor_ids))).all()
+    by_id = {movie.tmdb_id: movie for movie in movies}
+    return [by_id[n] for n in neighbor_ids if n in by_id]
+
+
+async def get_similar_movies(tmdb_id: int, limit: int = 10) -> Optional[List[Movie]]:
+    """Films similaires pré-calculés. None si le film n'est pas (encore) dans le graphe."""
+    return await asyncio.to_thread(_get_similar_sync, tmdb_id, limit)
@@ -0,0 +1,326 @@
+import os
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, select
+from sqlalchemy import any_, case, func, not_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import engine
+from app.models.movie import Movie
+from app.models.challenge import Challenge, ChallengeRule, ChallengeType, RuleOperator, evaluate_rule
+from app.models.progress import ChallengeDefinition, WatchEvent, UserProgress
+from app.models.availability import utcnow
+from app.core.cache import TTLCache
+from app.core.metrics import REGISTRY, Counter, timed
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+# Les définitions changent rarement : relues au plus toutes les CHALLENGE_CACHE_TTL secondes
+CHALLENGE_CACHE_TTL = float(os.getenv("CHALLENGE_CACHE_TTL", "60"))
+REPLAY_BATCH = 5000
+# Colonnes lues pour évaluer les règles (jamais l'embedding)
+FACT_COLUMNS = (
+    Movie.tmdb_id, Movie.title, Movie.genres, Movie.release_date,
+    Movie.runtime, Movie.vote_average, Movie.vote_count, Movie.popularity,
+)
+
+# Champs exposés aux règles (movie_facts) -> type attendu de la valeur comparée.
+# "genre" est un alias de "genres" (liste) : les deux formes se rencontrent dans les définitions.
+FACT_TYPES = {
+    "tmdb_id": int, "title": str, "genres": list, "genre": list, "release_date": str,
+    "year": int, "runtime": int, "vote_average": float, "vote_count": int, "popularity": float,
+}
+COMPARISONS = {RuleOperator.EQ, RuleOperator.NEQ, RuleOperator.GT, RuleOperator.GTE, RuleOperator.LT, RuleOperator.LTE}
+
+_active_challenges = TTLCache(maxsize=1, ttl=CHALLENGE_CACHE_TTL)
+
+WATCH_EVENTS = REGISTRY.register(Counter(
+    "cinephile_watch_events_total",
+    "Événements de visionnage reçus, par résultat (applied, duplicate).",
+    labelnames=("result",),
+))
+
+# ==========================================
+# PARTIE 1 : RÈGLES (pur, sans DB)
+# ==========================================
+
+def movie_facts(movie) -> dict:
+    """
+    Champs exposés aux règles des défis (ex : {field: "year", operator: "gte", value: 1990}).
+    `movie` : un Movie ou une ligne de FACT_COLUMNS.
+    """
+    release_date = movie.release_date or ""
+    genres = list(movie.genres or [])
+    return {
+        "tmdb_id": movie.tmdb_id,
+        "title": movie.title,
+        "genres": genres,
+        "genre": genres,
+        "release_date": movie.release_date,
+        "year": int(release_date[:4]) if release_date[:4].isdigit() else None,
+        "runtime": movie.runtime,
+        "vote_average": movie.vote_average,
+        "vote_count": movie.vote_count,
+        "popularity": movie.popularity,
+    }
+
+
+def _value_matches(value, expected: type) -> bool:
+    if isinstance(value, bool):
+        return False
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def rule_error(rule: ChallengeRule) -> Optional[str]:
+    """Raison pour laquelle une règle ne peut pas être évaluée sur movie_facts, None si elle est valide."""
+    expected = FACT_TYPES.get(rule.field)
+    if expected is None:
+        return f"champ inconnu '{rule.field}' (champs possibles : {', '.join(sorted(FACT_TYPES))})"
+    value = rule.value
+    if expected is list:
+        # Liste de genres : test d'appartenance (contains) ou égalité de liste
+        if rule.operator == RuleOperator.CONTAINS and isinstance(value, str):
+            return None
+        if rule.operator in (RuleOperator.EQ, RuleOperator.NEQ) and isinstance(value, list):
+            return None
+        return f"'{rule.field}' est une liste : utilisez contains avec une chaîne"
+    if rule.operator == RuleOperator.IN:
+        if isinstance(value, list) and all(_value_matches(item, expected) for item in value):
+            return None
+        return f"'in' sur '{rule.field}' attend une liste de {expected.__name__}"
+    if rule.operator == RuleOperator.CONTAINS:
+        return None if expected is str and isinstance(value, str) else f"'contains' invalide sur '{rule.field}'"
+    if rule.operator in COMPARISONS and _value_matches(value, expected):
+        return None
+    return f"'{rule.field}' attend une valeur de type {expected.__name__}, reçu {value!r}"
+
+
+def validate_challenge(challenge: Challenge) -> None:
+    """Refuse (ValueError) un défi dont une règle échouerait à l'évaluation."""
+    errors = [error for error in map(rule_error, challenge.rules) if error]
+    if errors:
+        raise ValueError("Règles invalides : " + " ; ".join(errors))
+
+
+def _rule_matches(challenge: Challenge, facts: dict, rule: ChallengeRule) -> bool:
+    """evaluate_rule protégé : une règle mal typée (défi antérieur à la validation) ne matche pas."""
+    try:
+        return evaluate_rule(facts, rule)
+    except TypeError as e:
+        logger.warning("Règle de défi non évaluable", extra={
+            "challenge": challenge.id, "field": rule.field, "operator": rule.operator.value, "error": str(e),
+        })
+        return False
+
+
+def matching_challenges(challenges: Iterable[Challenge], facts: dict) -> List[Challenge]:
+    """
+    Défis auxquels ce film contribue (toutes les règles vraies, logique AND).
+    Les défis STREAK dépendent de dates consécutives, pas d'un film : hors de ce calcul.
+    """
+    return [
+        challenge for challenge in challenges
+        if challenge.challenge_type != ChallengeType.Streak
+        and all(_rule_matches(challenge, facts, rule) for rule in challenge.rules)
+    ]
+
+
+def new_progress_row(user_id: str, challenge_id: str) -> dict:
+    return {"user_id": user_id, "challenge_id": challenge_id, "movies_watched": [],
+            "current_count": 0, "is_completed": False, "completed_at": None}
+
+
+def apply_watch(row: dict, tmdb_id: int, target_count: int, watched_at: datetime) -> bool:
+    """
+    Transition d'une ligne de progression pour un film validé (miroir de l'upsert SQL de
+    _increment_progress) : +1 si le film n'est pas déjà compté. Retourne True si modifiée.
+    """
+    if tmdb_id in row["movies_watched"]:
+        return False
+    row["movies_watched"].append(tmdb_id)
+    row["current_count"] += 1
+    if not row["is_completed"] and row["current_count"] >= target_count:
+        row["is_completed"] = True
+        row["completed_at"] = watched_at
+    return True
+
+
+def replay_events(
+    challenges: List[Challenge], events: Iterable[Tuple[str, dict, datetime]]
+) -> Dict[Tuple[str, str], dict]:
+    """
+    Rejoue des événements (user_id, faits du film, date) dans l'ordre chronologique.
+    Mêmes règles que l'incrémental : un film ne compte qu'une fois par défi.
+    Retourne {(user_id, challenge_id): ligne user_progress}.
+    """
+    progress: Dict[Tuple[str, str], dict] = {}
+    for user_id, facts, watched_at in events:
+        for challenge in matching_challenges(challenges, facts):
+            row = progress.setdefault((user_id, challenge.id), new_progress_row(user_id, challenge.id))
+            apply_watch(row, facts["tmdb_id"], challenge.target_count, watched_at)
+    return progress
+
+# ==========================================
+# PARTIE 2 : DÉFINITIONS DES DÉFIS
+# ==========================================
+
+def _load_active_challenges_sync() -> List[Challenge]:
+    challenges = _active_challenges.get("active")
+    if challenges is None:
+        with Session(engine) as session:
+            rows = session.exec(select(ChallengeDefinition).where(ChallengeDefinition.is_active)).all()
+        challenges = [row.to_challenge() for row in rows]
+        _active_challenges.set("active", challenges)
+    return challenges
+
+
+def list_challenges_sync() -> List[Challenge]:
+    return _load_active_challenges_sync()
+
+
+def upsert_challenge_sync(challenge_id: str, challenge: Challenge) -> Challenge:
+    """
+    Crée ou remplace un défi puis recalcule sa progression (les règles ont pu changer).
+    Lève ValueError si une règle ne peut pas être évaluée (cf. rule_error).
+    """
+    validate_challenge(challenge)
+    definition = challenge.model_dump(mode="json", exclude={"id"})
+    with Session(engine) as session:
+        statement = insert(ChallengeDefinition).values(
+            id=challenge_id, definition=definition, is_active=challenge.is_active, updated_at=utcnow()
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["id"],
+            set_={key: getattr(statement.excluded, key) for key in ("definition", "is_active", "updated_at")},
+        )
+        session.exec(statement)
+        session.commit()
+    _active_challenges.clear()
+    rebuild_progress_sync([challenge_id])
+    return challenge.model_copy(update={"id": challenge_id})
+
+# ==========================================
+# PARTIE 3 : ÉVÉNEMENTS (incrémental)
+# ==========================================
+
+def default_event_id(user_id: str, tmdb_id: int) -> str:
+    """Clé d'idempotence par défaut : un film vu deux fois n'est qu'un événement."""
+    return hashlib.sha256(f"{user_id}:{tmdb_id}".encode("utf-8")).hexdigest()[:32]
+
+
+def _increment_progress(session: Session, user_id: str, challenge: Challenge, tmdb_id: int, now: datetime):
+    """
+    Un seul upsert atomique par défi concerné : +1 si le film n'est pas déjà compté,
+    sinon la ligne n'est pas touchée (rien n'est renvoyé). Aucun historique relu.
+    """
+    target = challenge.target_count
+    count = UserProgress.current_count + 1
+    statement = insert(UserProgress).values(
+        user_id=user_id, challenge_id=challenge.id, movies_watched=[tmdb_id], current_count=1,
+        is_completed=target <= 1, completed_at=now if target <= 1 else None, updated_at=now,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "challenge_id"],
+        set_={
+            "movies_watched": func.array_append(UserProgress.movies_watched, tmdb_id),
+            "current_count": count,
+            "is_completed": UserProgress.is_completed | (count >= target),
+            "completed_at": func.coalesce(UserProgress.completed_at, case((count >= target, now))),
+            "updated_at": now,
+        },
+        where=not_(tmdb_id == any_(UserProgress.movies_watched)),
+    ).returning(*UserProgress.__table__.c)
+    row = session.exec(statement).first()
+    return UserProgress(**row._mapping) if row is not None else None
+
+
+@timed("db.watch_event")
+def record_watch_sync(
+    user_id: str, tmdb_id: int, event_id: Optional[str] = None, watched_at: Optional[datetime] = None
+) -> Optional[Tuple[bool, List[UserProgress]]]:
+    """
+    Enregistre un visionnage et met à jour la progression des seuls défis concernés.
+    Retourne (doublon, progressions modifiées), None si le film est hors catalogue.
+    """
+    challenges = _load_active_challenges_sync()
+    now = utcnow()
+    with Session(engine) as session:
+        movie = session.exec(select(*FACT_COLUMNS).where(Movie.tmdb_id == tmdb_id)).first()
+        if movie is None:
+            return None
+        inserted = session.exec(
+            insert(WatchEvent)
+            .values(event_id=event_id or default_event_id(user_id, tmdb_id), user_id=user_id,
+                    tmdb_id=tmdb_id, watched_at=watched_at or now)
+            .on_conflict_do_nothing(index_elements=["event_id"])
+            .returning(WatchEvent.event_id)
+        ).first()
+        if inserted is None:
+            WATCH_EVENTS.inc(result="duplicate")
+            return True, []
+        updated = []
+        for challenge in matching_challenges(challenges, movie_facts(movie)):
+            row = _increment_progress(session, user_id, challenge, tmdb_id, watched_at or now)
+            if row is not None:
+                updated.append(row)
+        session.commit()
+    WATCH_EVENTS.inc(result="applied")
+    return False, updated
+
+# ==========================================
+# PARTIE 4 : LECTURE & REBUILD
+# ==========================================
+
+@timed("db.progress")
+def get_user_progress_sync(user_id: str) -> List[Tuple[UserProgress, dict]]:
+    """Tableau de bord : scan de la clé primaire (user_id, challenge_id) + définitions par clé."""
+    with Session(engine) as session:
+        rows = session.exec(
+            select(UserProgress, ChallengeDefinition.definition)
+            .join(ChallengeDefinition, ChallengeDefinition.id == UserProgress.challenge_id)
+            .where(UserProgress.user_id == user_id)
+            .order_by(UserProgress.challenge_id)
+        ).all()
+    return [(progress, definition) for progress, definition in rows]
+
+
+def _iter_events_sync(session: Session) -> Iterable[Tuple[str, dict, datetime]]:
+    statement = (
+        select(WatchEvent.user_id, WatchEvent.watched_at, *FACT_COLUMNS)
+        .join(Movie, Movie.tmdb_id == WatchEvent.tmdb_id)
+        .order_by(WatchEvent.watched_at, WatchEvent.event_id)
+        .execution_options(yield_per=REPLAY_BATCH)
+    )
+    for row in session.exec(statement):
+        yield row.user_id, movie_facts(row), row.watched_at
+
+
+def rebuild_progress_sync(challenge_ids: Optional[List[str]] = None) -> int:
+    """
+    Recalcule user_progress depuis watch_events (définitions modifiées, nouveau défi...).
+    `challenge_ids` None = tous les défis. Les défis désactivés perdent leur progression.
+    Une seule transaction : les lectures voient l'ancien état jusqu'au commit.
+    """
+    _active_challenges.clear()
+    challenges = [
+        c for c in _load_active_challenges_sync() if challenge_ids is None or c.id in challenge_ids
+    ]
+    now = utcnow()
+    with Session(engine) as session:
+        rows = list(replay_events(challenges, _iter_events_sync(session)).values()) if challenges else []
+        delete = UserProgress.__table__.delete()
+        if challenge_ids is not None:
+            delete = delete.where(UserProgress.challenge_id.in_(challenge_ids))
+        session.exec(delete)
+        for start in range(0, len(rows), REPLAY_BATCH):
+            batch = [dict(row, updated_at=now) for row in rows[start:start + REPLAY_BATCH]]
+            session.exec(insert(UserProgress).values(batch))
+        session.commit()
+    logger.info("Progression recalculée", extra={"challenges": len(challenges), "rows": len(rows)})
+    return len(rows)
@@ -1,23 +1,64 @@
 import os
+import re
+import math
 import asyncio
-from typing import List, Set, Optional
-import google.generativeai as genai
-from sqlmodel import Session, select
-from dotenv import load_dotenv
+import logging
+from typing import Dict, List, Set, Optional, Tuple
+from sqlmodel import Session, select, or_
+from sqlalchemy import tuple_
 
 # --- Architecture Async ---
-from app.services import tmdb
-from app.core.constants import PROVIDER_MAPPING
+from app.services.availability import lookup_availability, prime_from_precomputed, note_requested
+from app.core.constants import PROVIDER_MAPPING, GENRE_NAMES_BY_ID
+from app.core.providers import encode_providers, decode_providers
+from app.services.ai_mood import get_tmdb_filters_from_mood, local_rule_based_analysis
+from app.services.embeddings import get_embedding_provider
 
 # --- RAG ---
 from app.database import engine
 from app.models.movie import Movie
+from app.core.metrics import REGISTRY, Counter, Histogram, timed
+from app.core.semantic_cache import SemanticCache
+from app.core.cache import TTLCache
+from app.core.deadline import Deadline
+from app.models.availability import AvailabilityStatus
+from app.core.config import load_env
 
-load_dotenv()
-GENAI_KEY = os.getenv("GOOGLE_API_KEY")
+logger = logging.getLogger(__name__)
+
+load_env()
+
+# --- CACHE MÉMOIRE ---
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+# Texte exact (espaces réduits) -> vecteur. Pas de normalize_text : accents et casse changent le
+# vecteur, et une page suivante doit ré-embedder exactement le texte de la première page.
+_embedding_cache = TTLCache(maxsize=EMBEDDING_CACHE_SIZE)
+
+# --- CACHE SÉMANTIQUE (paraphrases) ---
+# Vecteur de requête -> classement déjà calculé : une requête assez proche saute la recherche DB
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))  # 0 = désactivé
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+# Borne la fraîcheur des classements (nouvelles ingestions)
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+_semantic_cache = (
+    SemanticCache(maxsize=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CACHE_TTL)
+    if SEMANTIC_CACHE_SIZE > 0 else None
+)
+
+SEMANTIC_CACHE_EVENTS = REGISTRY.register(Counter(
+    "cinephile_semantic_cache_total",
+    "Recherches vectorielles servies par le cache sémantique (hit) ou par la DB (miss).",
+    labelnames=("result",),
+))
+# Meilleure similarité observée à chaque consultation : sert à régler SEMANTIC_CACHE_THRESHOLD
+SEMANTIC_CACHE_SIMILARITY = REGISTRY.register(Histogram(
+    "cinephile_semantic_cache_similarity",
+    "Similarité cosinus avec l'entrée la plus proche du cache sémantique.",
+    buckets=(0.5, 0.7, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 0.99, 1.0),
+))
 
-if GENAI_KEY:
-    genai.configure(api_key=GENAI_KEY)
 
 # ==========================================
 # PARTIE 1 : FILTRE PAR PLATEFORME 
@@ -34,31 +75,48 @@ def get_common_providers(user_providers: List[List[str]]) -> Set[str]:
     
     return union_providers
 
-async def filter_movies_by_availability(movies: List[dict], user_providers: List[List[str]], country_code: str = "FR") -> List[dict]:
-    """Filtre les films selon leur disponibilité (Async)."""
+async def _resolve_availability(
+    movies: List[dict], country_code: str, deadline: Optional[Deadline]
+) -> List[Tuple[List[str], AvailabilityStatus]]:
+    """(providers, statut) de chaque film, dans l'ordre de `movies`."""
+    # Sécurité : on vérifie si tmdb_id existe, sinon fallback sur id 
+    target_ids = [movie.get("tmdb_id", movie["id"]) for movie in movies]
+    note_requested(target_ids, country_code)
+
+    # Données pré-calculées par le refresher : une requête DB pour tout le lot, TMDB seulement en dernier recours
+    await prime_from_precomputed(target_ids, country_code, deadline)
+    tasks = [lookup_availability(target_id, country_code, deadline) for target_id in target_ids]
+    
+    return await asyncio.gather(*tasks)
+
+@timed("availability.filter")
+async def filter_movies_by_availability(
+    movies: List[dict], user_providers: List[List[str]], country_code: str = "FR",
+    deadline: Optional[Deadline] = None,
+) -> List[dict]:
+    """
+    Filtre les films selon leur disponibilité (Async).
+    Chaque film retenu porte `available_on` et `availability_status` : un film dont la
+    disponibilité n'a pas pu être vérifiée à temps est renvoyé (UNKNOWN) plutôt que masqué.
+    """
     common_providers = get_common_providers(user_providers)
     
     if not common_providers:
         # Si l'utilisateur n'a coché aucune plateforme, on renvoie tout
         return movies 
     
-    tasks = []
-    for movie in movies:
-        # Sécurité : on vérifie si tmdb_id existe, sinon fallback sur id 
-        target_id = movie.get("tmdb_id", movie["id"]) 
-        tasks.append(tmdb.get_movie_providers(target_id, country_code))
-        
-    
-    movie_providers_list = await asyncio.gather(*tasks, return_exceptions=True)
+    lookups = await _resolve_availability(movies, country_code, deadline)
     
     available_movies = []
-    for movie, providers_result in zip(movies, movie_providers_list):
-        # Gestion d'erreur silencieuse pour un film donné
-        if isinstance(providers_result, Exception):
-            print(f"⚠️ Erreur TMDB pour {movie['title']}: {providers_result}")
+    for movie, (providers_result, status) in zip(movies, lookups):
+        if status == AvailabilityStatus.UNKNOWN:
+            movie_copy = movie.copy()
+            movie_copy["available_on"] = []
+            movie_copy["availability_status"] = status
+            available_movies.append(movie_copy)
             continue
             
-        # Si providers_result est None ou vide, on passe
+        # Si providers_result est vide, on passe
         if not providers_result:
             continue
         
@@ -69,58 +127,300 @@ async def filter_movies_by_availability(movies: List[dict], user_providers: List
         if intersection:
             movie_copy = movie.copy()
             movie_copy["available_on"] = sorted(list(intersection))
+            movie_copy["availability_status"] = status
             available_movies.append(movie_copy)
     
     return available_movies
 
+@timed("availability.filter_mask")
+async def filter_movies_by_provider_mask(
+    movies: List[dict], mask: int, country_code: str = "FR",
+    deadline: Optional[Deadline] = None,
+) -> List[dict]:
+    """
+    Variante "groupe" : la disponibilité est résolue UNE fois pour tout le lot, puis
+    chaque film est testé par un simple `providers_du_film & mask`.
+    """
+    lookups = await _resolve_availability(movies, country_code, deadline)
+
+    available_movies = []
+    for movie, (providers_result, status) in zip(movies, lookups):
+        if status == AvailabilityStatus.UNKNOWN:
+            movie_copy = movie.copy()
+            movie_copy["available_on"] = []
+            movie_copy["availability_status"] = status
+            available_movies.append(movie_copy)
+            continue
+
+        shared = encode_providers(providers_result or []) & mask
+        if shared:
+            movie_copy = movie.copy()
+            movie_copy["available_on"] = decode_providers(shared)
+            movie_copy["availability_status"] = status
+            available_movies.append(movie_copy)
+
+    return available_movies
+
 # ==========================================
 # PARTIE 2 : MOTEUR DE RECHERCHE IA (RAG) 
 # ==========================================
 
+@timed("embedding")
 def _get_embedding_sync(text: str) -> Optional[List[float]]:
-    """Version bloquante interne de l'appel Gemini."""
-    if not GENAI_KEY:
-        print("⚠️ Erreur : Pas de clé API Google configurée.")
-        return None
-    try:
-        result = genai.embed_content(
-            model="models/text-embedding-004",
-            content=text,
-            task_type="retrieval_query"
-        )
-        return result['embedding']
-    except Exception as e:
-        print(f"⚠️ Erreur Embedding: {e}")
-        return None
+    """Version bloquante interne : fournisseur configuré (EMBEDDING_PROVIDER)."""
+    return get_embedding_provider().embed_query(text)
 
-def _search_db_sync(vector: List[float], limit: int) -> List[Movie]:
-    """Version bloquante interne de la requête DB."""
+@timed("db.vector_search")
+def _search_db_sync(
+    vector: List[float], limit: int, after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[Movie, float]]:
+    """Version bloquante interne de la requête DB. Retourne (film, distance) dans l'ordre (distance, id)."""
+    distance = Movie.embedding.cosine_distance(vector)
     with Session(engine) as session:
-        statement = (
-            select(Movie)
-            .order_by(Movie.embedding.cosine_distance(vector))
-            .limit(limit)
-        )
-        return session.exec(statement).all()
+        statement = select(Movie, distance.label("distance"))
+        if after is not None:
+            # Keyset : reprend le parcours ordonné juste après le dernier (distance, id) servi
+            statement = statement.where(tuple_(distance, Movie.id) > tuple_(after[0], after[1]))
+        statement = statement.order_by(distance, Movie.id).limit(limit)
+        return [(movie, float(dist)) for movie, dist in session.exec(statement).all()]
+
+def get_query_embedding(text: str) -> Optional[List[float]]:
+    """Embedding d'une requête utilisateur, mémorisé par texte exact (espaces réduits)."""
+    key = " ".join(text.split())
+    vector = _embedding_cache.get(key)
+    if vector is None:
+        vector = _get_embedding_sync(text)
+        if vector:
+            _embedding_cache.set(key, vector)
+    return vector
 
-async def find_similar_movies(user_query: str, limit: int = 5) -> List[Movie]:
+async def _run_blocking(deadline: Optional[Deadline], func, *args):
+    """to_thread borné par le deadline (lève TimeoutError ; le thread finit en arrière-plan)."""
+    if deadline is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.wait_for(asyncio.to_thread(func, *args), timeout=deadline.timeout())
+
+def _semantic_lookup(vector: List[float], limit: int) -> Optional[Tuple[str, List[Tuple[Movie, float]]]]:
+    """(ancre, classement) d'une paraphrase déjà calculée, si elle couvre `limit` résultats."""
+    if _semantic_cache is None:
+        return None
+    entry, similarity = _semantic_cache.lookup(vector)
+    SEMANTIC_CACHE_SIMILARITY.observe(similarity)
+    if entry is not None:
+        anchor, rows, fetched = entry
+        # Un classement plus court que demandé n'est réutilisable que s'il était exhaustif
+        if fetched >= limit or len(rows) < fetched:
+            SEMANTIC_CACHE_EVENTS.inc(result="hit")
+            return anchor, rows[:limit]
+    SEMANTIC_CACHE_EVENTS.inc(result="miss")
+    return None
+
+async def find_similar_movies_page(
+    user_query: str, limit: int = 5, after: Optional[Tuple[float, int]] = None,
+    deadline: Optional[Deadline] = None, anchor: Optional[str] = None,
+) -> Tuple[List[Movie], Optional[Tuple[float, int]], str]:
     """
-    Wrapper ASYNC : Rend les opérations lourdes (IA + DB) non-bloquantes
-    pour ne pas figer l'API FastAPI.
+    Une page de la recherche vectorielle. Retourne (films, position, ancre) où position =
+    (distance, id) du dernier film servi, à repasser en `after` pour la page suivante
+    (None s'il n'y a plus rien après), et ancre = texte dont le vecteur ordonne le parcours :
+    la requête elle-même, ou la paraphrase du cache sémantique dont le classement a été
+    réutilisé, toujours en texte brut (c'est ce texte qui sera ré-embeddé). Les pages suivantes repassent `anchor` pour rester dans le même ordre.
+    L'embedding est servi par le cache : les pages suivantes ne coûtent qu'une requête SQL.
+    Lève TimeoutError si le `deadline` est dépassé avant d'avoir des candidats.
     """
-    print(f"🧠 Analyse de la requête (Async) : '{user_query}'...")
+    logger.debug("Analyse de la requête", extra={"query": user_query})
+    scan_query = anchor or user_query
     
-    # 1. On déporte l'appel Gemini dans un thread séparé
-    query_vector = await asyncio.to_thread(_get_embedding_sync, user_query)
+    # 1. On déporte l'appel d'embedding dans un thread séparé
+    query_vector = await _run_blocking(deadline, get_query_embedding, scan_query)
     
     if not query_vector:
-        return []
+        return [], None, scan_query
 
-    # 2. On déporte la requête SQL dans un thread séparé
-    # (Solution temporaire propre avant de passer à asyncpg)
-    results = await asyncio.to_thread(_search_db_sync, query_vector, limit)
+    # 2. Première page : une paraphrase récente a peut-être déjà son classement
+    cached = _semantic_lookup(query_vector, limit) if after is None and anchor is None else None
+    if cached is not None:
+        scan_query, rows = cached
+    else:
+        # On déporte la requête SQL dans un thread séparé
+        # (Solution temporaire propre avant de passer à asyncpg)
+        rows = await _run_blocking(deadline, _search_db_sync, query_vector, limit, after)
+        if after is None and _semantic_cache is not None:
+            _semantic_cache.add(query_vector, (scan_query, rows, limit))
     
-    return results
+    position = (rows[-1][1], rows[-1][0].id) if len(rows) == limit else None
+    return [movie for movie, _ in rows], position, scan_query
+
+async def find_similar_movies(user_query: str, limit: int = 5, deadline: Optional[Deadline] = None) -> List[Movie]:
+    """
+    Wrapper ASYNC : Rend les opérations lourdes (IA + DB) non-bloquantes
+    pour ne pas figer l'API FastAPI.
+    Lève TimeoutError si le `deadline` est dépassé avant d'avoir des candidats.
+    """
+    movies, _, _ = await find_similar_movies_page(user_query, limit=limit, deadline=deadline)
+    return movies
+
+# ==========================================
+# PARTIE 3 : RECHERCHE PAR MOOD (CATALOGUE LOCAL)
+# ==========================================
+
+# Part du budget de la requête laissée à l'analyse IA du mood : au-delà, règles par mots-clés
+MOOD_PARSE_BUDGET_S = float(os.getenv("MOOD_PARSE_BUDGET_S", "1.5"))
+MOOD_PARSE_FALLBACKS = REGISTRY.register(Counter(
+    "cinephile_mood_parse_fallback_total",
+    "Analyses de mood servies par les règles locales faute de réponse IA dans le budget.",
+))
+
+# Clés 'sort_by' TMDB -> colonnes locales
+SORT_COLUMNS = {
+    "popularity": Movie.popularity,
+    "vote_average": Movie.vote_average,
+    "vote_count": Movie.vote_count,
+    "release_date": Movie.release_date,
+    "primary_release_date": Movie.release_date,
+}
+
+
+def _parse_genre_ids(value) -> Tuple[List[int], bool]:
+    """
+    Décode un 'with_genres' TMDB. Retourne (ids, match_any).
+    Sémantique TMDB : "28,35" = ET, "28|35" = OU.
+    """
+    if isinstance(value, int):
+        return [value], False
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value if str(v).strip().isdigit()], False
+    text = str(value)
+    match_any = "|" in text
+    parts = re.split(r"[|,]", text)
+    return [int(p) for p in parts if p.strip().isdigit()], match_any
+
+
+def _genre_names(genre_ids: List[int]) -> List[str]:
+    return [GENRE_NAMES_BY_ID[genre_id] for genre_id in genre_ids if genre_id in GENRE_NAMES_BY_ID]
+
+
+def _bounded_number(filters: Dict, key: str, cast, low: float, high: float):
+    """
+    Valeur numérique d'un filtre (sortie LLM, non fiable) bornée à [low, high].
+    None (filtre ignoré, avec un warning) si elle n'est pas interprétable ("high", "", NaN...).
+    """
+    value = filters.get(key)
+    if value is None:
+        return None
+    try:
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(value)
+    except (TypeError, ValueError):
+        logger.warning("Filtre mood invalide ignoré", extra={"key": key, "value": repr(value)})
+        return None
+    return cast(min(max(number, low), high))
+
+
+# Dates TMDB : 'YYYY', 'YYYY-MM' ou 'YYYY-MM-DD'
+_DATE_FILTER = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+
+
+def _date_filter(filters: Dict, key: str) -> Optional[str]:
+    value = filters.get(key)
+    if not value:
+        return None
+    if not _DATE_FILTER.match(str(value).strip()):
+        logger.warning("Filtre mood invalide ignoré", extra={"key": key, "value": repr(value)})
+        return None
+    return str(value).strip()
+
+
+def build_mood_conditions(filters: Dict) -> list:
+    """
+    Traduit les paramètres 'discover' TMDB en prédicats SQL indexés sur la table movies.
+    Les filtres viennent d'un LLM : une valeur invalide est ignorée, jamais une erreur 500.
+    """
+    conditions = []
+
+    if filters.get("with_genres"):
+        genre_ids, match_any = _parse_genre_ids(filters["with_genres"])
+        names = _genre_names(genre_ids)
+        if names:
+            # Index GIN sur genres : @> (tous) / && (au moins un)
+            conditions.append(Movie.genres.overlap(names) if match_any else Movie.genres.contains(names))
+
+    if filters.get("without_genres"):
+        genre_ids, _ = _parse_genre_ids(filters["without_genres"])
+        names = _genre_names(genre_ids)
+        if names:
+            conditions.append(or_(Movie.genres.is_(None), ~Movie.genres.overlap(names)))
+
+    # Dates ISO 'YYYY-MM-DD' stockées en texte : l'ordre lexicographique est l'ordre chronologique
+    for key in ("primary_release_date.gte", "release_date.gte"):
+        value = _date_filter(filters, key)
+        if value:
+            conditions.append(Movie.release_date >= value)
+    for key in ("primary_release_date.lte", "release_date.lte"):
+        value = _date_filter(filters, key)
+        if value:
+            # '1989' <= '1989-06-01' en texte : on complète pour inclure toute la période
+            conditions.append(Movie.release_date <= value + "-99-99"[len(value) - 4:])
+
+    vote_average_gte = _bounded_number(filters, "vote_average.gte", float, 0.0, 10.0)
+    if vote_average_gte is not None:
+        conditions.append(Movie.vote_average >= vote_average_gte)
+    vote_average_lte = _bounded_number(filters, "vote_average.lte", float, 0.0, 10.0)
+    if vote_average_lte is not None:
+        conditions.append(Movie.vote_average <= vote_average_lte)
+    vote_count_gte = _bounded_number(filters, "vote_count.gte", int, 0, 1_000_000)
+    if vote_count_gte is not None:
+        conditions.append(Movie.vote_count >= vote_count_gte)
+
+    return conditions
+
+
+def build_mood_ordering(filters: Dict):
+    """Traduit 'sort_by' (ex: 'vote_average.desc') en ORDER BY. Défaut : popularité décroissante."""
+    field, _, direction = str(filters.get("sort_by") or "popularity.desc").partition(".")
+    column = SORT_COLUMNS.get(field, Movie.popularity)
+    return column.asc().nulls_last() if direction == "asc" else column.desc().nulls_last()
+
+
+@timed("db.mood_search")
+def _search_by_filters_sync(filters: Dict, limit: int, vector: Optional[List[float]] = None) -> List[Movie]:
+    """Version bloquante interne : filtres SQL + (optionnel) classement vectoriel."""
+    with Session(engine) as session:
+        statement = select(Movie).where(*build_mood_conditions(filters))
+        if vector is not None:
+            statement = statement.order_by(Movie.embedding.cosine_distance(vector))
+        else:
+            statement = statement.order_by(build_mood_ordering(filters))
+        return session.exec(statement.limit(limit)).all()
+
+
+async def find_movies_by_mood(
+    mood_text: str, limit: int = 10, semantic: bool = False, deadline: Optional[Deadline] = None
+) -> Tuple[Dict, List[Movie]]:
+    """
+    Mood -> filtres structurés -> UNE requête SQL locale (aucun appel TMDB).
+    Si `semantic`, les films filtrés sont classés par similarité avec le mood.
+    """
+    # Sous-budget : un LLM lent dégrade vers les règles par mots-clés au lieu d'épuiser le deadline
+    # (le thread finit en arrière-plan et met sa réponse en cache pour la prochaine fois)
+    parse_budget = deadline.timeout(cap=MOOD_PARSE_BUDGET_S) if deadline else MOOD_PARSE_BUDGET_S
+    try:
+        filters = await asyncio.wait_for(
+            asyncio.to_thread(timed("mood.parse")(get_tmdb_filters_from_mood), mood_text), timeout=parse_budget
+        )
+    except TimeoutError:
+        MOOD_PARSE_FALLBACKS.inc()
+        logger.warning("Analyse IA du mood trop lente : règles locales", extra={"budget_s": parse_budget})
+        filters = local_rule_based_analysis(mood_text)
+
+    vector = None
+    if semantic:
+        vector = await _run_blocking(deadline, get_query_embedding, mood_text)
+        # Sans embedding (clé absente, erreur Gemini) on garde le tri "sort_by" des filtres
+
+    results = await _run_blocking(deadline, _search_by_filters_sync, filters, limit, vector)
+    return filters, results
 
 # ==========================================
 # TEST UNITAIRE ASYNC
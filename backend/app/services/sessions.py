@@ -0,0 +1,54 @@
+import os
+from typing import Dict, List, Optional
+
+from app.core.cache import TTLCache
+from app.core.providers import encode_providers, intersection_mask, union_mask
+from app.models.session import GroupSession, SessionMode
+
+# --- CONFIGURATION ---
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(6 * 3600)))  # Une soirée
+SESSION_STORE_SIZE = int(os.getenv("SESSION_STORE_SIZE", "10000"))
+
+# id de session -> GroupSession
+_sessions = TTLCache(maxsize=SESSION_STORE_SIZE, ttl=SESSION_TTL)
+
+
+def group_mask(session: GroupSession) -> int:
+    """Masque du groupe : AND (intersection) ou OR (union) des bitsets des membres, O(membres)."""
+    masks = list(session.members.values())
+    return intersection_mask(masks) if session.mode == SessionMode.INTERSECTION else union_mask(masks)
+
+
+def create_session(
+    members: Dict[str, List[str]], mode: SessionMode = SessionMode.INTERSECTION, country: str = "FR"
+) -> GroupSession:
+    session = GroupSession(
+        mode=mode,
+        country=country.upper(),
+        members={name: encode_providers(providers) for name, providers in members.items()},
+    )
+    _sessions.set(session.id, session)
+    return session
+
+
+def get_session(session_id: str) -> Optional[GroupSession]:
+    return _sessions.get(session_id)
+
+
+def set_member(session: GroupSession, name: str, providers: List[str]) -> GroupSession:
+    """Ajoute un membre ou remplace ses abonnements (prolonge aussi la session)."""
+    session.members[name] = encode_providers(providers)
+    _sessions.set(session.id, session)
+    return session
+
+
+def remove_member(session: GroupSession, name: str) -> bool:
+    """Retire un membre. Retourne False s'il n'était pas dans la session."""
+    if session.members.pop(name, None) is None:
+        return False
+    _sessions.set(session.id, session)
+    return True
+
+
+def delete_session(session_id: str) -> bool:
+    return _sessions.pop(session_id, None) is not None
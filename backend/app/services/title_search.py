@@ -0,0 +1,140 @@
+import os
+import asyncio
+import logging
+from typing import List, Optional
+
+from sqlmodel import Session, select, or_, func
+from sqlalchemy import literal
+
+from app.services import tmdb
+from app.database import engine
+from app.models.movie import Movie
+from app.core.cache import TTLCache
+from app.core.deadline import Deadline
+from app.core.metrics import REGISTRY, Counter, timed
+from app.core.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+# Similarité trigramme minimale d'un titre local pour ne pas interroger TMDB
+TITLE_MIN_SIMILARITY = float(os.getenv("TITLE_MIN_SIMILARITY", "0.3"))
+TITLE_FALLBACK_CACHE_TTL = float(os.getenv("TITLE_FALLBACK_CACHE_TTL", str(24 * 3600)))
+TITLE_FALLBACK_CACHE_SIZE = int(os.getenv("TITLE_FALLBACK_CACHE_SIZE", "4096"))
+
+# Requête normalisée -> résultats TMDB (titres absents du catalogue local)
+_fallback_cache = TTLCache(maxsize=TITLE_FALLBACK_CACHE_SIZE, ttl=TITLE_FALLBACK_CACHE_TTL)
+
+TITLE_SEARCH_EVENTS = REGISTRY.register(Counter(
+    "cinephile_title_search_total",
+    "Recherches par titre servies par l'index local, le cache TMDB ou TMDB (tmdb_timeout : local seul, hors délai).",
+    labelnames=("source",),
+))
+
+
+def _folded(expression):
+    """Même expression que les index (cf. migration a9e3c5d71f28) : minuscules, sans accents."""
+    return func.lower(func.f_unaccent(expression))
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _to_title_result(movie: Movie, source: str = "local") -> dict:
+    return {
+        "tmdb_id": movie.tmdb_id,
+        "title": movie.title,
+        "release_date": movie.release_date,
+        "poster_path": movie.poster_path,
+        "source": source,
+    }
+
+
+@timed("db.title_search")
+def search_titles_sync(query: str, limit: int = 10) -> List[dict]:
+    """
+    Recherche floue sur title / original_title (index GIN pg_trgm) : fautes de frappe,
+    accents et casse tolérés. Classement par similarité puis popularité.
+    """
+    q = _folded(literal(normalize_text(query)))
+    title, original = _folded(Movie.title), _folded(Movie.original_title)
+    score = func.greatest(func.similarity(title, q), func.coalesce(func.similarity(original, q), 0))
+    pattern = "%" + _escape_like(normalize_text(query)) + "%"
+    with Session(engine) as session:
+        statement = (
+            select(Movie, score.label("score"))
+            .where(or_(title.op("%")(q), original.op("%")(q), title.like(pattern), original.like(pattern)))
+            .order_by(score.desc(), Movie.popularity.desc())
+            .limit(limit)
+        )
+        rows = session.exec(statement).all()
+    return [dict(_to_title_result(movie), score=round(float(score), 3)) for movie, score in rows]
+
+
+@timed("db.title_autocomplete")
+def autocomplete_titles_sync(prefix: str, limit: int = 8) -> List[dict]:
+    """Titres commençant par `prefix` (index B-tree text_pattern_ops), les plus populaires d'abord."""
+    pattern = _escape_like(normalize_text(prefix)) + "%"
+    with Session(engine) as session:
+        statement = (
+            select(Movie)
+            .where(_folded(Movie.title).like(pattern))
+            .order_by(Movie.popularity.desc())
+            .limit(limit)
+        )
+        return [_to_title_result(movie) for movie in session.exec(statement).all()]
+
+
+async def _tmdb_fallback(query: str, limit: int) -> List[dict]:
+    key = normalize_text(query)
+    cached = _fallback_cache.get(key)
+    if cached is not None:
+        TITLE_SEARCH_EVENTS.inc(source="tmdb_cache")
+        return cached[:limit]
+    try:
+        results = await tmdb.search_movies(query)
+    except Exception as e:
+        logger.warning("Recherche TMDB impossible", extra={"query": query, "error": str(e)})
+        return []
+    TITLE_SEARCH_EVENTS.inc(source="tmdb")
+    titles = [
+        {
+            "tmdb_id": m["id"],
+            "title": m["title"],
+            "release_date": m.get("release_date"),
+            "poster_path": m.get("poster_path"),
+            "source": "tmdb",
+        }
+        for m in results
+    ]
+    _fallback_cache.set(key, titles)
+    return titles[:limit]
+
+
+async def search_titles(query: str, limit: int = 10, deadline: Optional[Deadline] = None) -> List[dict]:
+    """
+    Mode Pragmatique : catalogue local d'abord (quelques ms, aucun appel externe),
+    TMDB seulement si aucun titre local ne ressemble assez à la requête.
+    Le secours TMDB n'attend que le temps restant après la requête locale : au-delà,
+    les résultats locaux sont renvoyés seuls (réponse dégradée, source "tmdb_timeout").
+    """
+    timeout = deadline.timeout() if deadline else None
+    local = await asyncio.wait_for(asyncio.to_thread(search_titles_sync, query, limit), timeout=timeout)
+    if local and local[0]["score"] >= TITLE_MIN_SIMILARITY:
+        TITLE_SEARCH_EVENTS.inc(source="local")
+        return local
+    try:
+        # Temps restant recalculé : la requête locale a déjà consommé une partie du budget
+        remote = await asyncio.wait_for(_tmdb_fallback(query, limit), timeout=deadline.timeout() if deadline else None)
+    except TimeoutError:
+        TITLE_SEARCH_EVENTS.inc(source="tmdb_timeout")
+        logger.warning("Secours TMDB hors délai : résultats locaux seuls", extra={"query": query})
+        return local
+    # Films locaux d'abord, puis compléments TMDB non déjà présents
+    known = {m["tmdb_id"] for m in local}
+    return (local + [m for m in remote if m["tmdb_id"] not in known])[:limit]
+
+
+async def autocomplete_titles(prefix: str, limit: int = 8) -> List[dict]:
+    return await asyncio.to_thread(autocomplete_titles_sync, prefix, limit)
@@ -1,12 +1,54 @@
 import os
 import asyncio
-from typing import List
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
 import httpx
-from dotenv import load_dotenv
 
-load_dotenv()
+from app.core.metrics import span, timed
+from app.core.ratelimit import RateLimiter
+from app.core.http_cache import AsyncCachingTransport, open_cache
+from app.core.constants import GENRE_NAMES_BY_ID
+from app.core.config import load_env
 
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+load_env()
+
+# Surchargeable pour pointer vers un bouchon local (benchmarks/fake_tmdb.py)
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+TMDB_TIMEOUT = float(os.getenv("TMDB_TIMEOUT", "10.0"))
+TMDB_MAX_PAGES = 500  # Limite dure des endpoints paginés (discover, popular...)
+DEFAULT_PREFETCH = int(os.getenv("TMDB_PREFETCH_PAGES", "4"))
+# Cache HTTP disque (dev, CI, ré-ingestions) : vide = désactivé, "1" = backend/.cache/http_cache.sqlite, sinon chemin
+TMDB_HTTP_CACHE = os.getenv("TMDB_HTTP_CACHE", "")
+# Fraîcheur appliquée quand TMDB n'envoie ni Cache-Control ni Expires (0 = revalider à chaque fois)
+TMDB_HTTP_CACHE_DEFAULT_TTL = float(os.getenv("TMDB_HTTP_CACHE_DEFAULT_TTL", "0"))
+
+# --- CLIENT HTTP PARTAGÉ ---
+# Un seul AsyncClient pour tout le process : pool de connexions keep-alive réutilisé
+# (plus de handshake TLS par appel). Ouvert au démarrage par le lifespan FastAPI.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Retourne le client HTTP partagé (créé à la demande)."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        transport = None
+        store = open_cache(TMDB_HTTP_CACHE)
+        if store is not None:
+            transport = AsyncCachingTransport(
+                store, httpx.AsyncHTTPTransport(limits=limits), default_ttl=TMDB_HTTP_CACHE_DEFAULT_TTL
+            )
+        _client = httpx.AsyncClient(timeout=TMDB_TIMEOUT, limits=limits, transport=transport)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 def _get_access_token() -> str:
@@ -20,6 +62,7 @@ def _get_access_token() -> str:
     return token
 
 
+@timed("tmdb.get_movie_providers")
 async def get_movie_providers(movie_id: int, country_code: str = "FR") -> List[str]:
     """
     Récupère la liste des providers de streaming (flatrate) pour un film donné.
@@ -44,31 +87,32 @@ async def get_movie_providers(movie_id: int, country_code: str = "FR") -> List[s
         "Accept": "application/json"
     }
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get("results", {})
-            country_data = results.get(country_code.upper(), {})
-            flatrate = country_data.get("flatrate", [])
-            
-            providers = [provider.get("provider_name") for provider in flatrate if provider.get("provider_name")]
-            return providers
-            
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                raise httpx.HTTPStatusError(
-                    f"Film avec l'ID {movie_id} non trouvé dans TMDB",
-                    request=e.request,
-                    response=e.response
-                )
-            raise
-        except httpx.RequestError as e:
-            raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
+    client = get_client()
+    try:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+        
+        data = response.json()
+        results = data.get("results", {})
+        country_data = results.get(country_code.upper(), {})
+        flatrate = country_data.get("flatrate", [])
+        
+        providers = [provider.get("provider_name") for provider in flatrate if provider.get("provider_name")]
+        return providers
+        
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise httpx.HTTPStatusError(
+                f"Film avec l'ID {movie_id} non trouvé dans TMDB",
+                request=e.request,
+                response=e.response
+            )
+        raise
+    except httpx.RequestError as e:
+        raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
 
 
+@timed("tmdb.search_movies")
 async def search_movies(query: str) -> List[dict]:
     """
     Recherche des films via l'API TMDB.
@@ -97,37 +141,98 @@ async def search_movies(query: str) -> List[dict]:
         "language": "fr-FR"
     }
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get("results", [])
-            
-            movies = [
-                {
-                    "id": movie.get("id"),
-                    "title": movie.get("title", ""),
-                    "release_date": movie.get("release_date", ""),
-                    "poster_path": movie.get("poster_path", "")
-                }
-                for movie in results
-                if movie.get("id")
-            ]
-            
-            return movies
-            
-        except httpx.HTTPStatusError as e:
-            raise httpx.HTTPStatusError(
-                f"Erreur lors de la recherche de films: {e}",
-                request=e.request,
-                response=e.response
-            ) from e
-        except httpx.RequestError as e:
-            raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
+    client = get_client()
+    try:
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        results = data.get("results", [])
+        
+        movies = [
+            {
+                "id": movie.get("id"),
+                "title": movie.get("title", ""),
+                "release_date": movie.get("release_date", ""),
+                "poster_path": movie.get("poster_path", "")
+            }
+            for movie in results
+            if movie.get("id")
+        ]
+        
+        return movies
+        
+    except httpx.HTTPStatusError as e:
+        raise httpx.HTTPStatusError(
+            f"Erreur lors de la recherche de films: {e}",
+            request=e.request,
+            response=e.response
+        ) from e
+    except httpx.RequestError as e:
+        raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
+
+
+def _to_summary(movie: dict) -> dict:
+    """Format commun des listes de films renvoyées par le service."""
+    return {
+        "id": movie.get("id"),
+        "title": movie.get("title", ""),
+        "release_date": movie.get("release_date", ""),
+        "poster_path": movie.get("poster_path", "")
+    }
 
 
+async def _get_json(path: str, params: dict, error_label: str) -> dict:
+    """GET authentifié sur l'API TMDB, erreurs enrichies d'un libellé métier."""
+    access_token = _get_access_token()
+    url = f"{TMDB_BASE_URL}{path}"
+    
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json"
+    }
+    
+    client = get_client()
+    try:
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        return response.json()
+        
+    except httpx.HTTPStatusError as e:
+        raise httpx.HTTPStatusError(
+            f"{error_label}: {e}",
+            request=e.request,
+            response=e.response
+        ) from e
+    except httpx.RequestError as e:
+        raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
+
+
+async def _fetch_popular_page(page: int) -> dict:
+    params = {
+        "page": page,
+        "language": "fr-FR"
+    }
+    return await _get_json("/movie/popular", params, "Erreur lors de la récupération des films populaires")
+
+
+async def _fetch_discover_page(provider_ids: List[int], page: int, watch_region: str,
+                               monetization_types: Optional[str]) -> dict:
+    providers_string = "|".join(str(pid) for pid in provider_ids)
+    
+    params = {
+        "language": "fr-FR",
+        "sort_by": "popularity.desc",
+        "watch_region": watch_region.upper(),
+        "with_watch_providers": providers_string,
+        "page": page
+    }
+    if monetization_types:
+        params["with_watch_monetization_types"] = monetization_types
+    return await _get_json("/discover/movie", params, "Erreur lors de la découverte de films par providers")
+
+
+@timed("tmdb.get_popular_movies")
 async def get_popular_movies(page: int = 1) -> List[dict]:
     """
     Récupère les films populaires via l'API TMDB.
@@ -143,57 +248,25 @@ async def get_popular_movies(page: int = 1) -> List[dict]:
         httpx.HTTPStatusError: Si la requête échoue
         httpx.RequestError: En cas d'erreur réseau
     """
-    access_token = _get_access_token()
-    url = f"{TMDB_BASE_URL}/movie/popular"
-    
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json"
-    }
-    
-    params = {
-        "page": page,
-        "language": "fr-FR"
-    }
-    
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get("results", [])
-            
-            movies = [
-                {
-                    "id": movie.get("id"),
-                    "title": movie.get("title", ""),
-                    "release_date": movie.get("release_date", ""),
-                    "poster_path": movie.get("poster_path", "")
-                }
-                for movie in results
-                if movie.get("id")
-            ]
-            
-            return movies
-            
-        except httpx.HTTPStatusError as e:
-            raise httpx.HTTPStatusError(
-                f"Erreur lors de la récupération des films populaires: {e}",
-                request=e.request,
-                response=e.response
-            ) from e
-        except httpx.RequestError as e:
-            raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
+    data = await _fetch_popular_page(page)
+    return [_to_summary(movie) for movie in data.get("results", []) if movie.get("id")]
 
 
-async def discover_movies_by_providers(provider_ids: List[int], page: int = 1) -> List[dict]:
+@timed("tmdb.discover_movies_by_providers")
+async def discover_movies_by_providers(
+    provider_ids: List[int],
+    page: int = 1,
+    watch_region: str = "FR",
+    monetization_types: Optional[str] = None,
+) -> List[dict]:
     """
     Découvre des films filtrés par providers via l'API TMDB (Server-Side Filtering).
     
     Args:
         provider_ids: Liste des IDs de providers (ex: [8, 119] pour Netflix et Prime)
         page: Numéro de page (défaut: 1)
+        watch_region: Code pays ISO 3166-1 de la disponibilité (défaut: "FR")
+        monetization_types: Filtre TMDB (ex: "flatrate" pour les abonnements seuls)
     
     Returns:
         Liste de dictionnaires avec les champs: id, title, release_date, poster_path
@@ -206,55 +279,223 @@ async def discover_movies_by_providers(provider_ids: List[int], page: int = 1) -
     if not provider_ids:
         raise ValueError("provider_ids ne peut pas être vide")
     
-    access_token = _get_access_token()
-    url = f"{TMDB_BASE_URL}/discover/movie"
+    data = await _fetch_discover_page(provider_ids, page, watch_region, monetization_types)
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json"
+    seen_ids = set()
+    movies = []
+    for movie in data.get("results", []):
+        movie_id = movie.get("id")
+        if movie_id and movie_id not in seen_ids:
+            seen_ids.add(movie_id)
+            movies.append(_to_summary(movie))
+    
+    return movies
+
+
+@timed("tmdb.get_region_providers")
+async def get_region_providers(watch_region: str = "FR") -> Dict[str, int]:
+    """
+    Tous les providers de streaming connus de TMDB dans une région.
+    Sans paramètre de langue : mêmes noms que /movie/{id}/watch/providers.
+
+    Returns:
+        {nom du provider: provider_id} (ex: {"Netflix": 8, "Arte": 234, ...})
+    """
+    data = await _get_json(
+        "/watch/providers/movie", {"watch_region": watch_region.upper()},
+        "Erreur lors de la récupération des providers de la région",
+    )
+    return {
+        provider["provider_name"]: provider["provider_id"]
+        for provider in data.get("results", [])
+        if provider.get("provider_name") and provider.get("provider_id")
     }
+
+
+def _flatrate_by_region(watch_providers: dict) -> Dict[str, List[str]]:
+    """Bloc 'watch/providers' TMDB -> {"FR": ["Netflix", ...], ...} (abonnements uniquement)."""
+    return {
+        region: [p.get("provider_name") for p in data.get("flatrate", []) if p.get("provider_name")]
+        for region, data in (watch_providers.get("results") or {}).items()
+    }
+
+
+@timed("tmdb.get_movie_details")
+async def get_movie_details(
+    movie_id: int,
+    include_providers: bool = True,
+    include_keywords: bool = False,
+    include_credits: bool = False,
+) -> dict:
+    """
+    Détails d'un film ET ses sous-ressources en UNE requête (append_to_response).
     
-    providers_string = "|".join(str(pid) for pid in provider_ids)
+    Args:
+        movie_id: L'ID du film dans TMDB
+        include_providers: Ajoute les providers flatrate par région (watch/providers)
+        include_keywords: Ajoute les mots-clés TMDB
+        include_credits: Ajoute le casting principal et les réalisateurs
     
-    params = {
-        "language": "fr-FR",
-        "sort_by": "popularity.desc",
-        "watch_region": "FR",
-        "with_watch_providers": providers_string,
-        "page": page
-    }
+    Returns:
+        Dictionnaire avec les champs: id, title, runtime, popularity, vote_count,
+        vote_average, genre_ids, genres,
+        et selon les options: providers ({région: [noms]}), keywords, cast, directors
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get("results", [])
-            
-            seen_ids = set()
-            movies = []
-            for movie in results:
+    Raises:
+        ValueError: Si TMDB_ACCESS_TOKEN est manquant
+        httpx.HTTPStatusError: Si la requête échoue (404, etc.)
+        httpx.RequestError: En cas d'erreur réseau
+    """
+    appended = []
+    if include_providers:
+        appended.append("watch/providers")
+    if include_keywords:
+        appended.append("keywords")
+    if include_credits:
+        appended.append("credits")
+    
+    params = {"language": "fr-FR"}
+    if appended:
+        params["append_to_response"] = ",".join(appended)
+    
+    data = await _get_json(f"/movie/{movie_id}", params, f"Erreur lors de la récupération du film {movie_id}")
+    
+    genres = data.get("genres", [])
+    details = {
+        "id": data.get("id"),
+        "title": data.get("title", ""),
+        "runtime": data.get("runtime") or None,
+        "popularity": data.get("popularity"),
+        "vote_count": data.get("vote_count"),
+        "vote_average": data.get("vote_average"),
+        "genre_ids": [g["id"] for g in genres if g.get("id")],
+        # Libellés du catalogue (cf. GENRES) pour rester cohérent avec Movie.genres
+        "genres": [GENRE_NAMES_BY_ID.get(g.get("id"), g.get("name", "")) for g in genres],
+    }
+    if include_providers:
+        details["providers"] = _flatrate_by_region(data.get("watch/providers", {}))
+    if include_keywords:
+        details["keywords"] = [k.get("name") for k in data.get("keywords", {}).get("keywords", []) if k.get("name")]
+    if include_credits:
+        credits = data.get("credits", {})
+        details["cast"] = [c.get("name") for c in credits.get("cast", [])[:10] if c.get("name")]
+        details["directors"] = [c.get("name") for c in credits.get("crew", []) if c.get("job") == "Director"]
+    return details
+
+
+# ==========================================
+# STREAMING MULTI-PAGES (async generators)
+# ==========================================
+# Usage recommandé (fermeture immédiate des préchargements si on s'arrête avant la fin) :
+#
+#     async with contextlib.aclosing(iter_discover_movies_by_providers([8])) as movies:
+#         async for movie in movies:
+#             ...
+
+async def iter_pages(
+    fetch_page: Callable[[int], Awaitable[dict]],
+    start_page: int = 1,
+    max_pages: Optional[int] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    limiter: Optional[RateLimiter] = None,
+    stage: str = "tmdb.page",
+) -> AsyncIterator[dict]:
+    """
+    Itère sur les pages brutes d'un endpoint paginé TMDB.
+    Les `prefetch` pages suivantes sont téléchargées en parallèle pendant que
+    l'appelant traite la page courante ; mémoire constante (≤ prefetch + 1 pages).
+    """
+    async def fetch(page: int) -> dict:
+        if limiter is not None:
+            await limiter.acquire()
+        with span(stage):
+            return await fetch_page(page)
+
+    first = await fetch(start_page)
+    last_page = min(first.get("total_pages") or start_page, TMDB_MAX_PAGES)
+    if max_pages is not None:
+        last_page = min(last_page, start_page + max_pages - 1)
+
+    pending: Deque[asyncio.Task] = deque()
+    next_page = start_page + 1
+
+    def schedule() -> None:
+        nonlocal next_page
+        while len(pending) < max(prefetch, 1) and next_page <= last_page:
+            pending.append(asyncio.create_task(fetch(next_page)))
+            next_page += 1
+
+    try:
+        schedule()
+        yield first
+        while pending:
+            task = pending.popleft()
+            schedule()  # Garde `prefetch` pages en vol
+            yield await task
+    finally:
+        # Arrêt anticipé (break/aclose) ou erreur : on abandonne les pages préchargées
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _iter_unique_movies(pages: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """Aplatit les pages en films, dédupliqués sur TOUTES les pages (le classement TMDB bouge entre deux pages)."""
+    seen_ids = set()
+    async with aclosing(pages):
+        async for data in pages:
+            for movie in data.get("results", []):
                 movie_id = movie.get("id")
                 if movie_id and movie_id not in seen_ids:
                     seen_ids.add(movie_id)
-                    movies.append({
-                        "id": movie_id,
-                        "title": movie.get("title", ""),
-                        "release_date": movie.get("release_date", ""),
-                        "poster_path": movie.get("poster_path", "")
-                    })
-            
-            return movies
-            
-        except httpx.HTTPStatusError as e:
-            raise httpx.HTTPStatusError(
-                f"Erreur lors de la découverte de films par providers: {e}",
-                request=e.request,
-                response=e.response
-            ) from e
-        except httpx.RequestError as e:
-            raise httpx.RequestError(f"Erreur réseau lors de l'appel à l'API TMDB: {e}") from e
+                    yield _to_summary(movie)
+
+
+def iter_discover_pages(
+    provider_ids: List[int],
+    watch_region: str = "FR",
+    monetization_types: Optional[str] = None,
+    start_page: int = 1,
+    max_pages: Optional[int] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[dict]:
+    """Pages brutes de discover (avec `page` / `total_pages`), cf. iter_pages."""
+    if not provider_ids:
+        raise ValueError("provider_ids ne peut pas être vide")
+    return iter_pages(
+        lambda page: _fetch_discover_page(provider_ids, page, watch_region, monetization_types),
+        start_page=start_page, max_pages=max_pages, prefetch=prefetch, limiter=limiter,
+        stage="tmdb.discover_page",
+    )
+
+
+def iter_discover_movies_by_providers(
+    provider_ids: List[int],
+    watch_region: str = "FR",
+    monetization_types: Optional[str] = None,
+    start_page: int = 1,
+    max_pages: Optional[int] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[dict]:
+    """Version streaming de discover_movies_by_providers : films de toutes les pages, sans doublons."""
+    return _iter_unique_movies(iter_discover_pages(
+        provider_ids, watch_region, monetization_types, start_page, max_pages, prefetch, limiter
+    ))
+
+
+def iter_popular_movies(
+    start_page: int = 1,
+    max_pages: Optional[int] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[dict]:
+    """Version streaming de get_popular_movies : films de toutes les pages, sans doublons."""
+    return _iter_unique_movies(iter_pages(
+        _fetch_popular_page, start_page=start_page, max_pages=max_pages, prefetch=prefetch,
+        limiter=limiter, stage="tmdb.popular_page",
+    ))
 
 
 if __name__ == "__main__":
@@ -263,7 +504,7 @@ if __name__ == "__main__":
             query = "Interstellar"
             movies = await search_movies(query)
             print(f"Résultats de recherche pour '{query}': {len(movies)} films trouvés")
-            
+        
             if movies:
                 first_movie = movies[0]
                 print(f"\nPremier résultat: {first_movie['title']} (ID: {first_movie['id']})")
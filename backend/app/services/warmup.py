@@ -0,0 +1,79 @@
+import os
+import asyncio
+import logging
+import time
+from typing import List
+
+from sqlmodel import Session, select
+
+from app.database import engine, warm_pool
+from app.models.movie import Movie
+from app.services import tmdb, recommendation, availability, feeds
+from app.services.embeddings import get_embedding_provider
+
+logger = logging.getLogger(__name__)
+
+# Requêtes dont l'embedding est pré-calculé au démarrage (séparées par des ';')
+WARMUP_QUERIES = [q.strip() for q in os.getenv("WARMUP_QUERIES", "").split(";") if q.strip()]
+# Nombre de films populaires dont la disponibilité est pré-chargée (0 = désactivé)
+WARMUP_AVAILABILITY_TOP = int(os.getenv("WARMUP_AVAILABILITY_TOP", "0"))
+WARMUP_COUNTRY = os.getenv("WARMUP_COUNTRY", "FR")
+# Le démarrage n'attend jamais plus que ce budget (DB injoignable, TMDB lent...)
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "20"))
+
+
+def _popular_tmdb_ids(limit: int) -> List[int]:
+    with Session(engine) as session:
+        statement = select(Movie.tmdb_id).order_by(Movie.popularity.desc()).limit(limit)
+        return list(session.exec(statement).all())
+
+
+async def _warm_step(name: str, coroutine) -> None:
+    """Chaque étape est indépendante : un échec est loggé, jamais bloquant pour le démarrage."""
+    start = time.perf_counter()
+    try:
+        await coroutine
+        logger.info("Warm-up OK", extra={"step": name, "ms": round((time.perf_counter() - start) * 1000, 1)})
+    except Exception as e:
+        logger.warning("Warm-up en échec", extra={"step": name, "error": str(e)})
+
+
+async def _warm_embeddings() -> None:
+    # Import du SDK / chargement du modèle hors du chemin de la première requête
+    await asyncio.to_thread(get_embedding_provider().warm)
+    for query in WARMUP_QUERIES:
+        await asyncio.to_thread(recommendation.get_query_embedding, query)
+
+
+async def _warm_availability() -> None:
+    # Index pré-calculé (refresher / build_availability_index) -> cache mémoire
+    await availability.load_availability_index()
+    if WARMUP_AVAILABILITY_TOP <= 0:
+        return
+    tmdb_ids = await asyncio.to_thread(_popular_tmdb_ids, WARMUP_AVAILABILITY_TOP)
+    await asyncio.gather(
+        *(availability.get_movie_availability(tmdb_id, WARMUP_COUNTRY) for tmdb_id in tmdb_ids),
+        return_exceptions=True,
+    )
+
+
+async def warm_up() -> None:
+    """Pré-ouvre le pool DB et le client TMDB, puis chauffe les caches (en parallèle)."""
+    tmdb.get_client()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _warm_step("db_pool", asyncio.to_thread(warm_pool)),
+                _warm_step("embeddings", _warm_embeddings()),
+                _warm_step("availability", _warm_availability()),
+                _warm_step("feeds", feeds.load_feeds()),
+            ),
+            timeout=WARMUP_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up interrompu (budget dépassé)", extra={"timeout_s": WARMUP_TIMEOUT})
+
+
+async def shut_down() -> None:
+    await tmdb.close_client()
+    engine.dispose()
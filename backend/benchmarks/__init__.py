@@ -0,0 +1,5 @@
+# Constantes partagées par les outils de benchmark (sans dépendance à la base)
+SYNTHETIC_ID_BASE = 900_000_000  # tmdb_id des films synthétiques : >= cette valeur
+EMBEDDING_DIM = 768
+# movies.embedding_model des films synthétiques = modèle de l'embedder bouchon de stub_app
+BENCH_EMBEDDING_MODEL = "bench/random-768"
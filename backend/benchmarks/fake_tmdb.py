@@ -0,0 +1,139 @@
+"""
+Bouchon local de l'API TMDB (endpoints utilisés par app/services/tmdb.py), pour les benchmarks.
+
+Usage (depuis backend/) :
+    FAKE_TMDB_LATENCY_MS=80 FAKE_TMDB_429_RATE=0.02 \\
+        uvicorn benchmarks.fake_tmdb:app --port 8765
+    # puis côté API : TMDB_BASE_URL=http://127.0.0.1:8765/3
+
+Réponses déterministes (dérivées de l'ID du film) couvrant le catalogue synthétique
+de seed_catalog.py. Latence (+ gigue) et réponses 429 injectées par middleware.
+"""
+import os
+import random
+import asyncio
+import hashlib
+import functools
+from typing import List, Optional, Sequence
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.core.constants import PROVIDER_MAPPING, GENRES
+from benchmarks import SYNTHETIC_ID_BASE
+
+LATENCY_MS = float(os.getenv("FAKE_TMDB_LATENCY_MS", "50"))
+JITTER_MS = float(os.getenv("FAKE_TMDB_JITTER_MS", "20"))
+RATE_LIMIT_RATE = float(os.getenv("FAKE_TMDB_429_RATE", "0.0"))  # Probabilité d'un 429 par requête
+CATALOG_SIZE = int(os.getenv("FAKE_TMDB_CATALOG_SIZE", "10000"))
+PAGE_SIZE = 20
+
+PROVIDERS = list(PROVIDER_MAPPING.items())
+GENRE_ITEMS = list(GENRES.items())
+
+app = FastAPI(title="Fake TMDB")
+
+
+@app.middleware("http")
+async def inject_latency_and_429(request: Request, call_next):
+    await asyncio.sleep(max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000)
+    if RATE_LIMIT_RATE and random.random() < RATE_LIMIT_RATE:
+        return JSONResponse(
+            {"status_code": 25, "status_message": "Your request count (#) is over the allowed limit of (40)."},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    return await call_next(request)
+
+
+def _seed(value) -> int:
+    return int.from_bytes(hashlib.sha256(str(value).encode()).digest()[:8], "big")
+
+
+def _providers_of(movie_id: int) -> List[tuple]:
+    """0 à 3 plateformes par film, stables d'un appel à l'autre."""
+    rng = random.Random(_seed(movie_id))
+    return rng.sample(PROVIDERS, rng.randint(0, 3))
+
+
+def _summary(movie_id: int) -> dict:
+    rng = random.Random(_seed(movie_id))
+    return {
+        "id": movie_id,
+        "title": f"Film synthétique {movie_id - SYNTHETIC_ID_BASE}",
+        "release_date": f"{rng.randint(1950, 2025)}-01-01",
+        "poster_path": f"/synthetic/{movie_id}.jpg",
+        "genre_ids": [genre_id for _, genre_id in rng.sample(GENRE_ITEMS, 2)],
+        "popularity": round(rng.uniform(0, 500), 3),
+        "vote_average": round(rng.uniform(3, 9), 1),
+    }
+
+
+def _watch_providers(movie_id: int) -> dict:
+    flatrate = [{"provider_id": pid, "provider_name": name} for name, pid in _providers_of(movie_id)]
+    return {"id": movie_id, "results": {"FR": {"flatrate": flatrate}} if flatrate else {}}
+
+
+def _page(ids: Sequence[int], page: int) -> dict:
+    total_pages = max(1, -(-len(ids) // PAGE_SIZE))
+    start = (page - 1) * PAGE_SIZE
+    return {
+        "page": page,
+        "results": [_summary(movie_id) for movie_id in ids[start:start + PAGE_SIZE]],
+        "total_pages": min(total_pages, 500),
+        "total_results": len(ids),
+    }
+
+
+def _catalog_ids() -> range:
+    return range(SYNTHETIC_ID_BASE + 1, SYNTHETIC_ID_BASE + CATALOG_SIZE + 1)
+
+
+@app.get("/3/movie/popular")
+def popular(page: int = 1):
+    return _page(_catalog_ids(), page)
+
+
+@app.get("/3/movie/{movie_id}/watch/providers")
+def watch_providers(movie_id: int):
+    return _watch_providers(movie_id)
+
+
+@app.get("/3/movie/{movie_id}")
+def movie_details(movie_id: int, append_to_response: Optional[str] = None):
+    rng = random.Random(_seed(movie_id))
+    summary = _summary(movie_id)
+    details = dict(summary, runtime=rng.randint(75, 180), genres=[
+        {"id": genre_id, "name": name} for name, genre_id in GENRE_ITEMS if genre_id in summary["genre_ids"]
+    ])
+    appended = (append_to_response or "").split(",")
+    if "watch/providers" in appended:
+        details["watch/providers"] = _watch_providers(movie_id)
+    if "keywords" in appended:
+        details["keywords"] = {"keywords": []}
+    if "credits" in appended:
+        details["credits"] = {"cast": [], "crew": []}
+    return details
+
+
+@app.get("/3/search/movie")
+def search(query: str, page: int = 1):
+    # Quelques résultats pseudo-aléatoires stables par requête
+    rng = random.Random(_seed(query.lower()))
+    ids = sorted(rng.sample(list(_catalog_ids()), min(40, CATALOG_SIZE)))
+    return _page(ids, page)
+
+
+@functools.lru_cache(maxsize=64)
+def _discover_ids(wanted: frozenset) -> List[int]:
+    """Films d'au moins une des plateformes demandées (calculé une fois par combinaison)."""
+    return [
+        movie_id for movie_id in _catalog_ids()
+        if not wanted or wanted & {pid for _, pid in _providers_of(movie_id)}
+    ]
+
+
+@app.get("/3/discover/movie")
+def discover(with_watch_providers: str = "", page: int = 1):
+    wanted = frozenset(int(pid) for pid in with_watch_providers.replace(",", "|").split("|") if pid.strip().isdigit())
+    return _page(_discover_ids(wanted), page)
@@ -0,0 +1,207 @@
+"""
+Scénarios de charge contre une API en cours d'exécution (idéalement benchmarks.stub_app + fake_tmdb).
+
+Usage (depuis backend/) :
+    python -m benchmarks.run_load --scenario search_cold search_hot --concurrency 16 --requests 500
+    python -m benchmarks.run_load --all --save-baseline local       # enregistre baselines/local.json
+    python -m benchmarks.run_load --all --baseline local            # compare ; code 1 si régression
+
+Rapporte par scénario : débit (RPS), latences p50/p95/p99 de bout en bout, et p50/p95/p99
+par étape à partir du header Server-Timing de chaque réponse (embedding, db.vector_search,
+availability.filter, tmdb.*...).
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+from pathlib import Path
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks import SYNTHETIC_ID_BASE
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+DEFAULT_TOLERANCE = 0.15  # Régression si p95 +15 % ou débit -15 %
+
+QUERIES = [
+    "un film de science-fiction psychologique",
+    "une comédie romantique à Paris",
+    "un thriller haletant avec une enquête",
+    "un drame familial émouvant",
+    "un film d'animation pour toute la famille",
+    "un western crépusculaire",
+    "un film de guerre des années 90 qui fait pleurer",
+    "une histoire de vengeance",
+]
+PROVIDERS = [["Netflix"], ["Netflix", "Canal+"], ["Disney Plus", "Amazon Prime Video"]]
+
+# Un scénario = fabrique de requête (index -> (méthode, chemin, corps JSON))
+Request = Tuple[str, str, Optional[dict]]
+
+
+def _search_cold(i: int) -> Request:
+    # Requête unique : cache de réponses et d'embeddings manqués à chaque fois
+    return "POST", "/search", {"query": f"{random.choice(QUERIES)} #{i}-{random.random():.6f}"}
+
+
+def _search_hot(i: int) -> Request:
+    return "POST", "/search", {"query": QUERIES[i % 3]}
+
+
+def _search_providers(i: int) -> Request:
+    return "POST", "/search", {"query": f"{random.choice(QUERIES)} #{i}", "providers": random.choice(PROVIDERS)}
+
+
+def _search_mood(i: int) -> Request:
+    return "POST", "/search/mood", {"query": random.choice(QUERIES), "limit": 20}
+
+
+def _similar(i: int) -> Request:
+    return "GET", f"/movies/{SYNTHETIC_ID_BASE + random.randint(1, 10_000)}/similar", None
+
+
+SCENARIOS: Dict[str, Callable[[int], Request]] = {
+    "search_cold": _search_cold,
+    "search_hot": _search_hot,
+    "search_providers": _search_providers,
+    "search_mood": _search_mood,
+    "similar": _similar,
+}
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'embedding;dur=182.4, total;dur=250.0' -> {"embedding": 0.1824, "total": 0.25} (secondes)."""
+    stages = {}
+    for entry in header.split(","):
+        parts = [p.strip() for p in entry.split(";")]
+        for part in parts[1:]:
+            if part.startswith("dur="):
+                stages[parts[0]] = float(part[4:]) / 1000
+    return stages
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50) * 1000, 2), "p95_ms": round(float(p95) * 1000, 2), "p99_ms": round(float(p99) * 1000, 2)}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, name: str, concurrency: int, total: int, duration: Optional[float]
+) -> dict:
+    factory = SCENARIOS[name]
+    latencies: List[float] = []
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[int, int] = defaultdict(int)
+    counter = iter(range(total))
+    start = time.perf_counter()
+
+    async def worker() -> None:
+        for i in counter:
+            if duration and time.perf_counter() - start > duration:
+                return
+            method, path, body = factory(i)
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+            except httpx.HTTPError:
+                statuses[0] += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.status_code] += 1
+            for stage, seconds in parse_server_timing(response.headers.get("server-timing", "")).items():
+                if stage != "total":
+                    stage_samples[stage].append(seconds)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    completed = sum(statuses.values())
+    return {
+        "requests": completed,
+        "errors": {str(code): n for code, n in statuses.items() if code == 0 or code >= 400},
+        "rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "stages": {stage: dict(percentiles(samples), count=len(samples)) for stage, samples in sorted(stage_samples.items())},
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Régressions de p95 ou de débit au-delà de la tolérance, par scénario commun."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if base["latency"] and current["latency"]["p95_ms"] > base["latency"]["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['latency']['p95_ms']} ms > baseline {base['latency']['p95_ms']} ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} req/s < baseline {base['rps']} req/s")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    for name, scenario in results["scenarios"].items():
+        latency = scenario["latency"]
+        print(f"\n▶ {name} : {scenario['requests']} requêtes, {scenario['rps']} req/s, erreurs {scenario['errors'] or '-'}")
+        if latency:
+            print(f"   total          p50 {latency['p50_ms']:>8} ms  p95 {latency['p95_ms']:>8} ms  p99 {latency['p99_ms']:>8} ms")
+        for stage, stats in scenario["stages"].items():
+            print(f"   {stage:<14} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms  (n={stats['count']})")
+
+
+async def main(args) -> int:
+    names = list(SCENARIOS) if args.all else args.scenario
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {
+        "meta": {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0, limits=limits) as client:
+        for name in names:
+            results["scenarios"][name] = await run_scenario(client, name, args.concurrency, args.requests, args.duration)
+    print_report(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.save_baseline:
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"\n💾 Baseline enregistrée : {path}")
+    if args.baseline:
+        baseline = json.loads((BASELINE_DIR / f"{args.baseline}.json").read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Régressions :\n   " + "\n   ".join(regressions))
+            return 1
+        print(f"\n✅ Aucune régression vs baseline '{args.baseline}' (tolérance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de charge de l'API Cinéphile Companion.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=["search_cold"])
+    parser.add_argument("--all", action="store_true", help="Exécute tous les scénarios")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clients simultanés")
+    parser.add_argument("--requests", type=int, default=500, help="Requêtes par scénario")
+    parser.add_argument("--duration", type=float, default=None, help="Durée max par scénario (s)")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    parser.add_argument("--baseline", help="Nom de la baseline à comparer (benchmarks/baselines/<nom>.json)")
+    parser.add_argument("--save-baseline", help="Enregistre les résultats comme baseline <nom>")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,112 @@
+"""
+Catalogue synthétique pour les benchmarks : N films avec embeddings 768-d aléatoires normalisés.
+
+Usage (depuis backend/, base pgvector du docker-compose démarrée et migrée) :
+    python -m benchmarks.seed_catalog --count 100000
+    python -m benchmarks.seed_catalog --reset            # supprime les films synthétiques
+
+Les films synthétiques ont des tmdb_id >= SYNTHETIC_ID_BASE et se suppriment sans toucher
+au reste. Insertion par COPY, par lots. Leur embedding_model est BENCH_EMBEDDING_MODEL (celui de
+stub_app) : l'API refuse de démarrer sur un catalogue qui mélange des modèles, donc une base
+dédiée aux benchmarks, pas un vrai catalogue vectorisé par Gemini.
+"""
+import io
+import csv
+import time
+import argparse
+
+import numpy as np
+from sqlalchemy import text
+
+from app.database import engine
+from app.core.constants import GENRES
+from benchmarks import SYNTHETIC_ID_BASE, EMBEDDING_DIM, BENCH_EMBEDDING_MODEL
+
+BATCH = 5000
+
+WORDS = (
+    "amour guerre espace enquête famille vengeance voyage rêve futur passé ville désert océan "
+    "secret trahison amitié robot fantôme musique crime héros exil frontière mémoire"
+).split()
+GENRE_NAMES = list(GENRES)
+
+COLUMNS = (
+    "tmdb_id, title, original_title, overview, release_date, poster_path, vote_average, "
+    "vote_count, popularity, runtime, genres, embedding, embedding_model, is_ready"
+)
+
+
+def random_embeddings(rng: np.random.Generator, count: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _batch_csv(rng: np.random.Generator, first_index: int, count: int) -> io.StringIO:
+    """Lot de films au format CSV de COPY (tableaux et vecteurs en littéraux Postgres)."""
+    vectors = random_embeddings(rng, count)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for offset in range(count):
+        index = first_index + offset
+        genres = rng.choice(GENRE_NAMES, size=rng.integers(1, 4), replace=False)
+        writer.writerow([
+            SYNTHETIC_ID_BASE + index,
+            f"Film synthétique {index}",
+            f"Synthetic movie {index}",
+            " ".join(rng.choice(WORDS, size=30)),
+            f"{rng.integers(1950, 2026)}-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}",
+            f"/synthetic/{SYNTHETIC_ID_BASE + index}.jpg",
+            round(float(rng.uniform(3, 9)), 1),
+            int(rng.integers(0, 30000)),
+            round(float(rng.exponential(30)), 3),
+            int(rng.integers(75, 180)),
+            "{" + ",".join(f'"{g}"' for g in genres) + "}",
+            "[" + ",".join(f"{x:.6f}" for x in vectors[offset]) + "]",
+            BENCH_EMBEDDING_MODEL,
+            "true",
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def seed(count: int, seed_value: int = 42) -> None:
+    rng = np.random.default_rng(seed_value)
+    with engine.connect() as conn:
+        start = conn.execute(
+            text("SELECT COALESCE(MAX(tmdb_id) - :base, 0) FROM movies WHERE tmdb_id > :base"),
+            {"base": SYNTHETIC_ID_BASE},
+        ).scalar()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        begin = time.perf_counter()
+        for first in range(start + 1, start + count + 1, BATCH):
+            size = min(BATCH, start + count + 1 - first)
+            cursor.copy_expert(f"COPY movies ({COLUMNS}) FROM STDIN WITH (FORMAT csv)", _batch_csv(rng, first, size))
+            raw.commit()
+            done = first + size - start - 1
+            print(f"   {done}/{count} films ({done / (time.perf_counter() - begin):.0f}/s)")
+        cursor.execute("ANALYZE movies")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def reset() -> None:
+    with engine.begin() as conn:
+        for table in ("movie_availability", "movie_neighbors", "movies"):
+            deleted = conn.execute(text(f"DELETE FROM {table} WHERE tmdb_id >= :base"), {"base": SYNTHETIC_ID_BASE})
+            print(f"   {table}: {deleted.rowcount} lignes supprimées")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peuple la base avec un catalogue synthétique.")
+    parser.add_argument("--count", type=int, default=10_000, help="Nombre de films à ajouter (10k à 1M)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (catalogues reproductibles)")
+    parser.add_argument("--reset", action="store_true", help="Supprime les films synthétiques")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset()
+    else:
+        seed(args.count, args.seed)
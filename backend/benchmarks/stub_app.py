@@ -0,0 +1,46 @@
+"""
+API réelle avec un embedder bouchon (aucun appel Gemini), pour les benchmarks.
+
+Usage (depuis backend/) :
+    TMDB_BASE_URL=http://127.0.0.1:8765/3 TMDB_ACCESS_TOKEN=bench \\
+        uvicorn benchmarks.stub_app:app --port 8000 --workers 1
+
+L'embedder renvoie un vecteur normalisé déterministe par requête (même requête = même
+vecteur), après une latence simulée BENCH_EMBED_LATENCY_MS. Son model_name est celui que
+seed_catalog écrit dans movies.embedding_model : la vérification du démarrage passe.
+"""
+import os
+import time
+import hashlib
+
+import numpy as np
+
+from benchmarks import EMBEDDING_DIM, BENCH_EMBEDDING_MODEL
+
+EMBED_LATENCY_MS = float(os.getenv("BENCH_EMBED_LATENCY_MS", "120"))
+
+# Avant tout import de l'application : get_embedding_provider() lit EMBEDDING_PROVIDER à l'import
+os.environ["EMBEDDING_PROVIDER"] = "bench"
+
+from app.services import embeddings  # noqa: E402
+
+
+class StubEmbeddingProvider(embeddings.EmbeddingProvider):
+    model_name = BENCH_EMBEDDING_MODEL
+
+    def _embed_one(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_query(self, text: str):
+        time.sleep(EMBED_LATENCY_MS / 1000)
+        return self._embed_one(text)
+
+    def embed_documents(self, texts):
+        return [self._embed_one(text) for text in texts]
+
+
+embeddings.PROVIDERS["bench"] = StubEmbeddingProvider
+
+from app.main import app  # noqa: E402  (après l'enregistrement de l'embedder)
@@ -0,0 +1,23 @@
+import argparse
+
+from app.core.logs import setup_logging
+from app.services.availability import AVAILABILITY_REGIONS
+from app.services.feeds import build_provider_feeds_sync, FEED_SIZE
+
+# --- FILS D'ACCUEIL PAR PLATEFORME (hors API) ---
+# Classe les films disponibles sur chaque plateforme x région (popularité pondérée par le
+# nombre de votes) et les stocke dans provider_feeds. L'API fusionne ces listes en mémoire :
+# la page d'accueil n'appelle jamais TMDB. À lancer après le refresher de disponibilités.
+#
+#   python build_home_feeds.py                   # régions de AVAILABILITY_REGIONS
+#   python build_home_feeds.py --regions FR BE --size 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcule les fils d'accueil par plateforme et région.")
+    parser.add_argument("--regions", nargs="+", default=AVAILABILITY_REGIONS, help="Codes pays (ex : FR BE)")
+    parser.add_argument("--size", type=int, default=FEED_SIZE, help="Films conservés par fil")
+    args = parser.parse_args()
+
+    setup_logging()
+    build_provider_feeds_sync(regions=[region.upper() for region in args.regions], size=args.size)
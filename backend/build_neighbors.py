@@ -0,0 +1,22 @@
+import argparse
+
+from app.core.logs import setup_logging
+from app.services.neighbors import build_neighbor_graph_sync, NEIGHBORS_K, NEIGHBORS_BLOCK_SIZE
+
+# --- GRAPHE "FILMS SIMILAIRES" (hors API) ---
+# Calcule les k plus proches voisins de chaque film par blocs de la matrice d'embeddings
+# et les stocke dans movie_neighbors. À lancer après chaque ingestion.
+#
+#   python build_neighbors.py           # incrémental : nouveaux films + listes impactées
+#   python build_neighbors.py --full    # recalcule tout le graphe
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construit le graphe k-NN des films similaires.")
+    parser.add_argument("--k", type=int, default=NEIGHBORS_K, help="Voisins conservés par film")
+    parser.add_argument("--block-size", type=int, default=NEIGHBORS_BLOCK_SIZE, help="Lignes par produit matriciel")
+    parser.add_argument("--full", action="store_true", help="Recalcule tout au lieu de l'incrémental")
+    args = parser.parse_args()
+
+    setup_logging()
+    build_neighbor_graph_sync(k=args.k, block_size=args.block_size, full=args.full)
@@ -0,0 +1,81 @@
+"""
+Garde-fou cold start : mesure le temps d'import de l'API (`python -X importtime`).
+
+Usage (depuis backend/) :
+    python check_import_time.py                 # budget par défaut
+    python check_import_time.py --budget-ms 800 --report 15
+
+Échoue (code 1) si le budget est dépassé ou si un SDK lourd est importé
+au chargement de app.main au lieu d'être importé à la demande.
+"""
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+TARGET_MODULE = "app.main"
+DEFAULT_BUDGET_MS = 1500
+RUNS = 3
+
+# Ces SDK ne doivent être importés qu'au premier appel (ou pendant le warm-up du lifespan)
+FORBIDDEN_AT_IMPORT = ("google.generativeai", "huggingface_hub")
+
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure_once() -> dict:
+    """Retourne {module: (self_us, cumulative_us, profondeur)} pour un import à froid."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {TARGET_MODULE}"],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        print(completed.stderr)
+        raise SystemExit(f"❌ Import de {TARGET_MODULE} impossible")
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--report", type=int, default=10, help="Nombre de modules les plus coûteux à afficher")
+    args = parser.parse_args()
+
+    # Meilleur des N runs : on mesure le code, pas le bruit de la machine
+    best = min((measure_once() for _ in range(RUNS)), key=lambda m: m[TARGET_MODULE][1])
+    total_ms = best[TARGET_MODULE][1] / 1000
+
+    print(f"⏱️  import {TARGET_MODULE} : {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    top_level = [(name, cum) for name, (_, cum, depth) in best.items() if depth == 1]
+    for name, cumulative_us in sorted(top_level, key=lambda x: -x[1])[:args.report]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"budget dépassé de {total_ms - args.budget_ms:.0f} ms")
+    eager = [
+        forbidden for forbidden in FORBIDDEN_AT_IMPORT
+        if any(name == forbidden or name.startswith(forbidden + ".") for name in best)
+    ]
+    if eager:
+        failures.append(f"SDK importés au démarrage : {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
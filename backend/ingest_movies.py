@@ -1,11 +1,20 @@
 import os
+import sys
 import time
-import requests
-import google.generativeai as genai
-from sqlmodel import Session, select
+import asyncio
+from contextlib import aclosing
+import httpx
+from sqlmodel import Session, select, or_
 from dotenv import load_dotenv
 from app.database import engine
 from app.models.movie import Movie
+from app.core.constants import GENRES, GENRE_NAMES_BY_ID
+from app.core.http_cache import AsyncCachingTransport, open_cache
+from app.services.embeddings import (
+    get_embedding_provider, check_catalog_model, GeminiEmbeddingProvider, EmbeddingModelMismatch,
+)
+from app.services.neighbors import build_neighbor_graph_sync
+from app.services.tmdb import iter_pages
 from pathlib import Path
 
 # --- CONFIGURATION & ENVIRONNEMENT ---
@@ -16,38 +25,23 @@ load_dotenv(dotenv_path=env_path)
 GENAI_KEY = os.getenv("GOOGLE_API_KEY")
 TMDB_KEY = os.getenv("TMDB_API_KEY")
 
-if not GENAI_KEY or not TMDB_KEY:
+# Fournisseur d'embeddings : EMBEDDING_PROVIDER (gemini par défaut, hashing/local sans réseau)
+embedder = get_embedding_provider()
+
+if not TMDB_KEY or (isinstance(embedder, GeminiEmbeddingProvider) and not GENAI_KEY):
     raise ValueError("❌ CRITIQUE : Clés API manquantes dans le .env")
 
-genai.configure(api_key=GENAI_KEY)
+# Cache HTTP disque (TMDB_HTTP_CACHE=1) : une ré-ingestion ne paie que des 304, voire rien.
+# La clé api_key est retirée des clés du cache.
+_http_cache = open_cache(os.getenv("TMDB_HTTP_CACHE", ""))
+DISCOVER_URL = "https://api.themoviedb.org/3/discover/movie"
 
 # --- PARAMÈTRES DE CURATION ---
 SLEEP_TIME = 0.1       # Vitesse d'ingestion (ajuster si erreur 429)
 MOVIES_PER_SLOT = 20   # Films par créneau (Genre x Époque)
 WORLD_CINEMA_PAGES = 5 # Nombre de pages de films internationaux à récupérer (20 films/page)
 
-# 1. Matrice des Genres (COMPLÈTE - 19 Genres)
-GENRES = {
-    "Action": 28,
-    "Aventure": 12,
-    "Animation": 16,
-    "Comédie": 35,
-    "Crime": 80,
-    "Documentaire": 99,
-    "Drame": 18,
-    "Famille": 10751,
-    "Fantastique": 14,
-    "Histoire": 36,
-    "Horreur": 27,
-    "Musique": 10402,
-    "Mystère": 9648,
-    "Romance": 10749,
-    "Science Fiction": 878,
-    "Téléfilm": 10770,
-    "Thriller": 53,
-    "Guerre": 10752,
-    "Western": 37
-}
+# 1. Matrice des Genres : voir app.core.constants.GENRES (19 genres)
 
 # 2. Matrice Temporelle (De l'âge d'or à aujourd'hui)
 ERAS = [
@@ -61,21 +55,14 @@ ERAS = [
     ("2020-01-01", "2025-12-31"), 
 ]
 
-def get_embedding(text: str):
-    """Récupère l'embedding avec gestion d'erreur basique."""
-    try:
-        return genai.embed_content(
-            model="models/text-embedding-004",
-            content=text,
-            task_type="retrieval_document"
-        )['embedding']
-    except Exception as e:
-        print(f"   ⚠️ Erreur Embedding: {e}")
-        return None
+def semantic_text(title, overview, release_date):
+    """Texte vectorisé : on inclut l'année et le titre dans le texte pour le RAG."""
+    year = release_date[:4] if release_date else 'Inconnue'
+    return f"Film de {year}. Titre: {title}. Synopsis: {overview}"
 
 def process_and_save_movies(session, movies_list, source_tag="General"):
     """Fonction helper pour traiter une liste de films TMDB."""
-    count = 0
+    candidates = []
     for m_data in movies_list:
         # A. Check doublon (Optimisation : Check DB avant tout traitement)
         if session.exec(select(Movie).where(Movie.tmdb_id == m_data['id'])).first():
@@ -84,14 +71,15 @@ def process_and_save_movies(session, movies_list, source_tag="General"):
         # B. Filtre Qualité Données
         if not m_data.get('overview'): 
             continue
+        candidates.append(m_data)
 
-        # C. Construction du texte sémantique enrichi
-        year = m_data.get('release_date', 'Inconnue')[:4]
-        # On inclut l'année et le titre dans le texte pour le RAG
-        text_to_embed = f"Film de {year}. Titre: {m_data['title']}. Synopsis: {m_data['overview']}"
-        
-        vector = get_embedding(text_to_embed)
-        
+    # C. Construction du texte sémantique enrichi, vectorisé en un seul lot
+    vectors = embedder.embed_documents([
+        semantic_text(m['title'], m['overview'], m.get('release_date')) for m in candidates
+    ])
+
+    count = 0
+    for m_data, vector in zip(candidates, vectors):
         if vector:
             movie = Movie(
                 tmdb_id=m_data['id'],
@@ -101,77 +89,183 @@ def process_and_save_movies(session, movies_list, source_tag="General"):
                 poster_path=m_data.get('poster_path'),
                 vote_average=m_data.get('vote_average'),
                 vote_count=m_data.get('vote_count'),
+                # genre_ids et popularity sont déjà dans la réponse discover : aucun appel en plus
+                genres=[GENRE_NAMES_BY_ID[g] for g in m_data.get('genre_ids', []) if g in GENRE_NAMES_BY_ID],
+                popularity=m_data.get('popularity') or 0.0,
                 embedding=vector,
+                embedding_model=embedder.model_name,
                 is_ready=True
             )
             session.add(movie)
             count += 1
-            print(f"   ✅ [{source_tag}] {year} - {m_data['title']}")
-            time.sleep(SLEEP_TIME)
+            print(f"   ✅ [{source_tag}] {(m_data.get('release_date') or '????')[:4]} - {m_data['title']}")
+    if candidates and isinstance(embedder, GeminiEmbeddingProvider):
+        time.sleep(SLEEP_TIME)  # Quota de l'API Gemini
     
     # Commit par batch pour éviter de perdre trop de données si crash
     session.commit()
     return count
 
+def reembed_catalog(batch_size=200):
+    """
+    Re-vectorise les films dont le vecteur ne vient pas du modèle configuré
+    (changement d'EMBEDDING_PROVIDER) : le catalogue redevient homogène.
+    Le graphe movie_neighbors est ensuite recalculé en entier : ses scores et ses listes
+    viennent de l'ancien espace d'embedding, y compris pour les films non re-vectorisés.
+    """
+    total = 0
+    with Session(engine) as session:
+        while True:
+            movies = session.exec(
+                select(Movie)
+                .where(or_(Movie.embedding_model.is_(None), Movie.embedding_model != embedder.model_name))
+                .where(Movie.overview.is_not(None))
+                .limit(batch_size)
+            ).all()
+            if not movies:
+                break
+            vectors = embedder.embed_documents([semantic_text(m.title, m.overview, m.release_date) for m in movies])
+            done = 0
+            for movie, vector in zip(movies, vectors):
+                if vector:
+                    movie.embedding = vector
+                    movie.embedding_model = embedder.model_name
+                    session.add(movie)
+                    done += 1
+            session.commit()
+            if not done:
+                print("❌ Aucun vecteur produit pour ce lot : arrêt.")
+                break
+            total += done
+            print(f"   🔁 {total} films re-vectorisés ({embedder.model_name})")
+    if total:
+        print("🕸️ Recalcul du graphe des films similaires...")
+        rows = build_neighbor_graph_sync(full=True)
+        print(f"   {rows} listes de voisins réécrites")
+    return total
+
+def http_client():
+    return httpx.AsyncClient(
+        timeout=10.0,
+        transport=AsyncCachingTransport(_http_cache) if _http_cache else None,
+    )
+
+async def fetch_discover(client, params, label):
+    """Une page discover ; une erreur est affichée et donne une page vide (l'ingestion continue)."""
+    try:
+        res = await client.get(DISCOVER_URL, params={"api_key": TMDB_KEY, "language": "fr-FR", **params})
+        if res.status_code == 200:
+            return res.json()
+        print(f"❌ Erreur API TMDB ({label}): {res.status_code}")
+    except Exception as e:
+        print(f"❌ Exception réseau ({label}): {e}")
+    return {"results": []}
+
+def genre_era_slots():
+    return [(genre_name, genre_id, start_date, end_date)
+            for genre_name, genre_id in GENRES.items() for start_date, end_date in ERAS]
+
+async def ingest_genre_eras(client, session):
+    """
+    Phase 1 : une page par créneau (Genre x Époque). Les créneaux passent par iter_pages
+    (créneau n = "page" n) : les suivants se téléchargent pendant la vectorisation du courant.
+    """
+    slots = genre_era_slots()
+
+    async def fetch_slot(index):
+        genre_name, genre_id, start_date, end_date = slots[index - 1]
+        data = await fetch_discover(client, {
+            "sort_by": "popularity.desc",
+            "with_genres": genre_id,
+            "primary_release_date.gte": start_date,
+            "primary_release_date.lte": end_date,
+            "vote_count.gte": 200,     # Filtre popularité min
+            "vote_average.gte": 6.0,   # Filtre qualité min
+            "page": 1,
+        }, f"{genre_name} {start_date[:4]}")
+        return dict(data, slot=index, total_pages=len(slots))
+
+    total = 0
+    async with aclosing(iter_pages(fetch_slot, stage="ingest.discover_slot")) as pages:
+        async for data in pages:
+            genre_name, _, start_date, _ = slots[data["slot"] - 1]
+            print(f"\n📅 Phase 1 : {genre_name} ({start_date[:4]}s)")
+            movies = data.get("results", [])[:MOVIES_PER_SLOT]
+            # Vectorisation + écriture DB bloquantes : hors de la boucle, les préchargements avancent
+            total += await asyncio.to_thread(process_and_save_movies, session, movies, f"{genre_name} {start_date[:4]}")
+    return total
+
+async def ingest_world_cinema(client, session):
+    """Phase 2 : World Cinema (les pépites non-anglophones), pages préchargées par iter_pages."""
+    print("\n🌍 Phase 2 : World Cinema (Les pépites non-anglophones)")
+
+    async def fetch_page(page):
+        # Stratégie : On exclut l'anglais ('en') et on demande une note très élevée (>= 7.5)
+        # Cela fait remonter Parasite, Spirited Away, Intouchables, City of God, etc.
+        data = await fetch_discover(client, {
+            "sort_by": "vote_count.desc",   # Les plus connus d'abord (pour avoir les classiques)
+            "without_original_language": "en",  # PAS d'anglais
+            "vote_average.gte": 7.5,        # Crème de la crème
+            "vote_count.gte": 500,          # Films validés par la critique mondiale
+            "page": page,
+        }, "World")
+        # Page en erreur : on garde le nombre de pages prévu pour continuer sur les suivantes
+        return dict(data, page=page, total_pages=data.get("total_pages") or WORLD_CINEMA_PAGES)
+
+    total = 0
+    pages = iter_pages(fetch_page, max_pages=WORLD_CINEMA_PAGES, stage="ingest.discover_page")
+    async with aclosing(pages):
+        async for data in pages:
+            print(f"   extracting page {data['page']}...")
+            total += await asyncio.to_thread(process_and_save_movies, session, data.get("results", []), "World")
+    return total
+
+async def ingest_all(session):
+    async with http_client() as client:
+        return await ingest_genre_eras(client, session) + await ingest_world_cinema(client, session)
+
 def fetch_and_vectorize():
     print("🚀 Démarrage de l'Ingestion 'Cinéphile Pro'...")
-    
-    with Session(engine) as session:
-        total_ingested = 0
-        
-        # --- PHASE 1 : MATRICE GENRE X TEMPS ---
-        for genre_name, genre_id in GENRES.items():
-            for start_date, end_date in ERAS:
-                era_label = start_date[:4]
-                print(f"\n📅 Phase 1 : {genre_name} ({era_label}s)")
-                
-                url = (f"https://api.themoviedb.org/3/discover/movie?api_key={TMDB_KEY}"
-                       f"&language=fr-FR&sort_by=popularity.desc"
-                       f"&with_genres={genre_id}"
-                       f"&primary_release_date.gte={start_date}"
-                       f"&primary_release_date.lte={end_date}"
-                       f"&vote_count.gte=200"     # Filtre popularité min
-                       f"&vote_average.gte=6.0"   # Filtre qualité min
-                       f"&page=1")
-                
-                try:
-                    res = requests.get(url)
-                    if res.status_code == 200:
-                        movies = res.json().get('results', [])[:MOVIES_PER_SLOT]
-                        total_ingested += process_and_save_movies(session, movies, source_tag=f"{genre_name} {era_label}")
-                    else:
-                        print(f"❌ Erreur API TMDB: {res.status_code}")
-                except Exception as e:
-                    print(f"❌ Exception réseau: {e}")
-
-        # --- PHASE 2 : WORLD CINEMA (INTERNATIONAL GEMS) ---
-        print("\n🌍 Phase 2 : World Cinema (Les pépites non-anglophones)")
-        for page in range(1, WORLD_CINEMA_PAGES + 1):
-            print(f"   extracting page {page}...")
-            # Stratégie : On exclut l'anglais ('en') et on demande une note très élevée (>= 7.5)
-            # Cela fait remonter Parasite, Spirited Away, Intouchables, City of God, etc.
-            url = (f"https://api.themoviedb.org/3/discover/movie?api_key={TMDB_KEY}"
-                   f"&language=fr-FR&sort_by=vote_count.desc" # Les plus connus d'abord (pour avoir les classiques)
-                   f"&without_original_language=en"            # PAS d'anglais
-                   f"&vote_average.gte=7.5"                    # Crème de la crème
-                   f"&vote_count.gte=500"                      # Films validés par la critique mondiale
-                   f"&page={page}")
-            
-            try:
-                res = requests.get(url)
-                if res.status_code == 200:
-                    movies = res.json().get('results', [])
-                    total_ingested += process_and_save_movies(session, movies, source_tag="World")
-                else:
-                    print(f"❌ Erreur API TMDB (World): {res.status_code}")
-            except Exception as e:
-                print(f"❌ Exception réseau (World): {e}")
+    # Un nouveau modèle n'entre que par --reembed (vecteurs + graphe de voisins) : jamais de mélange d'espaces
+    check_catalog_model(embedder)
 
+    with Session(engine) as session:
+        total_ingested = asyncio.run(ingest_all(session))
         print(f"\n🏁 Terminé ! {total_ingested} nouveaux films ajoutés à la collection.")
 
+def enrich_ingested_movies():
+    """
+    Phase 3 (optionnelle) : runtime + genres + disponibilités en UN appel TMDB par film
+    (append_to_response), pour les films auxquels il manque ces informations.
+    """
+    if not os.getenv("TMDB_ACCESS_TOKEN"):
+        print("⚠️ TMDB_ACCESS_TOKEN absent : enrichissement ignoré.")
+        return
+    from app.services import tmdb
+    from app.services.enrichment import enrich_catalog
+
+    async def run():
+        try:
+            return await enrich_catalog(only_missing=True)
+        finally:
+            await tmdb.close_client()
+
+    print("\n🧩 Phase 3 : Enrichissement (détails + plateformes)")
+    enriched = asyncio.run(run())
+    print(f"🏁 {enriched} films enrichis.")
+
 if __name__ == "__main__":
     # Petit check de sécurité
     if not os.path.exists("cinephile.db") and not os.getenv("DATABASE_URL"):
         print("⚠️ Attention : cinephile.db introuvable. Une nouvelle DB sera créée.")
     
-    fetch_and_vectorize()
\ No newline at end of file
+    if "--reembed" in sys.argv:
+        reembed_catalog()
+    else:
+        try:
+            fetch_and_vectorize()
+        except EmbeddingModelMismatch as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    if "--enrich" in sys.argv:
+        enrich_ingested_movies()
\ No newline at end of file
@@ -0,0 +1,21 @@
+import argparse
+
+from app.core.logs import setup_logging
+from app.services.progress import rebuild_progress_sync
+
+# --- RECALCUL DE LA PROGRESSION DES DÉFIS (hors API) ---
+# Rejoue tout le journal watch_events contre les définitions actives et réécrit user_progress.
+# À lancer après une modification des règles faite directement en base (PUT /challenges/{id}
+# recalcule déjà le défi concerné).
+#
+#   python rebuild_progress.py                       # tous les défis
+#   python rebuild_progress.py --challenges horror-80s western
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcule user_progress depuis watch_events.")
+    parser.add_argument("--challenges", nargs="+", default=None, help="Identifiants des défis (défaut : tous)")
+    args = parser.parse_args()
+
+    setup_logging()
+    rebuild_progress_sync(args.challenges)
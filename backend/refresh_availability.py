@@ -0,0 +1,39 @@
+import asyncio
+import argparse
+
+from app.core.logs import setup_logging
+from app.services import tmdb
+from app.services.availability import (
+    run_refresher, build_availability_index, AVAILABILITY_REGIONS, AVAILABILITY_REFRESH_RPM,
+)
+
+# --- RAFRAÎCHISSEMENT DES DISPONIBILITÉS (hors API) ---
+# Parcourt la table movies et met à jour movie_availability par ordre de priorité
+# (titres demandés récemment, puis populaires, la longue traîne rarement),
+# dans la limite d'un budget d'appels TMDB par minute.
+#
+#   python refresh_availability.py              # tourne en continu (worker)
+#   python refresh_availability.py --once       # vide la file des films dus puis s'arrête (cron)
+#   python refresh_availability.py --bulk --once
+#       # reconstruit d'abord tout l'index via discover (quelques appels paginés par provider)
+
+
+async def main(args) -> None:
+    try:
+        if args.bulk:
+            await build_availability_index(regions=args.regions, rate_per_minute=args.rpm)
+        await run_refresher(regions=args.regions, rate_per_minute=args.rpm, once=args.once)
+    finally:
+        await tmdb.close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rafraîchit les disponibilités (providers) du catalogue.")
+    parser.add_argument("--regions", nargs="+", default=AVAILABILITY_REGIONS, help="Codes pays (ex: FR BE)")
+    parser.add_argument("--rpm", type=float, default=AVAILABILITY_REFRESH_RPM, help="Budget d'appels TMDB par minute")
+    parser.add_argument("--bulk", action="store_true", help="Construit l'index provider -> films via discover")
+    parser.add_argument("--once", action="store_true", help="S'arrête quand plus aucun film n'est dû")
+    args = parser.parse_args()
+
+    setup_logging()
+    asyncio.run(main(args))
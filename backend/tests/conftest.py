@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# Les tests importent `app.*` depuis backend/, sans warm-up ni vérification du catalogue au démarrage
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("WARMUP_ENABLED", "0")
+os.environ.setdefault("EMBEDDING_MODEL_CHECK", "0")
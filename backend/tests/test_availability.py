@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from app.services import availability
+
+
+@pytest.fixture(autouse=True)
+def empty_requested(monkeypatch):
+    monkeypatch.setattr(availability, "_requested", {})
+
+
+def test_flush_swaps_pending_requests(monkeypatch):
+    flushed = []
+    monkeypatch.setattr(availability, "_flush_requested_sync", lambda pending: flushed.append(pending) or len(pending))
+
+    availability.note_requested([1, 2], "fr")
+    assert asyncio.run(availability.flush_requested()) == 2
+    assert set(flushed[0]) == {(1, "FR"), (2, "FR")}
+    assert availability._requested == {}
+
+
+def test_failed_flush_keeps_requests_bounded(monkeypatch):
+    def fail(pending):
+        raise RuntimeError("DB injoignable")
+
+    monkeypatch.setattr(availability, "_flush_requested_sync", fail)
+    monkeypatch.setattr(availability, "REQUESTED_MAX_PENDING", 3)
+    availability.note_requested(range(10), "FR")
+    with pytest.raises(RuntimeError):
+        asyncio.run(availability.flush_requested())
+    assert len(availability._requested) == 3
+
+
+def test_flusher_runs_without_refresher_and_flushes_on_stop(monkeypatch):
+    flushed = []
+    monkeypatch.setattr(availability, "_flush_requested_sync", lambda pending: flushed.append(dict(pending)) or len(pending))
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.create_task(availability.run_requested_flusher(stop, interval=0.01))
+        availability.note_requested([7], "FR")
+        await asyncio.sleep(0.05)
+        availability.note_requested([8], "FR")
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+    assert {key for batch in flushed for key in batch} == {(7, "FR"), (8, "FR")}
+
+
+def test_index_stores_every_flatrate_provider_with_tiered_refresh(monkeypatch):
+    now = availability.utcnow()
+    catalog = {1: (80.0, None), 2: (1.0, None), 3: (1.0, now)}
+    postings = {8: {1, 2, 99}, 234: {2}}
+    saved = []
+
+    async def region_providers(region):
+        return {"Netflix": 8, "Arte": 234}
+
+    async def posting_list(provider_id, region, limiter, max_pages):
+        return postings[provider_id], True
+
+    monkeypatch.setattr(availability.tmdb, "get_region_providers", region_providers)
+    monkeypatch.setattr(availability, "_provider_posting_list", posting_list)
+    monkeypatch.setattr(availability, "_catalog_sync", lambda region: catalog)
+    monkeypatch.setattr(availability, "save_availability_sync", saved.extend)
+    monkeypatch.setattr(availability, "_availability_cache", availability.TTLCache(maxsize=10, ttl=60))
+
+    assert asyncio.run(availability.build_availability_index(["FR"], rate_per_minute=6000)) == {"FR": 3}
+    rows = {row["tmdb_id"]: row for row in saved}
+    assert rows[1]["providers"] == ["Netflix"]
+    assert rows[2]["providers"] == ["Arte", "Netflix"]
+    assert rows[3]["providers"] == []
+
+    def days(tmdb_id):
+        return (rows[tmdb_id]["next_refresh_at"] - rows[tmdb_id]["fetched_at"]).total_seconds() / 86400
+
+    popular = availability.REFRESH_INTERVAL_POPULAR.days
+    long_tail = availability.REFRESH_INTERVAL_LONG_TAIL.days
+    assert 0.9 * popular <= days(1) <= 1.1 * popular
+    assert 0.9 * long_tail <= days(2) <= 1.1 * long_tail
+    assert days(3) < 1
+
+
+def test_index_load_shares_cache_across_regions(monkeypatch):
+    now = availability.utcnow()
+    limits = {}
+
+    def load(region, limit):
+        limits[region] = limit
+        return [(tmdb_id, ["Netflix"], now) for tmdb_id in range(limit)]
+
+    monkeypatch.setattr(availability, "_load_index_sync", load)
+    monkeypatch.setattr(availability, "AVAILABILITY_CACHE_SIZE", 10)
+    cache = availability.TTLCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(availability, "_availability_cache", cache)
+
+    assert asyncio.run(availability.load_availability_index(["FR", "BE"])) == 10
+    assert limits == {"FR": 5, "BE": 5}
+    assert cache.get((0, "FR")) is not None and cache.get((0, "BE")) is not None
+
+
+def test_flusher_flushes_even_if_stopped_before_starting(monkeypatch):
+    flushed = []
+    monkeypatch.setattr(availability, "_flush_requested_sync", lambda pending: flushed.append(dict(pending)) or len(pending))
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.create_task(availability.run_requested_flusher(stop, interval=3600))
+        availability.note_requested([7], "FR")
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+    assert flushed and (7, "FR") in flushed[-1]
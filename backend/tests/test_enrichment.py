@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services import enrichment
+
+
+def test_enrich_catalog_terminates_on_unfixable_movies(monkeypatch):
+    """runtime 0, genres vides, 404 : le film reste "à enrichir" mais n'est demandé qu'une fois par passage."""
+    catalog = [(tmdb_id, float(1000 - tmdb_id)) for tmdb_id in range(1, 451)]
+    requested = []
+
+    def movies_to_enrich(limit, only_missing, after=None):
+        rows = sorted(catalog, key=lambda row: (-row[1], row[0]))
+        if after is not None:
+            rows = [row for row in rows if (-row[1], row[0]) > (-after[0], after[1])]
+        return rows[:limit]
+
+    async def enrich_movies(tmdb_ids, concurrency):
+        requested.extend(tmdb_ids)
+        # Un film sur deux "réussit" sans jamais rien compléter en base
+        return {i: {"genres": [], "runtime": None, "providers": {}} for i in tmdb_ids if i % 2}
+
+    monkeypatch.setattr(enrichment, "_movies_to_enrich_sync", movies_to_enrich)
+    monkeypatch.setattr(enrichment, "enrich_movies", enrich_movies)
+    monkeypatch.setattr(enrichment, "_save_details_sync", lambda details: None)
+    stored = []
+
+    async def store_providers(found):
+        stored.extend(found)
+        return len(stored)
+
+    monkeypatch.setattr(enrichment, "store_providers", store_providers)
+
+    enriched = asyncio.run(enrichment.enrich_catalog(only_missing=True, regions=["FR"]))
+
+    assert sorted(requested) == [tmdb_id for tmdb_id, _ in catalog]
+    assert enriched == 225
+    assert len(stored) == 225
+
+
+def test_enrichment_refresh_tier_uses_fresh_popularity(monkeypatch):
+    """Le catalogue croit le film confidentiel ; TMDB le dit populaire : échéance "populaire", popularité sauvée."""
+    from app.services import availability
+
+    saved_details, saved_rows = [], []
+
+    def movies_to_enrich(limit, only_missing, after=None):
+        return [] if after else [(7, 1.0)]
+
+    async def enrich_movies(tmdb_ids, concurrency):
+        return {7: {"genres": ["Drame"], "runtime": 120, "popularity": 90.0, "vote_count": 4200,
+                    "providers": {"FR": ["Netflix"]}}}
+
+    monkeypatch.setattr(enrichment, "_movies_to_enrich_sync", movies_to_enrich)
+    monkeypatch.setattr(enrichment, "enrich_movies", enrich_movies)
+    monkeypatch.setattr(enrichment, "_save_details_sync", saved_details.append)
+    monkeypatch.setattr(availability, "save_availability_sync", saved_rows.extend)
+    monkeypatch.setattr(availability, "_availability_cache", availability.TTLCache(maxsize=10, ttl=60))
+
+    assert asyncio.run(enrichment.enrich_catalog(regions=["FR"])) == 1
+    assert saved_details[0][7]["popularity"] == 90.0 and saved_details[0][7]["vote_count"] == 4200
+    row = saved_rows[0]
+    days = (row["next_refresh_at"] - row["fetched_at"]).total_seconds() / 86400
+    assert row["providers"] == ["Netflix"]
+    assert days <= 1.1 * availability.REFRESH_INTERVAL_POPULAR.days
+    assert availability._availability_cache.get((7, "FR")) is not None
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import feeds
+
+
+def test_merge_feeds_dedupes_and_pages():
+    lists = {"Netflix": ([1, 2, 3], [9.0, 5.0, 1.0]), "Canal+": ([2, 4], [5.0, 3.0])}
+    assert feeds.merge_feeds(lists, 3) == [(1, ["Netflix"]), (2, ["Canal+", "Netflix"]), (4, ["Canal+"])]
+    assert feeds.merge_feeds(lists, 3, offset=2) == [(4, ["Canal+"]), (3, ["Netflix"])]
+
+
+@pytest.fixture
+def feed_state(monkeypatch):
+    monkeypatch.setattr(feeds, "_loaded_at", 0.0)
+    monkeypatch.setattr(feeds, "_feeds", {})
+    monkeypatch.setattr(feeds, "_movies", {})
+    monkeypatch.setattr(feeds, "_load_lock", asyncio.Lock())
+    loads = []
+
+    def load():
+        loads.append(time.monotonic())
+        time.sleep(0.05)
+        feeds._feeds = {("Netflix", "FR"): ([1], [1.0])}
+        feeds._movies = {1: {"id": 1, "title": "t", "overview": "o", "vote_average": 7.0, "poster_path": None}}
+        feeds._loaded_at = time.monotonic()
+        return 1
+
+    monkeypatch.setattr(feeds, "_load_feeds_sync", load)
+    return loads
+
+
+def test_concurrent_requests_share_one_load(feed_state):
+    async def scenario():
+        return await asyncio.gather(*(feeds.get_home_feed(["Netflix"], "FR") for _ in range(20)))
+
+    results = asyncio.run(scenario())
+    assert len(feed_state) == 1
+    assert all(r[0]["available_on"] == ["Netflix"] for r in results)
+
+
+def test_requests_never_reload_a_stale_snapshot(feed_state):
+    feeds._loaded_at = time.monotonic() - 10 * feeds.FEED_RELOAD_INTERVAL
+    asyncio.run(feeds.get_home_feed(["Netflix"], "FR"))
+    assert feed_state == []
+
+
+def test_background_reloader(feed_state):
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.create_task(feeds.run_feed_reloader(stop, interval=0.01))
+        await asyncio.sleep(0.2)
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+    assert len(feed_state) >= 2
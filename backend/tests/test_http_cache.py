@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_cache import (
+    AsyncCachingTransport, CachingTransport, SQLiteHTTPCache, cache_key, freshness_lifetime,
+)
+
+
+def _headers(**values):
+    return httpx.Headers({name.replace("_", "-"): value for name, value in values.items()})
+
+
+@pytest.mark.parametrize("headers, expected", [
+    (_headers(cache_control="max-age=300"), 300.0),
+    (_headers(cache_control="public, s-maxage=60, max-age=300"), 60.0),
+    (_headers(cache_control="max-age=abc"), 0.0),
+    (_headers(cache_control="no-store, max-age=300"), None),
+    (_headers(cache_control="no-cache"), 0.0),
+    (_headers(date="Mon, 19 Oct 2026 10:00:00 GMT", expires="Mon, 19 Oct 2026 10:05:00 GMT"), 300.0),
+    (_headers(date="Mon, 19 Oct 2026 10:00:00 GMT", expires="0"), 0.0),
+    (_headers(cache_control="max-age=10", expires="Mon, 19 Oct 2026 10:05:00 GMT"), 10.0),
+    (_headers(), 42.0),
+])
+def test_freshness_lifetime(headers, expected):
+    assert freshness_lifetime(headers, default_ttl=42.0) == expected
+
+
+def test_cache_key_ignores_param_order_and_secrets():
+    a = httpx.Request("GET", "https://api.themoviedb.org/3/discover/movie?page=2&language=fr-FR&api_key=one")
+    b = httpx.Request("GET", "https://api.themoviedb.org/3/discover/movie?api_key=two&language=fr-FR&page=2")
+    c = httpx.Request("GET", "https://api.themoviedb.org/3/discover/movie?language=fr-FR&page=3")
+    assert cache_key(a) == cache_key(b)
+    assert cache_key(a) != cache_key(c)
+    assert cache_key(a) != cache_key(httpx.Request("POST", a.url))
+
+
+def _origin(calls):
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"page": 1}, headers={"Cache-Control": "max-age=600", "ETag": '"v1"'})
+    return handler
+
+
+def test_second_identical_get_is_served_from_sqlite(tmp_path):
+    calls = []
+    store = SQLiteHTTPCache(str(tmp_path / "http_cache.sqlite"))
+    with httpx.Client(transport=CachingTransport(store, transport=httpx.MockTransport(_origin(calls)))) as client:
+        first = client.get("https://api.themoviedb.org/3/movie/popular", params={"page": 1, "api_key": "x"})
+        second = client.get("https://api.themoviedb.org/3/movie/popular", params={"api_key": "y", "page": 1})
+    assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+    assert second.json() == {"page": 1} and len(calls) == 1
+    store.close()
+
+    # Nouveau process : l'entrée est toujours dans le fichier SQLite
+    reopened = SQLiteHTTPCache(str(tmp_path / "http_cache.sqlite"))
+
+    async def fetch():
+        transport = AsyncCachingTransport(reopened, transport=httpx.MockTransport(_origin(calls)))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://api.themoviedb.org/3/movie/popular", params={"page": 1})
+
+    assert asyncio.run(fetch()).headers["x-cache"] == "HIT" and len(calls) == 1
+    reopened.close()
+
+
+def test_no_store_response_is_not_cached(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={}, headers={"Cache-Control": "no-store", "ETag": '"v1"'})
+
+    store = SQLiteHTTPCache(str(tmp_path / "http_cache.sqlite"))
+    with httpx.Client(transport=CachingTransport(store, transport=httpx.MockTransport(handler))) as client:
+        client.get("https://api.themoviedb.org/3/movie/1")
+        client.get("https://api.themoviedb.org/3/movie/1")
+    assert len(calls) == 2
+    store.close()
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+# Le script valide ses clés à l'import : valeurs factices, aucun appel réseau dans ces tests
+os.environ.setdefault("TMDB_API_KEY", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+import ingest_movies
+from app.services import embeddings
+
+
+class _FakeSession:
+    """Session minimale : le catalogue contient des vecteurs d'un autre modèle."""
+
+    def __init__(self, *args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def exec(self, statement):
+        return type("Result", (), {"all": lambda _: ["hashing/v1"]})()
+
+
+def test_ingest_refuses_a_second_embedding_model(monkeypatch):
+    monkeypatch.setattr(embeddings, "Session", _FakeSession)
+    monkeypatch.setattr(ingest_movies, "Session", lambda *args: pytest.fail("aucune ingestion attendue"))
+    with pytest.raises(embeddings.EmbeddingModelMismatch):
+        ingest_movies.fetch_and_vectorize()
+
+
+def test_next_pages_are_requested_while_the_current_one_is_processed(monkeypatch):
+    import asyncio
+    import time
+
+    import httpx
+
+    events = []
+
+    def handler(request):
+        page = int(request.url.params["page"])
+        events.append(("requested", page))
+        return httpx.Response(200, json={"page": page, "total_pages": 3, "results": [{"id": page}]})
+
+    def process(session, movies, source_tag="General"):
+        page = movies[0]["id"]
+        events.append(("processing", page))
+        time.sleep(0.05)  # Vectorisation lente
+        events.append(("processed", page))
+        return 1
+
+    monkeypatch.setattr(ingest_movies, "process_and_save_movies", process)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await ingest_movies.ingest_world_cinema(client, session=None)
+
+    assert asyncio.run(scenario()) == 3
+    for page in (1, 2):
+        assert events.index(("requested", page + 1)) < events.index(("processed", page))
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import sys
+import types
+
+from app.services import ai_mood
+
+
+def _fake_llm(monkeypatch, answer='{"with_genres": "27"}'):
+    calls = []
+
+    class InferenceClient:
+        def __init__(self, model, token):
+            pass
+
+        def text_generation(self, prompt, **kwargs):
+            calls.append(prompt)
+            return answer
+
+    monkeypatch.setitem(sys.modules, "huggingface_hub", types.SimpleNamespace(InferenceClient=InferenceClient))
+    monkeypatch.setenv("HUGGINGFACE_API_TOKEN", "test")
+    return calls
+
+
+def test_cache_set_does_not_write_the_file(monkeypatch, tmp_path):
+    path = tmp_path / "mood_cache.json"
+    monkeypatch.setattr(ai_mood, "MOOD_CACHE_PATH", str(path))
+    monkeypatch.setattr(ai_mood, "_mood_cache", ai_mood.TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(ai_mood, "_dirty", False)
+    _fake_llm(monkeypatch)
+
+    for mood in ("un film qui fait peur", "un film d'horreur", "frissons"):
+        ai_mood.get_tmdb_filters_from_mood(mood)
+    assert not path.exists()
+
+    assert ai_mood.flush_mood_cache() is True
+    assert len(json.loads(path.read_text(encoding="utf-8"))["entries"]) == 3
+    assert ai_mood.flush_mood_cache() is False  # Rien de neuf : pas de réécriture
+
+
+def test_flusher_writes_on_stop(monkeypatch, tmp_path):
+    path = tmp_path / "mood_cache.json"
+    monkeypatch.setattr(ai_mood, "MOOD_CACHE_PATH", str(path))
+    monkeypatch.setattr(ai_mood, "_mood_cache", ai_mood.TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(ai_mood, "_dirty", False)
+    _fake_llm(monkeypatch)
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.create_task(ai_mood.run_mood_cache_flusher(stop, interval=3600))
+        ai_mood.get_tmdb_filters_from_mood("un film qui fait peur")
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+    assert len(json.loads(path.read_text(encoding="utf-8"))["entries"]) == 1
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.deadline import Deadline
+from app.services import recommendation
+from app.services.recommendation import build_mood_conditions
+
+
+def _sql(conditions):
+    return [str(c.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})) for c in conditions]
+
+
+def test_invalid_llm_values_are_skipped():
+    conditions = build_mood_conditions({
+        "vote_average.gte": "high", "vote_count.gte": None, "vote_average.lte": "nan",
+        "primary_release_date.gte": "les années 80", "with_genres": "27",
+    })
+    assert len(conditions) == 1  # Seul le genre est exploitable
+
+
+def test_numeric_filters_are_parsed_and_clamped():
+    sql = _sql(build_mood_conditions({"vote_average.gte": "7.5", "vote_average.lte": 42, "vote_count.gte": "-10"}))
+    assert sql == ["movies.vote_average >= 7.5", "movies.vote_average <= 10.0", "movies.vote_count >= 0"]
+
+
+def test_year_upper_bound_includes_the_whole_year():
+    sql = _sql(build_mood_conditions({"primary_release_date.gte": "1980", "primary_release_date.lte": "1989"}))
+    assert sql == ["movies.release_date >= '1980'", "movies.release_date <= '1989-99-99'"]
+
+
+def test_slow_llm_falls_back_to_keyword_rules(monkeypatch):
+    def slow_llm(mood_text):
+        time.sleep(0.5)
+        return {"with_genres": "99"}
+
+    captured = {}
+
+    def search(filters, limit, vector=None):
+        captured.update(filters)
+        return []
+
+    monkeypatch.setattr(recommendation, "get_tmdb_filters_from_mood", slow_llm)
+    monkeypatch.setattr(recommendation, "_search_by_filters_sync", search)
+    monkeypatch.setattr(recommendation, "MOOD_PARSE_BUDGET_S", 0.05)
+
+    filters, movies = asyncio.run(recommendation.find_movies_by_mood("un film d'horreur des années 80", deadline=Deadline(4.0)))
+    assert filters == recommendation.local_rule_based_analysis("un film d'horreur des années 80") == captured
+    assert movies == []
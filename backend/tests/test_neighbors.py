@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from app.services import neighbors
+
+
+def _brute_force(matrix, k):
+    """Top-k cosinus par tri complet de chaque ligne (le film lui-même exclu)."""
+    scores = matrix @ matrix.T
+    np.fill_diagonal(scores, -np.inf)
+    idx = np.argsort(-scores, axis=1)[:, :k]
+    return idx, np.take_along_axis(scores, idx, axis=1)
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(0)
+    return neighbors.normalize_rows(rng.standard_normal((60, 16)).astype(np.float32))
+
+
+def test_blocked_top_k_matches_brute_force(matrix):
+    expected_idx, expected_scores = _brute_force(matrix, 5)
+    positions = np.arange(matrix.shape[0])
+    blocks = list(neighbors.top_k_blocked(matrix, matrix, 5, block_size=7, exclude=positions))
+
+    assert [start for start, _, _ in blocks] == list(range(0, 60, 7))
+    idx = np.vstack([block for _, block, _ in blocks])
+    scores = np.vstack([block for _, _, block in blocks])
+    np.testing.assert_array_equal(idx, expected_idx)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+
+
+def test_blocked_top_k_caps_k_to_catalog_size(matrix):
+    small = matrix[:3]
+    [(_, idx, _)] = neighbors.top_k_blocked(small, small, 10, exclude=np.arange(3))
+    assert idx.shape == (3, 2)
+    assert all(i not in row for i, row in enumerate(idx))
+
+
+def test_merge_neighbors_keeps_best_score_per_id():
+    ids, scores = neighbors.merge_neighbors([1, 2, 3], [0.9, 0.5, 0.1], [4, 2], [0.7, 0.6], k=3)
+    assert ids == [1, 4, 2]
+    assert scores == pytest.approx([0.9, 0.7, 0.6])
+
+
+def test_incremental_update_matches_full_rebuild(matrix, monkeypatch):
+    """40 films déjà dans le graphe, 20 nouveaux : l'incrémental donne le même graphe qu'un recalcul complet."""
+    k = 5
+    tmdb_ids = np.arange(1000, 1000 + matrix.shape[0], dtype=np.int64)
+    catalog = {"size": 40}
+    graph = {}
+
+    def save(rows):
+        for row in rows:
+            graph[row["tmdb_id"]] = (row["neighbor_ids"], row["scores"])
+
+    monkeypatch.setattr(neighbors, "_load_embeddings_sync",
+                        lambda: (tmdb_ids[:catalog["size"]], matrix[:catalog["size"]]))
+    monkeypatch.setattr(neighbors, "_load_graph_sync", lambda: {key: value for key, value in graph.items()})
+    monkeypatch.setattr(neighbors, "_save_graph_sync", save)
+    monkeypatch.setattr(neighbors, "_delete_graph_rows_sync", lambda ids: [graph.pop(i) for i in ids])
+
+    assert neighbors.build_neighbor_graph_sync(k=k, block_size=8) == 40
+    catalog["size"] = 60
+    written = neighbors.build_neighbor_graph_sync(k=k, block_size=8)
+    assert 20 <= written < 60  # Les listes inchangées ne sont pas réécrites
+
+    expected_idx, expected_scores = _brute_force(matrix, k)
+    for i, tmdb_id in enumerate(tmdb_ids):
+        ids, scores = graph[int(tmdb_id)]
+        assert ids == [int(tmdb_ids[j]) for j in expected_idx[i]]
+        assert scores == pytest.approx(expected_scores[i].tolist(), rel=1e-5)
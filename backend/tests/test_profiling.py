@@ -0,0 +1,13 @@
+from app.core import profiling
+from app.core.profiling import RequestProfiler
+
+
+def test_only_one_profile_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    first, second = RequestProfiler("/search"), RequestProfiler("/search")
+    assert first.start()
+    assert not second.start()
+    assert second.stop() is None
+    assert first.stop().exists()
+    assert second.start()  # Verrou libéré
+    second.stop()
@@ -0,0 +1,174 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.challenge import Challenge, ChallengeRule
+from app.services import progress
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+HORROR_80S = Challenge(
+    id="horror-80s", title="Horreur 80s", description="Trois films d'horreur après 1980", target_count=3,
+    rules=[ChallengeRule(field="genres", operator="contains", value="Horreur"),
+           ChallengeRule(field="year", operator="gte", value=1980)],
+)
+LONG_MOVIES = Challenge(
+    id="long", title="Films fleuves", description="Un film de plus de 2h30", target_count=1,
+    rules=[ChallengeRule(field="runtime", operator="gte", value=150)],
+)
+CHALLENGES = [HORROR_80S, LONG_MOVIES]
+
+
+def _movie(tmdb_id, genres, year, runtime):
+    return SimpleNamespace(tmdb_id=tmdb_id, title=f"Film {tmdb_id}", genres=genres, release_date=f"{year}-06-01",
+                           runtime=runtime, vote_average=7.0, vote_count=1000, popularity=10.0)
+
+
+MOVIES = {
+    1: _movie(1, ["Horreur"], 1985, 95),
+    2: _movie(2, ["Horreur", "Thriller"], 1991, 160),
+    3: _movie(3, ["Drame"], 1975, 200),
+    4: _movie(4, ["Horreur"], 1970, 90),
+    5: _movie(5, ["Horreur"], 2004, 100),
+}
+
+
+def _event_log(seed=0, size=200):
+    """Événements (event_id, user_id, tmdb_id, date) avec rejeux et revisionnages."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(size):
+        event_id = f"e{rng.randint(0, size // 2)}"  # Un tiers environ sont des rejeux
+        events.append((event_id, rng.choice(["alice", "bob", "chloe"]), rng.choice(list(MOVIES)), T0 + timedelta(minutes=i)))
+    return events
+
+
+def test_matching_challenges_applies_all_rules():
+    facts = progress.movie_facts(MOVIES[2])
+    assert [c.id for c in progress.matching_challenges(CHALLENGES, facts)] == ["horror-80s", "long"]
+    assert progress.matching_challenges(CHALLENGES, progress.movie_facts(MOVIES[4])) == []
+
+
+def test_replay_counts_each_movie_once():
+    events = [("alice", progress.movie_facts(MOVIES[i]), T0 + timedelta(days=n)) for n, i in enumerate([1, 1, 2, 5])]
+    rows = progress.replay_events(CHALLENGES, events)
+    horror = rows[("alice", "horror-80s")]
+    assert horror["movies_watched"] == [1, 2, 5]
+    assert horror["is_completed"] and horror["completed_at"] == T0 + timedelta(days=3)
+    assert rows[("alice", "long")]["current_count"] == 1
+
+
+def test_incremental_matches_replay():
+    """Le chemin incrémental (idempotent, événement par événement) et le rebuild donnent le même état."""
+    seen, log, incremental = set(), [], {}
+    for event_id, user_id, tmdb_id, watched_at in _event_log():
+        if event_id in seen:  # ON CONFLICT (event_id) DO NOTHING
+            continue
+        seen.add(event_id)
+        log.append((user_id, progress.movie_facts(MOVIES[tmdb_id]), watched_at))
+        for challenge in progress.matching_challenges(CHALLENGES, log[-1][1]):
+            row = incremental.setdefault((user_id, challenge.id), progress.new_progress_row(user_id, challenge.id))
+            progress.apply_watch(row, tmdb_id, challenge.target_count, watched_at)
+
+    assert incremental == progress.replay_events(CHALLENGES, log)
+
+
+def _challenge(*rules):
+    return Challenge(id="c", title="Défi", description="", rules=[ChallengeRule(**rule) for rule in rules])
+
+
+def test_mistyped_rules_are_rejected_on_upsert():
+    for rule in (
+        {"field": "year", "operator": "gte", "value": "1990"},
+        {"field": "genres", "operator": "gte", "value": "Horreur"},
+        {"field": "director", "operator": "eq", "value": "Carpenter"},
+        {"field": "runtime", "operator": "in", "value": ["long"]},
+    ):
+        with pytest.raises(ValueError):
+            progress.upsert_challenge_sync("c", _challenge(rule))
+    progress.validate_challenge(_challenge({"field": "genre", "operator": "contains", "value": "Horreur"},
+                                           {"field": "vote_average", "operator": "gt", "value": 7}))
+
+
+def test_mistyped_stored_rule_never_matches_instead_of_raising():
+    broken = _challenge({"field": "year", "operator": "gte", "value": "1990"})
+    facts = progress.movie_facts(MOVIES[2])
+    assert [c.id for c in progress.matching_challenges([broken, LONG_MOVIES], facts)] == ["long"]
+
+
+def test_genre_alias_matches():
+    challenge = _challenge({"field": "genre", "operator": "contains", "value": "Horreur"})
+    assert progress.matching_challenges([challenge], progress.movie_facts(MOVIES[1])) == [challenge]
+
+
+# --- Intégration Postgres (TEST_DATABASE_URL : base jetable, avec l'extension pgvector) ---
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def db_engine(monkeypatch):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL non défini")
+    from sqlalchemy import create_engine, text
+    from sqlmodel import SQLModel, Session
+    from app.models.movie import Movie
+    from app.models.progress import ChallengeDefinition, WatchEvent, UserProgress
+
+    engine = create_engine(TEST_DATABASE_URL)
+    tables = [Movie.__table__, ChallengeDefinition.__table__, WatchEvent.__table__, UserProgress.__table__]
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    SQLModel.metadata.drop_all(engine, tables=tables)
+    SQLModel.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        for m in MOVIES.values():
+            session.add(Movie(tmdb_id=m.tmdb_id, title=m.title, genres=m.genres, release_date=m.release_date,
+                              runtime=m.runtime, vote_average=m.vote_average, vote_count=m.vote_count,
+                              popularity=m.popularity))
+        session.commit()
+    monkeypatch.setattr(progress, "engine", engine)
+    progress._active_challenges.clear()
+    yield engine
+    SQLModel.metadata.drop_all(engine, tables=tables)
+    engine.dispose()
+
+
+def _progress_rows(engine):
+    from sqlmodel import Session, select
+    from app.models.progress import UserProgress
+    with Session(engine) as session:
+        return {
+            (r.user_id, r.challenge_id): (sorted(r.movies_watched), r.current_count, r.is_completed, r.completed_at)
+            for r in session.exec(select(UserProgress)).all()
+        }
+
+
+def test_watch_endpoint_then_rebuild(db_engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    for challenge in CHALLENGES:
+        assert client.put(f"/challenges/{challenge.id}", json=challenge.model_dump(mode="json")).status_code == 200
+
+    applied = progress.WATCH_EVENTS.value(result="applied")
+    duplicates = 0
+    for event_id, user_id, tmdb_id, watched_at in _event_log(size=60):
+        response = client.post(f"/users/{user_id}/watch",
+                               json={"tmdb_id": tmdb_id, "event_id": event_id, "watched_at": watched_at.isoformat()})
+        assert response.status_code == 200
+        duplicates += response.json()["duplicate"]
+    assert duplicates and progress.WATCH_EVENTS.value(result="applied") > applied
+    assert client.post("/users/alice/watch", json={"tmdb_id": 999}).status_code == 404
+
+    incremental = _progress_rows(db_engine)
+    assert incremental
+    progress.rebuild_progress_sync()
+    assert _progress_rows(db_engine) == incremental
+
+    dashboard = client.get("/users/alice/progress").json()
+    assert {row["challenge_id"] for row in dashboard} == {cid for uid, cid in incremental if uid == "alice"}
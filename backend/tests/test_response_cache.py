@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import MovieResponse, _etag_matches
+
+
+def test_weak_validators_match():
+    assert _etag_matches('W/"abc"', '"abc"')
+    assert _etag_matches('"zzz", W/"abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches('W/"abd"', '"abc"')
+    assert not _etag_matches(None, '"abc"')
+
+
+def test_search_served_from_async_cache_with_304(monkeypatch):
+    calls = []
+
+    async def run_search(request, deadline):
+        calls.append(request.query)
+        return [MovieResponse(id=1, title="Alien", overview="...", vote_average=8.5)], None
+
+    monkeypatch.setattr(main, "_run_search", run_search)
+    client = TestClient(main.app)
+
+    first = client.post("/search", json={"query": "huis clos spatial"})
+    assert first.status_code == 200 and first.headers["x-cache"] == "MISS"
+
+    second = client.post("/search", json={"query": "Huis clos  spatial"})
+    assert second.headers["x-cache"] == "HIT" and second.json() == first.json()
+
+    weak = "W/" + first.headers["etag"]
+    assert client.post("/search", json={"query": "huis clos spatial"}, headers={"If-None-Match": weak}).status_code == 304
+    assert calls == ["huis clos spatial"]
+
+
+def test_recurring_group_search_hits_cache(monkeypatch):
+    calls = []
+
+    async def find_candidates(query, deadline, after=None, anchor=None):
+        calls.append(query)
+        return [{"id": 2, "title": "The Thing", "overview": "...", "vote_average": 8.2, "poster_path": None}], None, query
+
+    async def filter_by_mask(movies, mask, country_code, deadline):
+        return [dict(m, available_on=["Netflix"], availability_status="fresh") for m in movies]
+
+    monkeypatch.setattr(main, "_find_candidates", find_candidates)
+    monkeypatch.setattr(main, "filter_movies_by_provider_mask", filter_by_mask)
+    client = TestClient(main.app)
+
+    def open_session(members):
+        return client.post("/session", json={"members": members}).json()["id"]
+
+    friday = open_session({"ana": ["Netflix", "Canal+"], "ben": ["Netflix"]})
+    first = client.post(f"/session/{friday}/search", json={"query": "horreur en huis clos"})
+    assert first.status_code == 200 and first.headers["x-cache"] == "MISS"
+
+    # La semaine suivante, même groupe (ordre des membres différent) : servi depuis le cache
+    next_friday = open_session({"ben": ["Netflix"], "ana": ["Netflix", "Canal+"]})
+    second = client.post(f"/session/{next_friday}/search", json={"query": "Horreur en huis clos"})
+    assert second.headers["x-cache"] == "HIT" and second.json() == first.json()
+    assert calls == ["horreur en huis clos"]
+
+    # Un membre part : nouveau masque, nouvelle entrée
+    client.delete(f"/session/{next_friday}/members/ben")
+    third = client.post(f"/session/{next_friday}/search", json={"query": "horreur en huis clos"})
+    assert third.headers["x-cache"] == "MISS" and len(calls) == 2
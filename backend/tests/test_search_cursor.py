@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.semantic_cache import SemanticCache
+from app.services import recommendation
+from app.services.embeddings import HashingEmbeddingProvider
+
+
+def test_next_page_embeds_the_exact_anchor_text(monkeypatch):
+    """Page 2 après éviction du cache d'embeddings : même texte brut, donc même vecteur et même parcours."""
+    embedder = HashingEmbeddingProvider()
+    embedded, scans = [], []
+
+    def embed(text):
+        embedded.append(text)
+        return embedder.embed_query(text)
+
+    def search(vector, limit, after):
+        scans.append(vector)
+        return [(SimpleNamespace(id=i), 0.1 * i) for i in range(1, limit + 1)]
+
+    monkeypatch.setattr(recommendation, "_get_embedding_sync", embed)
+    monkeypatch.setattr(recommendation, "_search_db_sync", search)
+    monkeypatch.setattr(recommendation, "_semantic_cache", SemanticCache(maxsize=8, threshold=0.8))
+    recommendation._embedding_cache.clear()
+
+    query = "Un film qui fait très PEUR"
+    _, position, anchor = asyncio.run(recommendation.find_similar_movies_page(query, limit=3))
+    assert anchor == query
+
+    # Paraphrase servie par le cache sémantique : l'ancre reste le texte brut de la première requête
+    _, _, paraphrase_anchor = asyncio.run(recommendation.find_similar_movies_page("un film qui fait tres peur", limit=3))
+    assert paraphrase_anchor == query
+
+    recommendation._embedding_cache.clear()  # Éviction / autre instance / redémarrage
+    asyncio.run(recommendation.find_similar_movies_page("un film qui fait tres peur", limit=3, after=position, anchor=anchor))
+    assert embedded[-1] == query
+    assert scans[-1] == scans[0]
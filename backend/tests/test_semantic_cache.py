@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.core import semantic_cache
+from app.core.semantic_cache import SemanticCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1.0  # Chaque appel avance : ordre LRU déterministe
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(semantic_cache.time, "time", clock)
+    return clock
+
+
+def _unit(*components):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(components)] = components
+    return vector
+
+
+def test_lookup_respects_threshold(clock):
+    cache = SemanticCache(maxsize=4, threshold=0.95)
+    cache.add(_unit(1.0), "peur")
+
+    value, similarity = cache.lookup(_unit(1.0, 0.2))  # cos ~ 0.98
+    assert value == "peur" and similarity == pytest.approx(0.98, abs=0.01)
+
+    value, similarity = cache.lookup(_unit(1.0, 0.5))  # cos ~ 0.89
+    assert value is None and similarity == pytest.approx(0.894, abs=0.01)
+
+
+def test_near_duplicate_replaces_entry(clock):
+    cache = SemanticCache(maxsize=4)
+    cache.add(_unit(1.0), "v1")
+    cache.add(_unit(2.0), "v2")  # Même direction
+    assert len(cache) == 1
+    assert cache.lookup(_unit(1.0))[0] == "v2"
+
+
+def test_evicts_least_recently_used(clock):
+    cache = SemanticCache(maxsize=2)
+    cache.add(_unit(1.0), "a")
+    cache.add(_unit(0.0, 1.0), "b")
+    assert cache.lookup(_unit(1.0))[0] == "a"  # "b" devient le moins récent
+    cache.add(_unit(0.0, 0.0, 1.0), "c")
+
+    assert len(cache) == 2
+    assert cache.lookup(_unit(0.0, 1.0))[0] is None
+    assert cache.lookup(_unit(1.0))[0] == "a"
+    assert cache.lookup(_unit(0.0, 0.0, 1.0))[0] == "c"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SemanticCache(maxsize=2, ttl=10)
+    cache.add(_unit(1.0), "a")
+    assert cache.lookup(_unit(1.0))[0] == "a"
+    clock.now += 60
+    assert cache.lookup(_unit(1.0))[0] is None
+
+
+def test_dimension_change_misses():
+    cache = SemanticCache(maxsize=2)
+    cache.add(_unit(1.0), "a")
+    assert cache.lookup(np.ones(4)) == (None, 0.0)
@@ -0,0 +1,19 @@
+from app.core.providers import decode_providers
+from app.models.session import SessionMode
+from app.services import sessions
+
+
+def test_group_mask_intersection_and_union():
+    members = {"a": ["Netflix", "Canal+"], "b": ["Netflix"]}
+    both = sessions.create_session(members, mode=SessionMode.INTERSECTION)
+    either = sessions.create_session(members, mode=SessionMode.UNION)
+    assert decode_providers(sessions.group_mask(both)) == ["Netflix"]
+    assert set(decode_providers(sessions.group_mask(either))) == {"Netflix", "Canal+"}
+
+
+def test_group_mask_follows_member_changes():
+    session = sessions.create_session({"a": ["Netflix"]})
+    sessions.set_member(session, "b", ["Canal+"])
+    assert sessions.group_mask(session) == 0
+    sessions.remove_member(session, "b")
+    assert decode_providers(sessions.group_mask(session)) == ["Netflix"]
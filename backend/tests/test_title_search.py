@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+from app.core.deadline import Deadline
+from app.services import title_search
+
+
+LOCAL = [{"tmdb_id": 1, "title": "Alien", "release_date": "1979-05-25", "poster_path": None,
+          "source": "local", "score": 0.1}]
+
+
+def test_slow_tmdb_fallback_returns_local_results_within_deadline(monkeypatch):
+    def slow_local(query, limit):
+        time.sleep(0.1)  # La requête locale consomme une partie du budget
+        return LOCAL
+
+    async def slow_tmdb(query):
+        await asyncio.sleep(5)
+        return [{"id": 2, "title": "Aliens"}]
+
+    monkeypatch.setattr(title_search, "search_titles_sync", slow_local)
+    monkeypatch.setattr(title_search.tmdb, "search_movies", slow_tmdb)
+    monkeypatch.setattr(title_search, "_fallback_cache", title_search.TTLCache(maxsize=10, ttl=60))
+
+    started = time.monotonic()
+    results = asyncio.run(title_search.search_titles("alein", deadline=Deadline(0.3)))
+    assert results == LOCAL
+    assert time.monotonic() - started < 0.5
+    assert title_search.TITLE_SEARCH_EVENTS.value(source="tmdb_timeout") >= 1
+
+
+def test_fast_tmdb_fallback_completes_local_results(monkeypatch):
+    async def fast_tmdb(query):
+        return [{"id": 1, "title": "Alien"}, {"id": 2, "title": "Aliens"}]
+
+    monkeypatch.setattr(title_search, "search_titles_sync", lambda query, limit: LOCAL)
+    monkeypatch.setattr(title_search.tmdb, "search_movies", fast_tmdb)
+    monkeypatch.setattr(title_search, "_fallback_cache", title_search.TTLCache(maxsize=10, ttl=60))
+
+    results = asyncio.run(title_search.search_titles("alein", deadline=Deadline(1.0)))
+    assert [m["tmdb_id"] for m in results] == [1, 2]
@@ -1,9 +1,23 @@
+import os
+import html
+
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 
 # --- CONFIGURATION ---
-API_URL = "http://127.0.0.1:8000"
-TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
+# Chargées par le navigateur depuis le CDN TMDB : la vignette (~5 Ko) s'affiche tout de suite,
+# l'affiche adaptée à une colonne sur 3 la remplace dès qu'elle est arrivée
+POSTER_THUMB_SIZE = "w92"
+POSTER_SIZE = "w342"
+POSTER_PLACEHOLDER = "https://via.placeholder.com/342x513?text=No+Poster"
+SEARCH_CACHE_TTL = 600    # Secondes : aligne l'UI sur la fraîcheur des disponibilités côté API
+# Disponibilités non confirmées (TMDB lent ou en panne) : comme l'API, on ne met pas ces réponses en cache
+DEGRADED_STATUSES = {"stale", "unknown"}
+# Secours si le backend ne répond pas sur /providers
+DEFAULT_PROVIDERS = ["Netflix", "Amazon Prime Video", "Disney Plus", "Canal+", "Apple TV Plus"]
 
 st.set_page_config(
     page_title="Cinéphile Companion",
@@ -34,42 +48,106 @@ st.markdown("""
         display: inline-block;
         margin-bottom: 4px;
     }
+    .poster {
+        width: 100%;
+        aspect-ratio: 2 / 3;
+        object-fit: cover;
+        background-size: cover;
+        border-radius: 8px;
+        margin-bottom: 8px;
+    }
 </style>
 """, unsafe_allow_html=True)
 
 # --- FONCTIONS ---
+@st.cache_resource
+def get_http_session():
+    """Session HTTP partagée entre les reruns : connexions keep-alive réutilisées vers l'API."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_providers():
+    """Plateformes servies par le backend (lève une exception si indisponible : rien n'est mis en cache)."""
+    response = get_http_session().get(f"{API_URL}/providers", timeout=5)
+    response.raise_for_status()
+    return [p["name"] for p in response.json()]
+
+def get_providers():
+    try:
+        return fetch_providers()
+    except Exception:
+        return DEFAULT_PROVIDERS
+
+class UncachedResults(Exception):
+    """Réponse vide ou dégradée : levée pour que st.cache_data ne la garde pas, mais affichée quand même."""
+
+    def __init__(self, results):
+        super().__init__("résultats non mis en cache")
+        self.results = results
+
+@st.cache_data(ttl=SEARCH_CACHE_TTL, max_entries=256, show_spinner=False)
+def fetch_search_results(query, providers):
+    """
+    Résultats mis en cache par (requête, providers triés) : un rerun (clic sur un expander,
+    changement de widget) ne relance pas la recherche. Les erreurs lèvent et ne sont pas mises en cache,
+    pas plus que les réponses vides ou dégradées (UncachedResults) : le rerun suivant redemande à l'API.
+    """
+    payload = {
+        "query": query,
+        "providers": list(providers)
+    }
+    response = get_http_session().post(
+        f"{API_URL}/search",
+        json=payload, # On envoie le payload complet
+        timeout=15 # Timeout un peu plus long car TMDB fetch en temps réel
+    )
+    response.raise_for_status()
+    results = response.json()
+    if not results or any(m.get("availability_status") in DEGRADED_STATUSES for m in results):
+        raise UncachedResults(results)
+    return results
+
 def search_movies_api(query, providers):
     """Appelle l'API avec query ET providers"""
     try:
-        payload = {
-            "query": query,
-            "providers": providers
-        }
-        response = requests.post(
-            f"{API_URL}/search",
-            json=payload, # On envoie le payload complet
-            timeout=15 # Timeout un peu plus long car TMDB fetch en temps réel
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Erreur API ({response.status_code})")
-            return []
+        return fetch_search_results(query.strip(), tuple(sorted(providers)))
+    except UncachedResults as e:
+        return e.results
+    except requests.HTTPError as e:
+        st.error(f"Erreur API ({e.response.status_code})")
+        return []
     except Exception as e:
         st.error(f"Erreur technique : {e}")
         return []
 
+def poster_html(movie):
+    """
+    <img> chargé directement par le navigateur (rien ne transite par Streamlit) : la vignette
+    en fond s'affiche d'abord, l'affiche POSTER_SIZE la recouvre une fois téléchargée.
+    """
+    poster_path = movie.get("poster_path")
+    alt = html.escape(movie.get("title") or "", quote=True)
+    if not poster_path:
+        return f'<img class="poster" src="{POSTER_PLACEHOLDER}" alt="{alt}">'
+    thumb = f"{TMDB_IMAGE_BASE_URL}/{POSTER_THUMB_SIZE}{poster_path}"
+    full = f"{TMDB_IMAGE_BASE_URL}/{POSTER_SIZE}{poster_path}"
+    return f'<img class="poster" src="{full}" style="background-image: url(\'{thumb}\')" loading="lazy" alt="{alt}">'
+
 # --- SIDEBAR ---
 with st.sidebar:
     st.title("Cinéphile Companion")
     st.write("### Vos Préférences")
     
-    # Liste de providers statique pour le MVP
-    # Idéalement, cette liste viendrait du backend aussi
+    # Liste servie par le backend (/providers), mise en cache une heure
+    available_providers = get_providers()
     selected_providers = st.multiselect(
         "Vos abonnements :",
-        ["Netflix", "Amazon Prime Video", "Disney+", "Canal+", "Apple TV+"],
-        default=["Netflix", "Amazon Prime Video"]
+        available_providers,
+        default=[p for p in ["Netflix", "Amazon Prime Video"] if p in available_providers]
     )
     
     st.info(f"Filtre actif : {len(selected_providers)} plateformes")
@@ -82,35 +160,39 @@ if st.button("Trouver le film parfait"):
     if not query:
         st.warning("Décrivez vos envies !")
     else:
-        with st.spinner("Recherche sémantique & vérification des disponibilités..."):
-            results = search_movies_api(query, selected_providers)
+        # La recherche reste affichée aux reruns suivants (servie par le cache)
+        st.session_state["active_search"] = query
+
+active_search = st.session_state.get("active_search")
+if active_search:
+    with st.spinner("Recherche sémantique & vérification des disponibilités..."):
+        results = search_movies_api(active_search, selected_providers)
+        
+        if results:
+            st.success(f"{len(results)} films trouvés !")
+            cols = st.columns(3)
             
-            if results:
-                st.success(f"{len(results)} films trouvés !")
-                cols = st.columns(3)
-                
-                for idx, movie in enumerate(results):
-                    with cols[idx % 3]:
-                        with st.container():
-                            # Poster
-                            img_url = f"{TMDB_IMAGE_BASE_URL}{movie['poster_path']}" if movie.get('poster_path') else "https://via.placeholder.com/500x750?text=No+Poster"
-                            st.image(img_url, use_container_width=True)
-                            
-                            # Titre
-                            st.subheader(movie["title"])
-                            
-                            # Badges de disponibilité
-                            if movie.get("available_on"):
-                                badges_html = ""
-                                for p in movie["available_on"]:
-                                    badges_html += f'<span class="provider-badge">{p}</span>'
-                                st.markdown(badges_html, unsafe_allow_html=True)
-                            else:
-                                st.caption("Non disponible sur vos plateformes (ou info manquante)")
-
-                            # Note et Synthèse
-                            st.caption(f"⭐ {movie['vote_average']}/10")
-                            with st.expander("Synopsis"):
-                                st.write(movie["overview"])
-            else:
-                st.warning("Aucun film correspondant trouvé sur vos plateformes.")
\ No newline at end of file
+            for idx, movie in enumerate(results):
+                with cols[idx % 3]:
+                    with st.container():
+                        # Poster
+                        st.markdown(poster_html(movie), unsafe_allow_html=True)
+                        
+                        # Titre
+                        st.subheader(movie["title"])
+                        
+                        # Badges de disponibilité
+                        if movie.get("available_on"):
+                            badges_html = ""
+                            for p in movie["available_on"]:
+                                badges_html += f'<span class="provider-badge">{p}</span>'
+                            st.markdown(badges_html, unsafe_allow_html=True)
+                        else:
+                            st.caption("Non disponible sur vos plateformes (ou info manquante)")
+
+                        # Note et Synthèse
+                        st.caption(f"⭐ {movie['vote_average']}/10")
+                        with st.expander("Synopsis"):
+                            st.write(movie["overview"])
+        else:
+            st.warning("Aucun film correspondant trouvé sur vos plateformes.")
\ No newline at end of file